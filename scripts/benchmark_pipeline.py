@@ -0,0 +1,412 @@
+#!/usr/bin/env python3
+"""
+House Price Pipeline Benchmark
+==============================
+
+Generates synthetic King County, India and BIS-shaped datasets at a range
+of sizes (10^4 - 10^8 rows), runs the filtering pipeline over them and
+records per-stage throughput and peak memory as JSON (best of --repeat
+runs). A comparison mode flags regressions against a stored baseline,
+allowing for the run-to-run spread and ignoring very short stages.
+
+Synthetic King County and India rows are bootstrapped from the real files
+in dataset_house_pricing/ (with fresh ids and jittered prices), so column
+names, encodings and value formats match what the pipeline sees in
+production. BIS series are generated as a date x country panel with one
+random walk per country, written in latin-1 like the originals.
+
+Each benchmark case runs in a fresh process so peak RSS is per case.
+
+With --bis-countries the pipeline is not run; instead the BIS derived
+metrics (bis_panel.add_derived_metrics) are timed on synthetic panels of
+that many countries, and the fitted log-log slope of time against
+country count is reported (1.0 means linear scaling).
+
+Usage:
+    python scripts/benchmark_pipeline.py --sizes 1e4 1e5 --output bench.json
+    python scripts/benchmark_pipeline.py --sizes 1e4 1e5 --compare bench.json
+    python scripts/benchmark_pipeline.py --bis-countries 100 200 400 800 1600
+
+Author: Data Analysis Team
+Date: November 2025
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import math
+import multiprocessing
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from bis_panel import PANEL_COLUMNS, add_derived_metrics
+from data_filter_pipeline import HousePriceDataFilter
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+SEED_DIR = os.path.join(os.path.dirname(SCRIPT_DIR), 'dataset_house_pricing')
+
+# Files written for each synthetic dataset kind, and the real file each is bootstrapped from
+DATASET_FILES = {
+    'king_county': ['Housing.csv', 'house_prices.csv'],
+    'india': ['House Price India.csv'],
+    'bis': ['nominal_index.csv', 'real_index.csv'],
+}
+
+GENERATION_CHUNK_ROWS = 1_000_000
+BIS_FIRST_DATE = '1927-03-31'
+BIS_QUARTERS = 387
+# Above this many rows per file the in-memory pipeline is replaced by streaming
+AUTO_STREAM_ROWS = 5_000_000
+DEFAULT_STREAM_CHUNKSIZE = 1_000_000
+# Best-of-N runs per case; single runs of the same code differ by well over 10%
+DEFAULT_REPEAT = 3
+# Stages faster than this (in both runs) are too short for throughput comparisons
+MIN_COMPARE_WALL_S = 0.05
+
+def parse_size(value):
+    """Parse a row count such as '10000', '1e6' or '2.5e5'"""
+    size = int(float(value))
+    if size < 1:
+        raise argparse.ArgumentTypeError(f"size must be a positive row count, got {value!r}")
+    return size
+
+def _id_column(df):
+    return 'id' if 'id' in df.columns else None
+
+def _price_column(df):
+    for col in ('price', 'Price'):
+        if col in df.columns:
+            return col
+    return None
+
+def generate_bootstrapped_file(seed_path, output_path, rows, rng, encoding='utf-8'):
+    """Write ``rows`` rows sampled with replacement from a real file.
+
+    Ids are made unique and prices jittered by up to ±10% so the output is
+    not a plain repetition of the seed data.
+    """
+    seed = pd.read_csv(seed_path, encoding=encoding)
+    id_col = _id_column(seed)
+    price_col = _price_column(seed)
+
+    written = 0
+    while written < rows:
+        n = min(GENERATION_CHUNK_ROWS, rows - written)
+        chunk = seed.iloc[rng.integers(0, len(seed), n)].reset_index(drop=True)
+        if id_col is not None:
+            chunk[id_col] = 1_000_000_000 + written + np.arange(n)
+        if price_col is not None:
+            jitter = rng.uniform(0.9, 1.1, n)
+            chunk[price_col] = (chunk[price_col] * jitter).round(0).astype(seed[price_col].dtype)
+        chunk.to_csv(output_path, mode='w' if written == 0 else 'a', header=written == 0,
+                     index=False, encoding=encoding)
+        written += n
+
+def generate_bis_file(seed_path, output_path, rows, rng):
+    """Write a BIS-shaped date x country panel with ``rows`` rows.
+
+    The real countries come first, then synthetic ones as needed to reach
+    the row count. Each country's series starts at a random quarter (earlier
+    quarters are blank, as in the real data) and follows a random walk
+    around an index of 100.
+    """
+    seed = pd.read_csv(seed_path, encoding='latin-1')
+    countries = seed[['country_code', 'country']].drop_duplicates().reset_index(drop=True)
+    n_countries = max(1, math.ceil(rows / BIS_QUARTERS))
+    if n_countries > len(countries):
+        extra = n_countries - len(countries)
+        synthetic = pd.DataFrame({
+            'country_code': [f'S{i:05d}' for i in range(extra)],
+            'country': [f'Synthetic economy {i}' for i in range(extra)],
+        })
+        countries = pd.concat([countries, synthetic], ignore_index=True)
+    countries = countries.iloc[:n_countries]
+
+    dates = pd.date_range(BIS_FIRST_DATE, periods=BIS_QUARTERS, freq='QE').strftime('%Y-%m-%d')
+    first_quarter = rng.integers(0, BIS_QUARTERS, n_countries)
+    level = np.full(n_countries, 100.0)
+
+    written = 0
+    quarters_per_chunk = max(1, GENERATION_CHUNK_ROWS // n_countries)
+    for block_start in range(0, BIS_QUARTERS, quarters_per_chunk):
+        if written >= rows:
+            break
+        block = range(block_start, min(BIS_QUARTERS, block_start + quarters_per_chunk))
+        prices = []
+        for quarter in block:
+            level *= 1 + rng.normal(0.01, 0.03, n_countries)
+            prices.append(np.where(quarter >= first_quarter, level.round(4), np.nan))
+        chunk = pd.DataFrame({
+            'date': np.repeat(dates[block.start:block.stop], n_countries),
+            'country_code': np.tile(countries['country_code'].to_numpy(), len(block)),
+            'country': np.tile(countries['country'].to_numpy(), len(block)),
+            'price': np.concatenate(prices),
+        }).iloc[:rows - written]
+        chunk.to_csv(output_path, mode='w' if written == 0 else 'a', header=written == 0,
+                     index=False, encoding='latin-1')
+        written += len(chunk)
+
+def generate_datasets(data_dir, rows, datasets, seed=0):
+    """Generate every requested synthetic dataset with ``rows`` rows per file"""
+    os.makedirs(data_dir, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    for kind in datasets:
+        for filename in DATASET_FILES[kind]:
+            output_path = os.path.join(data_dir, filename)
+            seed_path = os.path.join(SEED_DIR, filename)
+            if kind == 'bis':
+                generate_bis_file(seed_path, output_path, rows, rng)
+            else:
+                generate_bootstrapped_file(seed_path, output_path, rows, rng)
+
+def synthetic_bis_panel(n_countries, rng):
+    """Sorted BIS panel frame (as built by bis_panel.update_panel) with BIS_QUARTERS quarters per country"""
+    dates = pd.date_range(BIS_FIRST_DATE, periods=BIS_QUARTERS, freq='QE')
+    codes = np.array([f'S{i:05d}' for i in range(n_countries)])
+    frame = pd.DataFrame({
+        'country_code': pd.Categorical(np.repeat(codes, BIS_QUARTERS)),
+        'country': pd.Categorical(np.repeat(np.char.add('Synthetic economy ', codes), BIS_QUARTERS)),
+        'date': np.tile(dates.to_numpy(), n_countries),
+    })
+    for column in PANEL_COLUMNS:
+        if column.endswith('_index'):
+            steps = 1 + rng.normal(0.01, 0.03, (n_countries, BIS_QUARTERS))
+            frame[column] = (100 * np.cumprod(steps, axis=1)).ravel()
+        else:
+            frame[column] = np.nan
+    return frame
+
+def run_bis_scaling(args):
+    """Time the BIS derived metrics at each --bis-countries count and fit the scaling exponent"""
+    rng = np.random.default_rng(args.seed)
+    results = []
+    for n_countries in args.bis_countries:
+        panel = synthetic_bis_panel(n_countries, rng)
+        timings = []
+        for repeat in range(args.repeat):
+            start = time.perf_counter()
+            add_derived_metrics(panel)
+            timings.append(time.perf_counter() - start)
+        wall_s = min(timings)
+        results.append({'countries': n_countries, 'rows': len(panel), 'wall_s': wall_s,
+                        'rows_per_s': len(panel) / wall_s, 'us_per_country': wall_s / n_countries * 1e6})
+        print(f"   ✅ {n_countries:,} countries ({len(panel):,} rows): {wall_s:.4f}s, "
+              f"{wall_s / n_countries * 1e6:,.1f} µs per country")
+
+    exponent = None
+    if len(results) > 1:
+        exponent = float(np.polyfit(np.log([case['countries'] for case in results]),
+                                    np.log([case['wall_s'] for case in results]), 1)[0])
+        print(f"   📈 Scaling exponent {exponent:.2f} (1.0 = linear in the number of countries)")
+
+    return {
+        'meta': {
+            'created': datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'quarters_per_country': BIS_QUARTERS,
+            'repeat': args.repeat,
+        },
+        'bis_metrics_scaling': {'results': results, 'scaling_exponent': exponent},
+    }
+
+def _run_case(data_dir, output_dir, stream_chunksize, load_workers, profile_memory, verbose):
+    """Run the pipeline once and return its profile summary (executed in a fresh process)"""
+    pipeline = HousePriceDataFilter(input_dir=data_dir, output_dir=output_dir,
+                                    load_workers=load_workers, stream_chunksize=stream_chunksize,
+                                    profile_memory=profile_memory)
+    if verbose:
+        pipeline.run_pipeline()
+    else:
+        with contextlib.redirect_stdout(io.StringIO()):
+            pipeline.run_pipeline()
+    return pipeline.profiler.summary()
+
+def run_case_isolated(*args):
+    """Run a benchmark case in a freshly spawned process so peak RSS is its own"""
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+        return executor.submit(_run_case, *args).result()
+
+def best_of(summaries):
+    """Combine repeated runs: fastest wall/CPU time, highest throughput, largest memory peak.
+
+    ``wall_spread`` records how far the slowest run was above the fastest
+    (as a fraction), the run-to-run noise compare_results allows for.
+    """
+    stages = {}
+    slowest = {}
+    for summary in summaries:
+        for stage, info in summary['stages'].items():
+            if 'wall_s' not in info:
+                continue
+            best = stages.setdefault(stage, {})
+            for key in ('wall_s', 'cpu_s'):
+                best[key] = min(best.get(key, math.inf), info[key])
+            slowest[stage] = max(slowest.get(stage, 0), info['wall_s'])
+            for key in ('rows_per_s', 'peak_rss_mb', 'tracemalloc_peak_mb'):
+                if key in info:
+                    best[key] = max(best.get(key, 0), info[key])
+            best['rows'] = info.get('rows')
+    for stage, best in stages.items():
+        best['wall_spread'] = slowest[stage] / best['wall_s'] - 1 if best['wall_s'] > 0 else 0
+    return stages
+
+def run_benchmarks(args):
+    """Generate data and run every size, returning the machine-readable results"""
+    work_dir = args.data_dir or tempfile.mkdtemp(prefix='house_price_bench_')
+    results = []
+
+    try:
+        for rows in args.sizes:
+            data_dir = os.path.join(work_dir, f'rows_{rows}')
+            if not os.path.isdir(data_dir) or args.regenerate:
+                print(f"🔄 Generating {rows:,} rows per file ({', '.join(args.datasets)})...")
+                shutil.rmtree(data_dir, ignore_errors=True)
+                generate_datasets(data_dir, rows, args.datasets, seed=args.seed)
+
+            stream_chunksize = args.stream_chunksize
+            if stream_chunksize is None and rows > AUTO_STREAM_ROWS:
+                stream_chunksize = DEFAULT_STREAM_CHUNKSIZE
+            mode = 'stream' if stream_chunksize else 'memory'
+
+            summaries = []
+            for repeat in range(args.repeat):
+                output_dir = os.path.join(work_dir, f'output_{rows}')
+                shutil.rmtree(output_dir, ignore_errors=True)
+                summaries.append(run_case_isolated(data_dir, output_dir, stream_chunksize, args.workers,
+                                                   args.profile_memory, args.verbose))
+
+            stages = best_of(summaries)
+            results.append({'rows_per_file': rows, 'mode': mode, 'stages': stages})
+            pipeline = stages.get('pipeline', {})
+            print(f"   ✅ {rows:,} rows ({mode}): {pipeline.get('wall_s', 0):.3f}s end-to-end, "
+                  f"{pipeline.get('rows_per_s', 0):,.0f} rows/s, peak RSS {pipeline.get('peak_rss_mb', 0):.1f} MB")
+    finally:
+        if args.data_dir is None and not args.keep_data:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    return {
+        'meta': {
+            'created': datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'datasets': args.datasets,
+            'repeat': args.repeat,
+        },
+        'results': results,
+    }
+
+def compare_results(current, baseline, threshold, min_wall_s=MIN_COMPARE_WALL_S):
+    """List regressions: throughput down or peak memory up by more than ``threshold``.
+
+    The throughput threshold is widened by the larger run-to-run spread
+    (best_of's ``wall_spread``) of the two results, and stages that took
+    under ``min_wall_s`` in both are not compared on throughput at all.
+    """
+    baseline_cases = {(case['rows_per_file'], case['mode']): case for case in baseline['results']}
+    regressions = []
+
+    for case in current['results']:
+        key = (case['rows_per_file'], case['mode'])
+        if key not in baseline_cases:
+            continue
+        for stage, info in case['stages'].items():
+            old = baseline_cases[key]['stages'].get(stage)
+            if old is None:
+                continue
+            too_short = max(old.get('wall_s', 0), info.get('wall_s', 0)) < min_wall_s
+            if old.get('rows_per_s') and info.get('rows_per_s') and not too_short:
+                change = info['rows_per_s'] / old['rows_per_s'] - 1
+                noise = max(old.get('wall_spread', 0), info.get('wall_spread', 0))
+                if change < -(threshold + noise):
+                    regressions.append({'rows_per_file': key[0], 'mode': key[1], 'stage': stage,
+                                        'metric': 'rows_per_s', 'baseline': old['rows_per_s'],
+                                        'current': info['rows_per_s'], 'change_pct': change * 100})
+            for metric in ('peak_rss_mb', 'tracemalloc_peak_mb'):
+                if old.get(metric) and info.get(metric):
+                    change = info[metric] / old[metric] - 1
+                    if change > threshold:
+                        regressions.append({'rows_per_file': key[0], 'mode': key[1], 'stage': stage,
+                                            'metric': metric, 'baseline': old[metric],
+                                            'current': info[metric], 'change_pct': change * 100})
+    return regressions
+
+def parse_args():
+    """Parse command line options for the benchmark"""
+    parser = argparse.ArgumentParser(description="Benchmark the house price filtering pipeline")
+    parser.add_argument('--sizes', type=parse_size, nargs='+', default=[10_000, 100_000],
+                        help="rows per synthetic file, e.g. 1e4 1e5 1e6 (default: 1e4 1e5)")
+    parser.add_argument('--datasets', nargs='+', choices=sorted(DATASET_FILES), default=sorted(DATASET_FILES),
+                        help="synthetic dataset kinds to generate (default: all)")
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT,
+                        help=f"runs per size; the best run is kept (default: {DEFAULT_REPEAT})")
+    parser.add_argument('--workers', type=int, default=1, help="pipeline load workers (default: 1)")
+    parser.add_argument('--stream-chunksize', type=int, default=None,
+                        help=f"stream in chunks of this many rows (default: streaming above {AUTO_STREAM_ROWS:,} rows)")
+    parser.add_argument('--profile-memory', action='store_true', help="also record tracemalloc peaks")
+    parser.add_argument('--data-dir', default=None,
+                        help="directory for generated data, reused across runs (default: a temporary directory)")
+    parser.add_argument('--regenerate', action='store_true', help="regenerate data even if --data-dir has it")
+    parser.add_argument('--keep-data', action='store_true', help="keep the temporary data directory")
+    parser.add_argument('--seed', type=int, default=0, help="random seed for data generation")
+    parser.add_argument('--output', default='benchmark_results.json', help="where to write the JSON results")
+    parser.add_argument('--compare', default=None, help="baseline results JSON to check for regressions")
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help="relative change that counts as a regression, on top of the measured "
+                             "run-to-run spread (default: 0.10)")
+    parser.add_argument('--min-stage-seconds', type=float, default=MIN_COMPARE_WALL_S,
+                        help="skip throughput comparisons of stages shorter than this "
+                             f"(default: {MIN_COMPARE_WALL_S})")
+    parser.add_argument('--verbose', action='store_true', help="show the pipeline's own output")
+    parser.add_argument('--bis-countries', type=int, nargs='+', default=None,
+                        help="instead of the pipeline, time the BIS derived metrics on panels with "
+                             "these numbers of countries, e.g. 100 200 400 800")
+    args = parser.parse_args()
+    if args.bis_countries and args.compare:
+        parser.error("--compare applies to pipeline runs, not --bis-countries")
+    return args
+
+def main():
+    """Run the benchmark, save the results and optionally compare with a baseline"""
+    args = parse_args()
+    if args.bis_countries:
+        print(f"🔄 Timing BIS derived metrics for {', '.join(f'{n:,}' for n in args.bis_countries)} countries...")
+        results = run_bis_scaling(args)
+    else:
+        results = run_benchmarks(args)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"\n📁 Results saved to {args.output}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare_results(results, baseline, args.threshold, args.min_stage_seconds)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+            for item in regressions:
+                print(f"   {item['rows_per_file']:,} rows ({item['mode']}) {item['stage']} {item['metric']}: "
+                      f"{item['baseline']:,.1f} -> {item['current']:,.1f} ({item['change_pct']:+.1f}%)")
+            sys.exit(1)
+        print(f"\n✅ No regressions beyond {args.threshold:.0%} against {args.compare}")
+
+if __name__ == "__main__":
+    main()
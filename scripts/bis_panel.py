@@ -0,0 +1,214 @@
+"""
+BIS Residential Property Price Panel
+====================================
+
+The four BIS files (nominal_index, nominal_year, real_index, real_year)
+share one quarterly date x country grid. Instead of four flat tables that
+each repeat the date and country columns, the panel keeps one
+(country_code, date) index with a value column per series, sorted by
+country and then date and stored as Parquet.
+
+Because the rows are sorted, every country is one contiguous block and
+its dates are ascending, so a query such as "US, 1990-2020, real_index"
+is two binary searches (np.searchsorted) and a positional slice.
+
+The pipeline folds series in one at a time (update_panel), so a rerun
+after one BIS file changed only replaces that column, then appends the
+derived metrics (add_derived_metrics): year-on-year growth, multi-year
+CAGR, rolling volatility and the nominal/real spread. They are computed
+with grouped shifts and one rolling pass over the sorted panel, so the
+cost is linear in the number of countries.
+
+Author: Data Analysis Team
+Date: November 2025
+"""
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+# Filtered BIS file -> panel value column
+BIS_PANEL_SERIES = {
+    'nominal_index.csv': 'nominal_index',
+    'nominal_year.csv': 'nominal_year',
+    'real_index.csv': 'real_index',
+    'real_year.csv': 'real_year',
+}
+PANEL_COLUMNS = list(BIS_PANEL_SERIES.values())
+PANEL_KEYS = ['country_code', 'date']
+
+# Derived metrics, in percent like the BIS *_year series: growth over 4
+# quarters, compound annual growth over CAGR_YEARS, annualized standard
+# deviation of quarterly log returns over VOLATILITY_QUARTERS, and nominal
+# minus real year-on-year growth (the implied house price deflator)
+CAGR_YEARS = 5
+VOLATILITY_QUARTERS = 8
+DERIVED_COLUMNS = [
+    'nominal_yoy', 'real_yoy',
+    f'nominal_cagr_{CAGR_YEARS}y', f'real_cagr_{CAGR_YEARS}y',
+    f'nominal_volatility_{VOLATILITY_QUARTERS}q', f'real_volatility_{VOLATILITY_QUARTERS}q',
+    'nominal_real_spread',
+]
+
+BIS_PANEL_FILENAME = 'bis_panel.parquet'
+# Bump when the stored layout changes; older stores are rebuilt from scratch
+PANEL_FORMAT_VERSION = 2
+PANEL_METADATA_KEY = b'bis_panel'
+
+def series_frame(df, column):
+    """One filtered BIS file as (country_code, country, date, <column>) with plain dtypes"""
+    dates = df['date']
+    if not pd.api.types.is_datetime64_any_dtype(dates):
+        dates = pd.to_datetime(dates, format='%Y-%m-%d', errors='coerce')
+    frame = pd.DataFrame({
+        'country_code': df['country_code'].astype(str).to_numpy(),
+        'country': df['country'].astype(str).to_numpy(),
+        'date': dates.to_numpy(dtype='datetime64[ns]'),
+        column: df['price'].to_numpy(dtype='float64', na_value=np.nan),
+    })
+    return frame.dropna(subset=['date'])
+
+def update_panel(panel, column, df):
+    """Return ``panel`` with series ``column`` replaced by the filtered BIS frame ``df``.
+
+    ``panel`` may be None to start a new one, and ``df`` None removes the
+    series. Rows left without a value in any series are dropped; the result
+    is sorted by country code and date.
+    """
+    if panel is None or panel.empty:
+        merged = series_frame(df, column) if df is not None else pd.DataFrame(columns=PANEL_KEYS + ['country'])
+    elif df is None:
+        merged = panel.drop(columns=[column]).astype({'country_code': str, 'country': str})
+    else:
+        base = panel.drop(columns=[column]).astype({'country_code': str, 'country': str})
+        merged = base.merge(series_frame(df, column), on=PANEL_KEYS, how='outer', suffixes=('', '_new'))
+        merged['country'] = merged['country'].fillna(merged.pop('country_new'))
+
+    for series in PANEL_COLUMNS:
+        if series not in merged.columns:
+            merged[series] = np.nan
+    merged = merged.dropna(subset=PANEL_COLUMNS, how='all')
+    merged = merged.sort_values(PANEL_KEYS, kind='stable', ignore_index=True)
+    merged = merged[['country_code', 'country', 'date'] + PANEL_COLUMNS]
+    return merged.astype({'country_code': 'category', 'country': 'category'})
+
+def add_derived_metrics(panel):
+    """Return the sorted ``panel`` with DERIVED_COLUMNS appended.
+
+    Lags come from one groupby-shift per horizon and are only used where
+    the lagged row is exactly that many quarters earlier, so gaps in a
+    series give NaN rather than growth over the wrong span.
+    """
+    dates = panel['date']
+    indexes = pd.DataFrame({
+        'nominal': panel['nominal_index'].to_numpy(dtype='float64'),
+        'real': panel['real_index'].to_numpy(dtype='float64'),
+        'quarter': (dates.dt.year * 4 + dates.dt.quarter).to_numpy(dtype='float64'),
+    })
+    grouped = indexes.groupby(panel['country_code'].cat.codes.to_numpy(), sort=False)
+
+    def lagged(quarters):
+        shifted = grouped.shift(quarters)
+        shifted.loc[(indexes['quarter'] - shifted['quarter'] != quarters).to_numpy(), ['nominal', 'real']] = np.nan
+        return shifted
+
+    year_ago, cagr_base, quarter_ago = lagged(4), lagged(4 * CAGR_YEARS), lagged(1)
+    derived = {}
+    for kind in ('nominal', 'real'):
+        derived[f'{kind}_yoy'] = (indexes[kind] / year_ago[kind] - 1) * 100
+        derived[f'{kind}_cagr_{CAGR_YEARS}y'] = ((indexes[kind] / cagr_base[kind]) ** (1 / CAGR_YEARS) - 1) * 100
+    for kind in ('nominal', 'real'):
+        # Each country's first return is NaN (no lag), so a window reaching into
+        # the previous country never has VOLATILITY_QUARTERS values and stays NaN
+        returns = np.log(indexes[kind] / quarter_ago[kind])
+        volatility = returns.rolling(VOLATILITY_QUARTERS, min_periods=VOLATILITY_QUARTERS).std()
+        derived[f'{kind}_volatility_{VOLATILITY_QUARTERS}q'] = volatility * np.sqrt(4) * 100
+    derived['nominal_real_spread'] = derived['nominal_yoy'] - derived['real_yoy']
+
+    result = panel.copy()
+    for column in DERIVED_COLUMNS:
+        result[column] = derived[column].to_numpy()
+    return result
+
+def save_panel(panel, path, sources):
+    """Write the panel as Parquet, recording ``sources`` ({series: {'sha256': ...}}) in its metadata"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    table = pa.Table.from_pandas(panel, preserve_index=False)
+    metadata = {'format_version': PANEL_FORMAT_VERSION, 'sources': sources}
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}),
+                                           PANEL_METADATA_KEY: json.dumps(metadata).encode('utf-8')})
+    tmp_path = path + '.tmp'
+    pq.write_table(table, tmp_path)
+    os.replace(tmp_path, path)
+
+def load_panel(path):
+    """Read a stored panel; returns (frame, metadata), or (None, {}) for a missing or outdated store"""
+    import pyarrow.parquet as pq
+    try:
+        table = pq.read_table(path)
+    except (OSError, ValueError):
+        return None, {}
+    metadata = json.loads((table.schema.metadata or {}).get(PANEL_METADATA_KEY, b'{}'))
+    if metadata.get('format_version') != PANEL_FORMAT_VERSION:
+        return None, {}
+    return table.to_pandas(), metadata
+
+def _as_timestamp(value, end=False):
+    """Query bound as datetime64[ns]; a bare year means its first (or, for ``end``, last) day"""
+    if value is None:
+        return None
+    if isinstance(value, (int, np.integer)):
+        value = f"{value}-12-31" if end else f"{value}-01-01"
+    return np.datetime64(pd.Timestamp(value), 'ns')
+
+class BisPanel:
+    """Range queries over a sorted panel frame (see update_panel).
+
+    Country blocks and dates are located by binary search on the sorted
+    key arrays, so a query costs O(log n) plus the size of its result.
+    """
+
+    def __init__(self, frame):
+        self.frame = frame
+        self.codes = frame['country_code'].to_numpy(dtype=str)
+        self.dates = frame['date'].to_numpy(dtype='datetime64[ns]')
+        self.value_columns = [column for column in frame.columns if column not in ('country_code', 'country', 'date')]
+        pairs = frame[['country', 'country_code']].drop_duplicates()
+        self.code_for_name = dict(zip(pairs['country'].astype(str), pairs['country_code'].astype(str)))
+
+    @classmethod
+    def load(cls, path):
+        frame, _ = load_panel(path)
+        if frame is None:
+            raise FileNotFoundError(f"no BIS panel store at {path}; run data_filter_pipeline.py first")
+        return cls(frame)
+
+    def countries(self):
+        """{country_code: country name}"""
+        return {code: name for name, code in sorted(self.code_for_name.items(), key=lambda item: item[1])}
+
+    def rows(self, country, start=None, end=None):
+        """(first, stop) row positions of ``country`` (code or name) between ``start`` and ``end`` inclusive"""
+        code = self.code_for_name.get(country, country)
+        first = int(np.searchsorted(self.codes, code, side='left'))
+        stop = int(np.searchsorted(self.codes, code, side='right'))
+        start, end = _as_timestamp(start), _as_timestamp(end, end=True)
+        if start is not None:
+            first += int(np.searchsorted(self.dates[first:stop], start, side='left'))
+        if end is not None:
+            stop = first + int(np.searchsorted(self.dates[first:stop], end, side='right'))
+        return first, max(first, stop)
+
+    def query(self, country, start=None, end=None, series=None):
+        """Date-indexed values of ``country`` between ``start`` and ``end`` (dates or years, inclusive).
+
+        ``series`` is one PANEL_COLUMNS or DERIVED_COLUMNS name (returns a
+        Series), a list of them, or None for all of them (returns a DataFrame).
+        """
+        first, stop = self.rows(country, start, end)
+        block = self.frame.iloc[first:stop]
+        columns = self.value_columns if series is None else series
+        return block.set_index('date')[columns]
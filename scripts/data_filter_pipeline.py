@@ -13,13 +13,925 @@ Date: November 2025
 import pandas as pd
 import numpy as np
 import os
+import sys
+import argparse
+import codecs
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 from datetime import datetime
 import json
+import tempfile
 import warnings
 warnings.filterwarnings('ignore')
 
+from bis_panel import (BIS_PANEL_FILENAME, BIS_PANEL_SERIES, DERIVED_COLUMNS, PANEL_COLUMNS, add_derived_metrics,
+                       load_panel, save_panel, update_panel)
+from file_hashing import file_fingerprint
+
+try:
+    import resource  # peak RSS; not available on Windows
+except ImportError:
+    resource = None
+
+LOAD_EXECUTORS = {
+    'thread': ThreadPoolExecutor,
+    'process': ProcessPoolExecutor,
+}
+
+# Candidate encodings in order of preference (latin-1 accepts every byte,
+# so it acts as the catch-all)
+CANDIDATE_ENCODINGS = ['utf-8', 'latin-1', 'cp1252']
+ENCODING_CHUNK_BYTES = 1024 * 1024
+
+def detect_encoding(filepath, candidates=CANDIDATE_ENCODINGS, sample_bytes=None):
+    """Pick the first candidate encoding that can decode the file.
+
+    The raw bytes are streamed once and fed to an incremental decoder per
+    candidate, so no CSV parsing happens until the codec is known.  Pass
+    ``sample_bytes`` to only inspect the start of very large files.
+    """
+    decoders = {enc: codecs.getincrementaldecoder(enc)() for enc in candidates}
+    remaining = sample_bytes
+    
+    with open(filepath, 'rb') as f:
+        if f.read(len(codecs.BOM_UTF8)) == codecs.BOM_UTF8:
+            return 'utf-8-sig'
+        f.seek(0)
+        
+        while decoders:
+            size = ENCODING_CHUNK_BYTES if remaining is None else min(ENCODING_CHUNK_BYTES, remaining)
+            chunk = f.read(size)
+            # Only flush decoders at true end of file; a truncated sample may
+            # legitimately end in the middle of a multi-byte character
+            at_eof = len(chunk) < size
+            for enc in list(decoders):
+                try:
+                    decoders[enc].decode(chunk, final=at_eof)
+                except UnicodeDecodeError:
+                    del decoders[enc]
+            if remaining is not None:
+                remaining -= len(chunk)
+                if remaining <= 0:
+                    break
+            if at_eof:
+                break
+    
+    for enc in candidates:
+        if enc in decoders:
+            return enc
+    raise ValueError("could not decode file - encoding issues")
+
+# Per-dataset read schemas. Counts, sizes and years are downcast to the
+# smallest integer type that holds them, repeated strings become categories
+# and date columns are parsed while reading. Prices and coordinates stay
+# float64 so saved values are not perturbed.
+KING_COUNTY_DTYPES = {
+    'id': 'int64',
+    'price': 'float64',
+    'bedrooms': 'int8',
+    'bathrooms': 'float32',
+    'sqft_living': 'int32',
+    'sqft_lot': 'int32',
+    'floors': 'float32',
+    'view': 'int8',
+    'grade': 'int8',
+    'sqft_above': 'int32',
+    'sqft_basement': 'int32',
+    'yr_built': 'int16',
+    'yr_renovated': 'int16',
+    'zipcode': 'int32',
+    'lat': 'float64',
+    'long': 'float64',
+    'sqft_living15': 'int32',
+    'sqft_lot15': 'int32',
+}
+
+INDIA_DETAILED_DTYPES = {
+    'id': 'int64',
+    'Date': 'int32',
+    'number of bedrooms': 'int8',
+    'number of bathrooms': 'float32',
+    'living area': 'int32',
+    'lot area': 'int32',
+    'number of floors': 'float32',
+    'waterfront present': 'int8',
+    'number of views': 'int8',
+    'condition of the house': 'int8',
+    'grade of the house': 'int8',
+    'Area of the house(excluding basement)': 'int32',
+    'Area of the basement': 'int32',
+    'Built Year': 'int16',
+    'Renovation Year': 'int16',
+    'Postal Code': 'int32',
+    'Lattitude': 'float64',
+    'Longitude': 'float64',
+    'living_area_renov': 'int32',
+    'lot_area_renov': 'int32',
+    'Number of schools nearby': 'int8',
+    'Distance from the airport': 'int16',
+    'Price': 'int64',
+}
+
+BIS_SCHEMA = {
+    'dtype': {'country_code': 'category', 'country': 'category', 'price': 'float64'},
+    'dates': {'date': '%Y-%m-%d'},
+}
+
+DATASET_SCHEMAS = {
+    'House Price India.csv': {'dtype': INDIA_DETAILED_DTYPES, 'dates': {}},
+    # Same King County sales, encoded differently (N/Y waterfront, text condition)
+    'house_prices.csv': {
+        'dtype': {**KING_COUNTY_DTYPES, 'waterfront': 'category', 'condition': 'category'},
+        'dates': {'date': '%Y%m%dT%H%M%S'},
+    },
+    'Housing.csv': {
+        'dtype': {**KING_COUNTY_DTYPES, 'waterfront': 'int8', 'condition': 'int8'},
+        'dates': {'date': '%Y%m%dT%H%M%S'},
+    },
+    'nominal_index.csv': BIS_SCHEMA,
+    'nominal_year.csv': BIS_SCHEMA,
+    'real_index.csv': BIS_SCHEMA,
+    'real_year.csv': BIS_SCHEMA,
+}
+
+# Declarative filter rules. Each rule is evaluated to a boolean "keep"
+# array over the whole frame; the arrays are AND-ed into one mask that is
+# applied once. A rule whose columns are missing from a dataset is skipped.
+#   not_null     - all listed columns present
+#   range        - min <= column <= max ('min_inclusive': False for >, 'allow_null' keeps NaN)
+#   bbox         - (lat, lon) inside 'lat_range' x 'lon_range'
+#   not_origin   - (lat, lon) is not exactly (0, 0)
+#   valid_date   - column parses as a date (the parsed values replace the column)
+#   not_all_null - at least one non-null value in the row
+#   not_duplicate - first occurrence of a fully duplicated row
+# 'current_year' as a bound is resolved when the rules are evaluated.
+INDIA_DETAILED_RULES = [
+    # Remove rows with null prices (essential column)
+    {'name': 'price_not_null', 'type': 'not_null', 'columns': ['Price']},
+    # Remove unrealistic prices (less than ₹50,000 or more than ₹50,00,00,000)
+    {'name': 'price_range', 'type': 'range', 'columns': ['Price'], 'min': 50000, 'max': 500000000},
+    # Remove rows with impossible bedroom/bathroom counts
+    {'name': 'bedrooms_range', 'type': 'range', 'columns': ['number of bedrooms'], 'min': 1, 'max': 20},
+    {'name': 'bathrooms_range', 'type': 'range', 'columns': ['number of bathrooms'], 'min': 0.5, 'max': 15},
+    # Remove rows with impossible areas
+    {'name': 'living_area_range', 'type': 'range', 'columns': ['living area'], 'min': 0, 'min_inclusive': False, 'max': 50000},
+    {'name': 'lot_area_range', 'type': 'range', 'columns': ['lot area'], 'min': 0, 'min_inclusive': False, 'max': 1000000},
+    # Remove rows with invalid coordinates (null, or the clearly invalid 0,0)
+    {'name': 'coordinates_not_null', 'type': 'not_null', 'columns': ['Lattitude', 'Longitude']},
+    {'name': 'coordinates_not_origin', 'type': 'not_origin', 'columns': ['Lattitude', 'Longitude']},
+    # Remove rows with invalid years
+    {'name': 'built_year_range', 'type': 'range', 'columns': ['Built Year'], 'min': 1800, 'max': 'current_year'},
+]
+
+KING_COUNTY_RULES = [
+    # Remove rows with null prices
+    {'name': 'price_not_null', 'type': 'not_null', 'columns': ['price']},
+    # Remove unrealistic prices (less than $10,000 or more than $50,000,000)
+    {'name': 'price_range', 'type': 'range', 'columns': ['price'], 'min': 10000, 'max': 50000000},
+    # Remove impossible bedroom/bathroom counts
+    {'name': 'bedrooms_range', 'type': 'range', 'columns': ['bedrooms'], 'min': 0, 'max': 20},
+    {'name': 'bathrooms_range', 'type': 'range', 'columns': ['bathrooms'], 'min': 0, 'max': 15},
+    # Remove impossible square footage
+    {'name': 'sqft_living_range', 'type': 'range', 'columns': ['sqft_living'], 'min': 0, 'min_inclusive': False, 'max': 20000},
+    {'name': 'sqft_lot_range', 'type': 'range', 'columns': ['sqft_lot'], 'min': 0, 'min_inclusive': False, 'max': 2000000},
+    # Remove invalid coordinates - King County is roughly lat 47.0-48.0, long -122.6 to -121.0
+    {'name': 'coordinates_not_null', 'type': 'not_null', 'columns': ['lat', 'long']},
+    {'name': 'coordinates_in_king_county', 'type': 'bbox', 'columns': ['lat', 'long'],
+     'lat_range': (47.0, 48.0), 'lon_range': (-122.6, -121.0)},
+    # Remove invalid years
+    {'name': 'yr_built_range', 'type': 'range', 'columns': ['yr_built'], 'min': 1800, 'max': 'current_year'},
+    # Remove invalid grades
+    {'name': 'grade_range', 'type': 'range', 'columns': ['grade'], 'min': 1, 'max': 13},
+]
+
+INTERNATIONAL_RULES = [
+    # Convert date column, dropping unparseable dates
+    {'name': 'date_valid', 'type': 'valid_date', 'columns': ['date']},
+    # Keep only rows with price data
+    {'name': 'price_not_null', 'type': 'not_null', 'columns': ['price']},
+    # Remove extreme outliers in price changes (more than ±200% change seems unrealistic)
+    {'name': 'price_range', 'type': 'range', 'columns': ['price'], 'min': -200, 'max': 200},
+]
+
+# Applied to the India city index after it is melted to (city, quarter, index);
+# the index has base 100 (2010-11), so values outside 10-1000 are errors
+INDIA_INDEX_RULES = [
+    {'name': 'city_quarter_not_null', 'type': 'not_null', 'columns': ['city', 'quarter', 'index']},
+    {'name': 'index_range', 'type': 'range', 'columns': ['index'], 'min': 10, 'max': 1000},
+]
+
+GENERIC_RULES = [
+    {'name': 'row_not_empty', 'type': 'not_all_null', 'columns': []},
+    {'name': 'row_not_duplicate', 'type': 'not_duplicate', 'columns': []},
+]
+
+def _float_values(series):
+    """Column values as a float64 NumPy array with NaN for missing"""
+    return series.to_numpy(dtype='float64', na_value=np.nan)
+
+def _evaluate_rule(df, rule, current_year):
+    """Keep-mask for a single rule, plus parsed replacement values for valid_date rules"""
+    rule_type = rule['type']
+    columns = rule['columns']
+    
+    if rule_type == 'not_null':
+        return df[columns].notna().to_numpy().all(axis=1), None
+    if rule_type == 'range':
+        values = _float_values(df[columns[0]])
+        low, high = (current_year if bound == 'current_year' else bound
+                     for bound in (rule.get('min'), rule.get('max')))
+        keep = np.ones(len(values), dtype=bool)
+        if low is not None:
+            keep &= values >= low if rule.get('min_inclusive', True) else values > low
+        if high is not None:
+            keep &= values <= high
+        if rule.get('allow_null'):
+            keep |= np.isnan(values)
+        return keep, None
+    if rule_type == 'bbox':
+        lat, lon = (_float_values(df[col]) for col in columns)
+        (lat_min, lat_max), (lon_min, lon_max) = rule['lat_range'], rule['lon_range']
+        return (lat >= lat_min) & (lat <= lat_max) & (lon >= lon_min) & (lon <= lon_max), None
+    if rule_type == 'not_origin':
+        lat, lon = (_float_values(df[col]) for col in columns)
+        return ~((lat == 0) & (lon == 0)), None
+    if rule_type == 'valid_date':
+        parsed = df[columns[0]]
+        if not pd.api.types.is_datetime64_any_dtype(parsed):
+            parsed = pd.to_datetime(parsed, errors='coerce')
+        return parsed.notna().to_numpy(), parsed
+    if rule_type == 'not_all_null':
+        return df.notna().to_numpy().any(axis=1), None
+    if rule_type == 'not_duplicate':
+        return ~df.duplicated().to_numpy(), None
+    raise ValueError(f"Unknown filter rule type: {rule_type!r}")
+
+def melt_city_index(df):
+    """Wide city index table -> tidy (city, quarter, index) rows, sorted by city and quarter.
+
+    The first column names the city; every other column is a quarter
+    labelled ' MM-YYYY' (month of the quarter's end, often with a leading
+    space). Labels are parsed once into a quarterly Period dtype and the
+    values converted in one vectorized call; unparseable labels or values
+    become nulls for the filter rules to drop.
+    """
+    value_columns = df.columns[1:]
+    quarters = pd.to_datetime(pd.Index(value_columns).astype(str).str.strip(), format='%m-%Y',
+                              errors='coerce').to_period('Q')
+    values = pd.to_numeric(pd.Series(df[value_columns].to_numpy().ravel()), errors='coerce')
+    cities = df.iloc[:, 0].astype('string').str.strip().to_numpy()
+    tidy = pd.DataFrame({
+        'city': np.repeat(cities, len(value_columns)),
+        'quarter': pd.PeriodIndex(np.tile(quarters, len(df)), freq='Q'),
+        'index': values.to_numpy(dtype='float64'),
+    })
+    tidy = tidy.sort_values(['city', 'quarter'], kind='stable', ignore_index=True)
+    return tidy.astype({'city': 'category'})
+
+# Index-adjusted prices. Each sale is joined as-of its date to the latest
+# quarter of its market's BIS real price index at or before it, and
+# price_adjusted restates the price at the index's latest quarter
+# (price * base level / level at sale). The India file dates sales as Excel
+# serial day numbers, King County as '20141013T000000' (parsed by the schema).
+PRICE_NORMALIZATION = {
+    'House Price India.csv': {'price_column': 'Price', 'date_column': 'Date', 'date_format': 'excel_serial',
+                              'country_code': 'IN'},
+    'Housing.csv': {'price_column': 'price', 'date_column': 'date', 'date_format': '%Y%m%dT%H%M%S',
+                    'country_code': 'US'},
+    'house_prices.csv': {'price_column': 'price', 'date_column': 'date', 'date_format': '%Y%m%dT%H%M%S',
+                         'country_code': 'US'},
+}
+PRICE_INDEX_SERIES = 'real_index'
+# Day 0 of Excel's 1900 date system (serial 1 = 1900-01-01, with Excel's 1900 leap-year bug)
+EXCEL_EPOCH = np.datetime64('1899-12-30', 'D')
+
+def excel_serial_to_datetime(serials):
+    """Excel serial day numbers (e.g. 42491 -> 2016-05-01) as datetime64[ns], NaT where missing"""
+    days = pd.to_numeric(pd.Series(serials), errors='coerce').to_numpy(dtype='float64')
+    missing = np.isnan(days)
+    dates = EXCEL_EPOCH + np.where(missing, 0, days).astype('int64').astype('timedelta64[D]')
+    dates = dates.astype('datetime64[ns]')
+    dates[missing] = np.datetime64('NaT')
+    return dates
+
+def sale_dates(df, config):
+    """A dataset's sale dates as datetime64[ns], parsing the date column if the schema didn't"""
+    values = df[config['date_column']]
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values.to_numpy(dtype='datetime64[ns]')
+    if config['date_format'] == 'excel_serial':
+        return excel_serial_to_datetime(values)
+    return pd.to_datetime(values, format=config['date_format'], errors='coerce').to_numpy(dtype='datetime64[ns]')
+
+def quarter_end_dates(dates):
+    """Last day of each date's calendar quarter as datetime64[ns] (NaT stays NaT)"""
+    months = np.asarray(dates, dtype='datetime64[ns]').astype('datetime64[M]')
+    quarter_starts = months - months.astype('int64') % 3
+    return ((quarter_starts + 3).astype('datetime64[D]') - 1).astype('datetime64[ns]')
+
+def asof_index_levels(dates, index_dates, index_values):
+    """Level of a sorted quarterly index series (dated at quarter ends) for each date's quarter.
+
+    Dates are snapped to their quarter's end first, so a mid-quarter sale
+    gets its own quarter's level rather than the previous one; quarters
+    after the last observation get the latest level. One np.searchsorted
+    over the index, so the sales need no sorting; dates before the first
+    observation (or NaT) get NaN.
+    """
+    dates = quarter_end_dates(dates)
+    positions = np.searchsorted(index_dates, dates, side='right') - 1
+    levels = index_values[np.maximum(positions, 0)]
+    return np.where((positions >= 0) & ~np.isnat(dates), levels, np.nan)
+
+# Housing.csv and house_prices.csv hold the same King County sales, encoded
+# differently. Both are canonicalized to Housing.csv's numeric encoding and
+# merged into one table keyed on the hashed (id, date) sale key; when both
+# files have a sale, the earlier source's row is kept.
+KING_COUNTY_SOURCES = ['Housing.csv', 'house_prices.csv']
+KING_COUNTY_MERGED_FILE = 'king_county_sales.csv'
+KING_COUNTY_SALE_KEY = ['id', 'date']
+KING_COUNTY_CODES = {
+    'waterfront': {'N': 0, 'Y': 1, '0': 0, '1': 1},
+    'condition': {'Poor': 1, 'Fair': 2, 'Average': 3, 'Good': 4, 'Very Good': 5},
+}
+# Coordinates are rounded so float noise (47.721 vs 47.721000000000004) doesn't make copies differ
+COORDINATE_DECIMALS = 6
+
+def canonicalize_king_county(df):
+    """Return a copy of a filtered King County frame in the canonical (Housing.csv) encoding.
+
+    Text columns, including quoted numbers ('"98178"'), become numeric;
+    waterfront and condition codes are mapped through KING_COUNTY_CODES
+    (case-insensitively) and the date column is parsed if it is still text.
+    Columns without missing values get the Housing.csv schema dtypes.
+    """
+    df = df.copy()
+    for column in df.columns:
+        values = df[column]
+        if pd.api.types.is_numeric_dtype(values) or pd.api.types.is_datetime64_any_dtype(values):
+            continue
+        text = values.astype(str).str.strip().str.strip('"\'')
+        if column == 'date':
+            df[column] = pd.to_datetime(text, format='ISO8601', errors='coerce')
+        elif column in KING_COUNTY_CODES:
+            codes = {label.casefold(): code for label, code in KING_COUNTY_CODES[column].items()}
+            df[column] = text.str.casefold().map(codes)
+        else:
+            df[column] = pd.to_numeric(text, errors='coerce')
+    
+    for column in ('lat', 'long'):
+        if column in df.columns:
+            df[column] = df[column].round(COORDINATE_DECIMALS)
+    dtypes = {column: dtype for column, dtype in DATASET_SCHEMAS['Housing.csv']['dtype'].items()
+              if column in df.columns and df[column].notna().all()}
+    return df.astype(dtypes)
+
+def sale_key_hashes(df):
+    """64-bit hash of each row's (id, date) sale key"""
+    return pd.util.hash_pandas_object(df[KING_COUNTY_SALE_KEY], index=False).to_numpy()
+
+class KingCountyMerger:
+    """Merge canonical King County frames into one table, keyed on hashed (id, date) sale keys.
+
+    Frames are added in priority order (KING_COUNTY_SOURCES), whole or
+    chunk by chunk; add() returns the rows whose sale key has not been seen,
+    in the same file or an earlier one. Only the 64-bit key and row hashes
+    of kept sales are held, as sorted runs that are merged as they grow, so
+    memory is a few bytes per sale and each lookup is a handful of binary
+    searches. Overlapping sales whose rows differ in any other column are
+    counted as conflicting. Keys a file shares with an earlier one are kept
+    in runs of their own, so a repeat of such a key counts the same whether
+    or not it falls in the same chunk.
+    """
+    
+    def __init__(self):
+        self.columns = None
+        # (sorted key hashes, row hashes, source ordinals) per run
+        self.runs = []
+        # The same for keys found in an earlier source, under the source that repeated them
+        self.overlap_runs = []
+        self.sources = {}
+        self.overlapping = 0
+        self.conflicting = 0
+    
+    @staticmethod
+    def _lookup(runs, keys):
+        """(found, row hash, source ordinal) of each key in runs"""
+        found = np.zeros(len(keys), dtype=bool)
+        rows = np.zeros(len(keys), dtype='uint64')
+        sources = np.full(len(keys), -1, dtype='int16')
+        for run_keys, run_rows, run_sources in runs:
+            positions = np.minimum(np.searchsorted(run_keys, keys), len(run_keys) - 1)
+            hit = (run_keys[positions] == keys) & ~found
+            rows[hit] = run_rows[positions[hit]]
+            sources[hit] = run_sources[positions[hit]]
+            found |= hit
+        return found, rows, sources
+    
+    @staticmethod
+    def _remember(runs, keys, rows, source):
+        if not len(keys):
+            return
+        order = np.argsort(keys, kind='stable')
+        runs.append((keys[order], rows[order], np.full(len(keys), source, dtype='int16')))
+        # Merge the newest runs while they are of similar size, so there are only O(log n) runs
+        while len(runs) > 1 and len(runs[-2][0]) <= 2 * len(runs[-1][0]):
+            newer, older = runs.pop(), runs.pop()
+            merged = [np.concatenate(pair) for pair in zip(older, newer)]
+            order = np.argsort(merged[0], kind='stable')
+            runs.append(tuple(array[order] for array in merged))
+    
+    def add(self, filename, df):
+        """Add a canonical frame (or chunk) of ``filename``; returns its rows not already merged"""
+        if self.columns is None:
+            self.columns = list(df.columns)
+        df = df.reindex(columns=self.columns)
+        info = self.sources.setdefault(filename, {'rows': 0, 'duplicate_keys': 0, 'overlapping_rows': 0,
+                                                  'unique_rows': 0})
+        source = list(self.sources).index(filename)
+        
+        keys = sale_key_hashes(df)
+        rows = pd.util.hash_pandas_object(df, index=False).to_numpy()
+        repeated_here = pd.Series(keys).duplicated().to_numpy()
+        found, seen_rows, seen_sources = self._lookup(self.runs, keys)
+        overlapped, _, overlap_sources = self._lookup(self.overlap_runs, keys)
+        overlapped_before = overlapped & (overlap_sources == source)
+        overlap = found & (seen_sources != source) & ~repeated_here & ~overlapped_before
+        repeated = repeated_here | (found & (seen_sources == source)) | overlapped_before
+        keep = ~found & ~repeated_here
+        
+        info['rows'] += len(df)
+        info['duplicate_keys'] += int(repeated.sum())
+        info['overlapping_rows'] += int(overlap.sum())
+        info['unique_rows'] += int(keep.sum())
+        self.overlapping += int(overlap.sum())
+        self.conflicting += int((overlap & (seen_rows != rows)).sum())
+        self._remember(self.runs, keys[keep], rows[keep], source)
+        self._remember(self.overlap_runs, keys[overlap], rows[overlap], source)
+        return df[keep]
+    
+    def stats(self):
+        """Overlap statistics of everything added so far"""
+        return {
+            'sale_key': KING_COUNTY_SALE_KEY,
+            'sources': self.sources,
+            'input_rows': sum(info['rows'] for info in self.sources.values()),
+            'merged_rows': sum(info['unique_rows'] for info in self.sources.values()),
+            'overlapping_sales': self.overlapping,
+            'conflicting_sales': self.conflicting,
+        }
+
+def rule_bitmask_dtype(rules):
+    """Smallest unsigned integer dtype with one bit per rule (None if there are more than 64)"""
+    for dtype in (np.uint8, np.uint16, np.uint32, np.uint64):
+        if len(rules) <= np.iinfo(dtype).bits:
+            return dtype
+    return None
+
+def evaluate_filter_rules(df, rules, with_bitmask=False):
+    """Evaluate rules over df in one vectorized pass.
+
+    Returns (keep mask, {rule name: rows the rule rejected}, {column: parsed
+    values}, failed-rule bitmask). A row counts against every rule it fails,
+    so the per-rule counts can add up to more than the rows removed. With
+    ``with_bitmask`` bit i of the bitmask is set when rule i of ``rules``
+    rejected the row; otherwise the bitmask is None.
+    """
+    current_year = datetime.now().year
+    keep = np.ones(len(df), dtype=bool)
+    rejected = {}
+    replacements = {}
+    bitmask_dtype = rule_bitmask_dtype(rules) if with_bitmask else None
+    failed_bits = np.zeros(len(df), dtype=bitmask_dtype) if bitmask_dtype is not None else None
+    
+    for bit, rule in enumerate(rules):
+        if not all(col in df.columns for col in rule['columns']):
+            continue
+        rule_keep, parsed = _evaluate_rule(df, rule, current_year)
+        rejected[rule['name']] = int(len(rule_keep) - np.count_nonzero(rule_keep))
+        keep &= rule_keep
+        if failed_bits is not None:
+            failed_bits |= (~rule_keep).astype(bitmask_dtype) << bitmask_dtype(bit)
+        if parsed is not None:
+            replacements[rule['columns'][0]] = parsed
+    
+    return keep, rejected, replacements, failed_bits
+
+# Row hashes a streamed file buffers in memory (8 bytes each) before spilling a sorted run to disk
+HASH_SPILL_ROWS = 1024 * 1024
+
+def count_duplicate_hashes(row_hashes):
+    """Rows whose 64-bit hash was already seen earlier in the array"""
+    return int(len(row_hashes) - len(np.unique(row_hashes)))
+
+class SpilledHashSet:
+    """Set of 64-bit row hashes kept on disk as sorted, de-duplicated runs.
+
+    Added hashes are buffered up to ``buffer_rows`` and then written to a
+    file in ``directory`` as a sorted run. Runs of similar size are merged
+    block by block, like KingCountyMerger's in-memory runs, so there are
+    O(log n) of them. Lookups binary-search the memory-mapped runs. Memory
+    stays at about one buffer whatever the number of rows; duplicates are
+    exact, counted as hashes added minus distinct hashes.
+    """
+
+    def __init__(self, directory, buffer_rows=HASH_SPILL_ROWS):
+        self.directory = tempfile.mkdtemp(prefix='hashes-', dir=directory)
+        self.buffer_rows = buffer_rows
+        self.buffer = []
+        self.buffered = 0
+        # (path, length) of each run on disk, oldest first
+        self.runs = []
+        self.added = 0
+        self._run_files = 0
+
+    def add(self, hashes):
+        hashes = np.asarray(hashes, dtype='uint64')
+        self.added += len(hashes)
+        self.buffer.append(hashes)
+        self.buffered += len(hashes)
+        if self.buffered >= self.buffer_rows:
+            self._spill()
+
+    def contains(self, hashes):
+        """Whether each hash has been added"""
+        hashes = np.asarray(hashes, dtype='uint64')
+        found = np.zeros(len(hashes), dtype=bool)
+        if self.buffered:
+            found |= np.isin(hashes, np.concatenate(self.buffer))
+        for run in self.runs:
+            values = self._open(run)
+            positions = np.minimum(np.searchsorted(values, hashes), len(values) - 1)
+            found |= values[positions] == hashes
+        return found
+
+    def unique_count(self):
+        """Number of distinct hashes added"""
+        self._spill()
+        if len(self.runs) == 1:
+            return self.runs[0][1]
+        return sum(len(block) for block in self._merged_blocks(self.runs))
+
+    def duplicates(self):
+        """Hashes added that had already been added before"""
+        return self.added - self.unique_count()
+
+    def _open(self, run):
+        return np.memmap(run[0], dtype='uint64', mode='r', shape=(run[1],))
+
+    def _write_run(self, blocks):
+        path = os.path.join(self.directory, f'run-{self._run_files}.u64')
+        self._run_files += 1
+        length = 0
+        with open(path, 'wb') as f:
+            for block in blocks:
+                block.tofile(f)
+                length += len(block)
+        return path, length
+
+    def _spill(self):
+        if self.buffered:
+            self.runs.append(self._write_run([np.unique(np.concatenate(self.buffer))]))
+            self.buffer, self.buffered = [], 0
+        while len(self.runs) > 1 and self.runs[-2][1] <= 2 * self.runs[-1][1]:
+            newer, older = self.runs.pop(), self.runs.pop()
+            self.runs.append(self._write_run(self._merged_blocks([older, newer])))
+            os.remove(older[0])
+            os.remove(newer[0])
+
+    def _merged_blocks(self, runs):
+        """Sorted, distinct blocks of the union of runs, reading a bounded slice of each at a time"""
+        values = [self._open(run) for run in runs]
+        cursors = [0] * len(values)
+        block = max(1024, self.buffer_rows // len(values))
+        while True:
+            active = [i for i in range(len(values)) if cursors[i] < len(values[i])]
+            if not active:
+                return
+            # Runs are strictly increasing, so every value up to the smallest block end
+            # lies within the next block of each run
+            bound = min(values[i][min(cursors[i] + block, len(values[i])) - 1] for i in active)
+            parts = []
+            for i in active:
+                window = values[i][cursors[i]:cursors[i] + block]
+                end = int(np.searchsorted(window, bound, side='right'))
+                parts.append(np.array(window[:end]))
+                cursors[i] += end
+            yield np.unique(np.concatenate(parts))
+
+def compute_frame_stats(df):
+    """Null counts, 64-bit row hashes and duplicate count for a frame, computed once.
+
+    The null mask is only kept for columns that have nulls so filtered
+    statistics can later be derived from a row mask without rescanning.
+    """
+    null_counts = df.isna().sum()
+    null_columns = [col for col, count in null_counts.items() if count > 0]
+    row_hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    return {
+        'rows': len(df),
+        'columns': list(df.columns),
+        'null_counts': {col: int(count) for col, count in null_counts.items()},
+        'null_mask': df[null_columns].isna().to_numpy(),
+        'null_columns': null_columns,
+        'row_hashes': row_hashes,
+        'duplicates': count_duplicate_hashes(row_hashes),
+    }
+
+def derive_filtered_stats(stats, keep):
+    """Statistics of the rows selected by a keep mask, derived from the original frame's stats"""
+    row_hashes = stats['row_hashes'][keep]
+    null_counts = dict.fromkeys(stats['columns'], 0)
+    null_counts.update(zip(stats['null_columns'], stats['null_mask'][keep].sum(axis=0).tolist()))
+    return {
+        'rows': len(row_hashes),
+        'columns': stats['columns'],
+        'null_counts': null_counts,
+        'row_hashes': row_hashes,
+        'duplicates': count_duplicate_hashes(row_hashes),
+    }
+
+def _read_csv_with_schema(filepath, encoding, schema):
+    """Read a CSV applying a schema, falling back to inferred dtypes if the data doesn't fit it.
+
+    Returns (DataFrame, whether the schema was applied).
+    """
+    if schema is not None:
+        try:
+            df = pd.read_csv(filepath, encoding=encoding, dtype=schema['dtype'],
+                             parse_dates=list(schema['dates']) or False,
+                             date_format=schema['dates'] or None)
+            return df, True
+        except (ValueError, TypeError):
+            # e.g. nulls in an integer column or a missing date column
+            pass
+    return pd.read_csv(filepath, encoding=encoding), False
+
+def estimate_inferred_memory(df, schema=None):
+    """Estimate the bytes df would use had it been read with pandas' inferred dtypes.
+
+    Numeric columns would have been int64/float64, categoricals plain object
+    strings and parsed dates the original text, so each is costed as such.
+    """
+    date_formats = schema['dates'] if schema else {}
+    total = df.index.memory_usage()
+    for col in df.columns:
+        series = df[col]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            total += series.astype(object).memory_usage(deep=True, index=False)
+        elif pd.api.types.is_datetime64_any_dtype(series) and col in date_formats:
+            total += series.dt.strftime(date_formats[col]).astype(object).memory_usage(deep=True, index=False)
+        elif pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+            total += 8 * len(series)
+        else:
+            total += series.memory_usage(deep=True, index=False)
+    return total
+
+def _read_dataset_file(filepath, encoding=None, use_schema=True):
+    """Read a single CSV file with a known or detected encoding.
+
+    Kept at module level so it can be pickled for process-based loading.
+    A stale ``encoding`` hint falls back to detection. Returns (DataFrame,
+    encoding, whether a dtype schema was applied, timing measured in the worker).
+    """
+    start, cpu_start = time.perf_counter(), time.thread_time()
+    schema = DATASET_SCHEMAS.get(os.path.basename(filepath)) if use_schema else None
+    df = None
+    if encoding is not None:
+        try:
+            df, schema_applied = _read_csv_with_schema(filepath, encoding, schema)
+        except UnicodeDecodeError:
+            pass
+    if df is None:
+        encoding = detect_encoding(filepath)
+        df, schema_applied = _read_csv_with_schema(filepath, encoding, schema)
+    timing = {
+        'start': start,
+        'wall_s': time.perf_counter() - start,
+        'cpu_s': time.thread_time() - cpu_start,
+        'pid': os.getpid(),
+        'tid': threading.get_ident(),
+    }
+    return df, encoding, schema_applied, timing
+
+# Output formats for save_filtered_data: file extension, accepted
+# compression codecs and the codec used when none is given. Parquet and
+# Feather (Arrow IPC) keep categorical and datetime dtypes on round trip;
+# uncompressed Feather files can be memory-mapped by readers.
+OUTPUT_FORMATS = {
+    'csv': {'extension': '.csv', 'compressions': [None, 'gzip', 'bz2', 'zip', 'xz', 'zstd'], 'default': None},
+    'parquet': {'extension': '.parquet', 'compressions': [None, 'snappy', 'gzip', 'brotli', 'zstd', 'lz4'], 'default': 'snappy'},
+    'feather': {'extension': '.feather', 'compressions': ['uncompressed', 'lz4', 'zstd'], 'default': 'lz4'},
+}
+
+CSV_COMPRESSION_SUFFIXES = {'gzip': '.gz', 'bz2': '.bz2', 'zip': '.zip', 'xz': '.xz', 'zstd': '.zst'}
+
+def read_output_file(path, columns=None):
+    """Read back a filtered dataset written in any OUTPUT_FORMATS format"""
+    if path.endswith('.parquet'):
+        return pd.read_parquet(path, columns=columns)
+    if path.endswith('.feather'):
+        return pd.read_feather(path, columns=columns)
+    return pd.read_csv(path, usecols=columns)
+
+def iter_output_file(path, chunksize=None):
+    """Read back a filtered dataset in chunks of about ``chunksize`` rows (one frame if None)"""
+    if chunksize is None:
+        yield read_output_file(path)
+    elif path.endswith('.parquet'):
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+    elif path.endswith('.feather'):
+        import pyarrow.ipc as ipc
+        # Batches as written; the pipeline writes one per streamed chunk
+        with ipc.open_file(path) as reader:
+            for i in range(reader.num_record_batches):
+                yield reader.get_batch(i).to_pandas()
+    else:
+        with pd.read_csv(path, chunksize=chunksize) as reader:
+            yield from reader
+
+# Bump whenever the filter rules change so incremental runs reprocess everything
+FILTER_RULES_VERSION = 4
+MANIFEST_FILENAME = 'pipeline_manifest.json'
+
+class ChunkedOutputWriter:
+    """Append DataFrame chunks to a CSV, Parquet or Feather file.
+
+    Categorical columns are re-encoded against a growing category list so
+    every chunk's dictionary extends the previous one; this lets the
+    columnar writers keep one schema (and dtype) for the whole file.
+    """
+    
+    def __init__(self, output_path, output_format, compression):
+        self.output_path = output_path
+        self.output_format = output_format
+        self.compression = compression
+        self.writer = None
+        self.schema = None
+        self.categories = {}
+        self.rows_written = 0
+    
+    def _align_categories(self, df):
+        for col in df.columns:
+            if isinstance(df[col].dtype, pd.CategoricalDtype):
+                known = self.categories.setdefault(col, [])
+                seen = set(known)
+                known.extend(value for value in df[col].cat.categories if value not in seen)
+                df[col] = df[col].cat.set_categories(known)
+        return df
+    
+    def _open_columnar(self, table):
+        import pyarrow as pa
+        # Wide dictionary indices so later chunks with more categories still fit
+        self.schema = pa.schema(
+            [pa.field(field.name, pa.dictionary(pa.int32(), field.type.value_type))
+             if pa.types.is_dictionary(field.type) else field for field in table.schema],
+            metadata=table.schema.metadata)
+        if self.output_format == 'parquet':
+            import pyarrow.parquet as pq
+            self.writer = pq.ParquetWriter(self.output_path, self.schema,
+                                           compression=self.compression or 'none')
+        else:
+            import pyarrow.ipc as ipc
+            compression = None if self.compression == 'uncompressed' else self.compression
+            options = ipc.IpcWriteOptions(compression=compression, emit_dictionary_deltas=True)
+            self.writer = ipc.new_file(self.output_path, self.schema, options=options)
+    
+    def write(self, df):
+        """Append one chunk"""
+        if self.output_format == 'csv':
+            df.to_csv(self.output_path, mode='w' if self.writer is None else 'a', header=self.writer is None,
+                      index=False, encoding='utf-8', compression=self.compression)
+            self.writer = self.output_path
+        else:
+            import pyarrow as pa
+            table = pa.Table.from_pandas(self._align_categories(df.copy()), preserve_index=False)
+            if self.writer is None:
+                self._open_columnar(table)
+            self.writer.write_table(table.cast(self.schema))
+        self.rows_written += len(df)
+    
+    def close(self):
+        if self.output_format != 'csv' and self.writer is not None:
+            self.writer.close()
+
+class PipelineProfiler:
+    """Record wall time, CPU time, memory and throughput per stage and dataset.
+
+    Records nest: a dataset tracked inside a stage is its child, so the
+    tracemalloc peak of a stage covers its datasets too. Peak RSS is the
+    process high-water mark when the record closes. Records can be exported
+    as a summary for the JSON report or as Chrome trace events
+    (chrome://tracing, Perfetto).
+    """
+    
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.origin = time.perf_counter()
+        self.records = []
+        self._stack = []
+    
+    def start(self):
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+    
+    def stop(self):
+        if self.trace_memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+    
+    @contextmanager
+    def track(self, stage, dataset=None):
+        """Profile the enclosed block; set record['rows'] inside it for a rows/second figure"""
+        record = {'stage': stage, 'dataset': dataset, 'rows': None,
+                  'pid': os.getpid(), 'tid': threading.get_ident()}
+        if self.trace_memory and tracemalloc.is_tracing():
+            if self._stack:
+                parent = self._stack[-1]
+                parent['_peak'] = max(parent.get('_peak', 0), tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+        self._stack.append(record)
+        start, cpu_start = time.perf_counter(), time.process_time()
+        try:
+            yield record
+        finally:
+            self._stack.pop()
+            record['wall_s'] = time.perf_counter() - start
+            record['cpu_s'] = time.process_time() - cpu_start
+            record['start'] = start
+            if self.trace_memory and tracemalloc.is_tracing():
+                peak = max(record.pop('_peak', 0), tracemalloc.get_traced_memory()[1])
+                record['tracemalloc_peak_mb'] = peak / 1024**2
+                if self._stack:
+                    parent = self._stack[-1]
+                    parent['_peak'] = max(parent.get('_peak', 0), peak)
+            self._finish(record)
+    
+    def add_record(self, stage, dataset, timing, rows=None):
+        """Add a record measured elsewhere, e.g. in a loader worker"""
+        record = {'stage': stage, 'dataset': dataset, 'rows': rows,
+                  'start': timing['start'], 'wall_s': timing['wall_s'], 'cpu_s': timing['cpu_s'],
+                  'pid': timing['pid'], 'tid': timing['tid']}
+        self._finish(record)
+    
+    def _finish(self, record):
+        if resource is not None:
+            # ru_maxrss is kilobytes on Linux, bytes on macOS
+            scale = 1024**2 if sys.platform == 'darwin' else 1024
+            record['peak_rss_mb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+        if record['rows'] is not None and record['wall_s'] > 0:
+            record['rows_per_s'] = record['rows'] / record['wall_s']
+        self.records.append(record)
+    
+    def summary(self):
+        """Stage and per-dataset records for the JSON report"""
+        def clean(record):
+            return {key: value for key, value in record.items()
+                    if key not in ('start', 'pid', 'tid', 'stage', 'dataset')}
+        
+        stages = {}
+        for record in self.records:
+            if record['dataset'] is None:
+                stages.setdefault(record['stage'], {}).update(clean(record))
+        for record in self.records:
+            if record['dataset'] is not None:
+                stage = stages.setdefault(record['stage'], {})
+                stage.setdefault('datasets', {})[record['dataset']] = clean(record)
+        return {'trace_memory': self.trace_memory, 'stages': stages}
+    
+    def write_chrome_trace(self, path):
+        """Write all records as Chrome trace 'complete' events"""
+        events = []
+        for record in self.records:
+            args = {key: value for key, value in record.items()
+                    if key not in ('stage', 'dataset', 'start', 'pid', 'tid', 'wall_s') and value is not None}
+            events.append({
+                'name': record['stage'] if record['dataset'] is None else f"{record['stage']}: {record['dataset']}",
+                'cat': record['stage'],
+                'ph': 'X',
+                'ts': (record['start'] - self.origin) * 1e6,
+                'dur': record['wall_s'] * 1e6,
+                'pid': record['pid'],
+                'tid': record['tid'],
+                'args': args,
+            })
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+
+def dataset_name_for(filename):
+    """Dataset key used in reports and manifests, e.g. 'House Price India.csv' -> 'house_price_india'"""
+    return filename.replace('.csv', '').replace(' ', '_').lower()
+
 class HousePriceDataFilter:
-    def __init__(self, input_dir="dataset_house_pricing", output_dir="output/filter_data"):
+    def __init__(self, input_dir="dataset_house_pricing", output_dir="output/filter_data",
+                 load_workers=1, load_executor='thread', use_schemas=True,
+                 output_format='csv', output_compression=None, incremental=False,
+                 stream_chunksize=None, save_rejected_rows=False,
+                 profile_memory=False, chrome_trace=False):
         # Get the parent directory (go up one level from scripts folder)
         script_dir = os.path.dirname(os.path.abspath(__file__))
         parent_dir = os.path.dirname(script_dir)
@@ -30,6 +942,59 @@ class HousePriceDataFilter:
         self.datasets = {}
         self.filtered_datasets = {}
         self.data_quality_report = {}
+        self.load_errors = {}
+        self.encoding_hints = {}
+        self.dataset_stats = {}
+        
+        # Loading concurrency: 1 worker keeps the original serial behaviour
+        if load_executor not in LOAD_EXECUTORS:
+            raise ValueError(f"load_executor must be one of {sorted(LOAD_EXECUTORS)}, got {load_executor!r}")
+        self.load_workers = max(1, int(load_workers))
+        self.load_executor = load_executor
+        self.use_schemas = use_schemas
+        
+        # Output format and compression for the filtered datasets
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"output_format must be one of {sorted(OUTPUT_FORMATS)}, got {output_format!r}")
+        format_info = OUTPUT_FORMATS[output_format]
+        if output_compression is None:
+            output_compression = format_info['default']
+        if output_compression not in format_info['compressions']:
+            raise ValueError(f"compression {output_compression!r} is not supported for {output_format} "
+                             f"(choose from {format_info['compressions']})")
+        self.output_format = output_format
+        self.output_compression = output_compression
+        
+        # Incremental runs skip inputs whose fingerprint matches the manifest
+        self.incremental = incremental
+        self.manifest = {}
+        self.input_fingerprints = {}
+        self.reused_datasets = {}
+        
+        # Streaming mode reads, filters and writes each file chunk by chunk
+        # instead of holding original and filtered copies in memory
+        if stream_chunksize is not None and int(stream_chunksize) < 1:
+            raise ValueError(f"stream_chunksize must be a positive number of rows, got {stream_chunksize!r}")
+        self.stream_chunksize = stream_chunksize
+        self.streamed_reports = {}
+        
+        # Optionally keep rows the filters reject in a sidecar file per dataset
+        self.save_rejected_rows = save_rejected_rows
+        
+        # Stage timing is always recorded; tracemalloc and the trace file are opt-in
+        self.profiler = PipelineProfiler(trace_memory=profile_memory)
+        self.chrome_trace = chrome_trace
+        
+        # BIS panel store and its summary, set by build_bis_panel
+        self.bis_panel = None
+        self.bis_panel_report = None
+        
+        # Per-dataset price normalization summaries and the index series they use
+        self.price_indexes = None
+        self.normalization_report = {}
+        
+        # Overlap statistics of the merged King County table, set by build_king_county_table
+        self.merge_report = None
         
         # Create output directory
         os.makedirs(self.output_dir, exist_ok=True)
@@ -38,35 +1003,238 @@ class HousePriceDataFilter:
         """Load all CSV files from the input directory"""
         print("🔄 Loading datasets...")
         
-        csv_files = [f for f in os.listdir(self.input_dir) if f.endswith('.csv')]
+        csv_files = self._discover_input_files()
+        filepaths = [os.path.join(self.input_dir, filename) for filename in csv_files]
         
-        for filename in csv_files:
-            filepath = os.path.join(self.input_dir, filename)
-            dataset_name = filename.replace('.csv', '').replace(' ', '_').lower()
+        # Reuse encodings recorded by a previous run to skip detection
+        self.encoding_hints = self._load_encoding_hints()
+        hints = [self.encoding_hints.get(filename) for filename in csv_files]
+        
+        if self.load_workers > 1 and len(csv_files) > 1:
+            print(f"   ⚡ Loading {len(csv_files)} files with {self.load_workers} {self.load_executor} workers")
+            executor_cls = LOAD_EXECUTORS[self.load_executor]
+            with executor_cls(max_workers=self.load_workers) as executor:
+                futures = [executor.submit(_read_dataset_file, filepath, hint, self.use_schemas)
+                           for filepath, hint in zip(filepaths, hints)]
+                results = [self._collect_load_result(future.result) for future in futures]
+        else:
+            results = [self._collect_load_result(_read_dataset_file, filepath, hint, self.use_schemas)
+                       for filepath, hint in zip(filepaths, hints)]
+        
+        for filename, (loaded, error) in zip(csv_files, results):
+            dataset_name = dataset_name_for(filename)
             
-            try:
-                # Try different encodings
-                for encoding in ['utf-8', 'latin-1', 'cp1252']:
-                    try:
-                        df = pd.read_csv(filepath, encoding=encoding)
-                        # Store both the dataframe and original filename
-                        self.datasets[dataset_name] = {
-                            'data': df,
-                            'filename': filename
-                        }
-                        print(f"✅ Loaded {filename} - Shape: {df.shape}")
-                        break
-                    except UnicodeDecodeError:
-                        continue
-                else:
-                    print(f"❌ Could not load {filename} - encoding issues")
-                    
-            except Exception as e:
-                print(f"❌ Error loading {filename}: {str(e)}")
+            if error is not None:
+                self.load_errors[filename] = error
+                print(f"❌ Error loading {filename}: {error}")
+                continue
+            
+            df, encoding, schema_applied, timing = loaded
+            self.profiler.add_record('load', dataset_name, timing, rows=len(df))
+            # Store the dataframe, original filename and how it was read
+            self.datasets[dataset_name] = {
+                'data': df,
+                'filename': filename,
+                'encoding': encoding,
+                'schema': DATASET_SCHEMAS.get(filename) if schema_applied else None
+            }
+            schema_note = "schema dtypes" if schema_applied else "inferred dtypes"
+            print(f"✅ Loaded {filename} - Shape: {df.shape} - Encoding: {encoding} - {schema_note}")
         
         print(f"\n📊 Successfully loaded {len(self.datasets)} datasets")
+        if self.reused_datasets:
+            print(f"   ⏭️  Reused {len(self.reused_datasets)} unchanged datasets from the previous run")
+        if self.load_errors:
+            print(f"   ❗ {len(self.load_errors)} file(s) failed to load")
         return self.datasets
     
+    def _discover_input_files(self):
+        """List the input CSVs that need processing, fingerprinting each one.
+
+        In incremental mode inputs unchanged since the last run are recorded
+        in reused_datasets and left out of the returned list.
+        """
+        # Sort so datasets land in the same order regardless of worker scheduling
+        csv_files = sorted(f for f in os.listdir(self.input_dir) if f.endswith('.csv'))
+        
+        # Fingerprint every input; unchanged ones are reused from the previous run
+        self.manifest = self._load_manifest()
+        self.input_fingerprints = {}
+        for filename in csv_files:
+            try:
+                self.input_fingerprints[filename] = self._fingerprint_input(filename)
+            except OSError as e:
+                self.load_errors[filename] = str(e)
+                print(f"❌ Error loading {filename}: {e}")
+        csv_files = [filename for filename in csv_files if filename in self.input_fingerprints]
+        
+        if self.incremental:
+            for filename in csv_files:
+                entry = self._reusable_manifest_entry(filename)
+                if entry is not None:
+                    self.reused_datasets[entry['dataset_name']] = entry
+                    if entry.get('price_normalization'):
+                        self.normalization_report[entry['dataset_name']] = entry['price_normalization']
+                    print(f"⏭️  Unchanged {filename} - reusing {entry['output_file']}")
+            reused_files = {entry['filename'] for entry in self.reused_datasets.values()}
+            csv_files = [filename for filename in csv_files if filename not in reused_files]
+        
+        return csv_files
+    
+    def _collect_load_result(self, load, *args):
+        """Call a loader (or a future's result) and return a (result, error message) pair"""
+        try:
+            return load(*args), None
+        except Exception as e:
+            return None, str(e)
+    
+    def _load_manifest(self):
+        """Read the manifest written by the previous run, if any"""
+        manifest_path = os.path.join(self.output_dir, MANIFEST_FILENAME)
+        if not os.path.exists(manifest_path):
+            return {}
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def _fingerprint_input(self, filename):
+        """Size, mtime and content hash of an input file.
+
+        The hash is only recomputed when size or mtime differ from the manifest.
+        """
+        previous = self.manifest.get('files', {}).get(filename, {}).get('fingerprint')
+        return file_fingerprint(os.path.join(self.input_dir, filename), previous)
+    
+    def _pipeline_settings(self):
+        """Settings that change the outputs; a mismatch invalidates the whole manifest"""
+        return {
+            'filter_rules_version': FILTER_RULES_VERSION,
+            'use_schemas': self.use_schemas,
+            'output_format': self.output_format,
+            'output_compression': self.output_compression,
+            'save_rejected_rows': self.save_rejected_rows,
+        }
+    
+    def _reusable_manifest_entry(self, filename):
+        """Manifest entry for an input whose content, settings and output are unchanged.
+
+        The output must still match the fingerprint recorded when it was
+        written, so a truncated or edited output is regenerated.
+        """
+        if self.manifest.get('settings') != self._pipeline_settings():
+            return None
+        entry = self.manifest.get('files', {}).get(filename)
+        if entry is None or entry['fingerprint']['sha256'] != self.input_fingerprints[filename]['sha256']:
+            return None
+        if not self._output_unchanged(entry['output_file'], entry.get('output_fingerprint')):
+            return None
+        # Index-adjusted prices are also stale once the price index input changed
+        if entry.get('price_index_source') != self._price_index_source(filename):
+            return None
+        return entry
+    
+    def _output_unchanged(self, output_file, recorded):
+        """Whether an output still matches the fingerprint recorded when it was written"""
+        output_path = os.path.join(self.output_dir, output_file)
+        if recorded is None or not os.path.exists(output_path):
+            return False
+        current = file_fingerprint(output_path, recorded)
+        return (current['size'], current['sha256']) == (recorded['size'], recorded['sha256'])
+    
+    def _price_index_source(self, filename):
+        """Input file and hash of the BIS series that adjusts ``filename``'s prices (None if not adjusted)"""
+        if filename not in PRICE_NORMALIZATION:
+            return None
+        index_file = next(bis_file for bis_file, series in BIS_PANEL_SERIES.items() if series == PRICE_INDEX_SERIES)
+        fingerprint = self.input_fingerprints.get(index_file)
+        return {'filename': index_file, 'sha256': fingerprint['sha256'] if fingerprint else None}
+    
+    def write_manifest(self, report):
+        """Record input and output fingerprints, settings and report sections for the next incremental run.
+
+        The merged King County table gets its own entry, keyed on the input
+        hashes of its sources.
+        """
+        files = {}
+        for name, dataset_report in report['datasets'].items():
+            filename = dataset_report['filename']
+            if not dataset_report.get('output_file') or filename not in self.input_fingerprints:
+                continue
+            output_path = os.path.join(self.output_dir, dataset_report['output_file'])
+            if not os.path.exists(output_path):
+                continue
+            previous = self.manifest.get('files', {}).get(filename, {}).get('output_fingerprint')
+            files[filename] = {
+                'filename': filename,
+                'dataset_name': name,
+                'fingerprint': self.input_fingerprints[filename],
+                'output_file': dataset_report['output_file'],
+                'output_fingerprint': file_fingerprint(output_path, previous),
+                'price_index_source': self._price_index_source(filename),
+                'price_normalization': self.normalization_report.get(name),
+                'report': {key: value for key, value in dataset_report.items() if key != 'reused'},
+            }
+        
+        manifest = {
+            'updated': datetime.now().isoformat(),
+            'settings': self._pipeline_settings(),
+            'files': files,
+        }
+        if self.merge_report is not None:
+            merged_path = os.path.join(self.output_dir, self.merge_report['output_file'])
+            if os.path.exists(merged_path):
+                previous = self.manifest.get('king_county_merge', {}).get('output_fingerprint')
+                manifest['king_county_merge'] = {
+                    'sources': self._king_county_sources(),
+                    'output_file': self.merge_report['output_file'],
+                    'output_fingerprint': file_fingerprint(merged_path, previous),
+                    'report': self.merge_report,
+                }
+        manifest_path = os.path.join(self.output_dir, MANIFEST_FILENAME)
+        with open(manifest_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2, default=str)
+    
+    def _load_encoding_hints(self):
+        """Read per-file encodings recorded in a previous data quality report"""
+        report_path = os.path.join(self.output_dir, 'data_quality_report.json')
+        if not os.path.exists(report_path):
+            return {}
+        try:
+            with open(report_path, 'r', encoding='utf-8') as f:
+                previous = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return {info['filename']: info['encoding']
+                for info in previous.get('datasets', {}).values()
+                if info.get('encoding')}
+    
+    def get_dataset_stats(self, name):
+        """Cached null counts, row hashes and duplicate count for a loaded dataset"""
+        if name not in self.dataset_stats:
+            self.dataset_stats[name] = compute_frame_stats(self.datasets[name]['data'])
+        return self.dataset_stats[name]
+    
+    def get_filtered_stats(self, name):
+        """Statistics of a filtered dataset, derived from the original's cached stats and filter mask"""
+        filtered_info = self.filtered_datasets[name]
+        if 'stats' not in filtered_info:
+            keep = filtered_info.get('keep')
+            if keep is None:
+                filtered_info['stats'] = compute_frame_stats(filtered_info['data'])
+            else:
+                stats = derive_filtered_stats(self.get_dataset_stats(name), keep)
+                # Columns added after filtering (normalize_prices) get their null counts from the data,
+                # matching streamed reports; row hashes stay those of the input columns in both
+                added = [column for column in filtered_info['data'].columns if column not in stats['columns']]
+                if added:
+                    stats['columns'] = stats['columns'] + added
+                    stats['null_counts'].update({column: int(count) for column, count
+                                                 in filtered_info['data'][added].isna().sum().items()})
+                filtered_info['stats'] = stats
+        return filtered_info['stats']
+    
     def analyze_data_quality(self):
         """Analyze data quality for each dataset"""
         print("\n🔍 Analyzing data quality...")
@@ -76,165 +1244,137 @@ class HousePriceDataFilter:
             filename = dataset_info['filename']
             print(f"\n📋 Dataset: {filename} ({name})")
             
-            quality_info = {
-                'filename': filename,
-                'total_rows': len(df),
-                'total_columns': len(df.columns),
-                'columns': list(df.columns),
-                'data_types': df.dtypes.to_dict(),
-                'null_counts': df.isnull().sum().to_dict(),
-                'null_percentages': (df.isnull().sum() / len(df) * 100).to_dict(),
-                'duplicate_rows': df.duplicated().sum(),
-                'memory_usage_mb': df.memory_usage(deep=True).sum() / 1024**2
-            }
-            
-            self.data_quality_report[name] = quality_info
-            
-            # Display key statistics
-            print(f"   📏 Shape: {quality_info['total_rows']:,} rows × {quality_info['total_columns']} columns")
-            print(f"   🔄 Duplicates: {quality_info['duplicate_rows']:,}")
-            print(f"   💾 Memory: {quality_info['memory_usage_mb']:.2f} MB")
-            
-            # Show null value statistics
-            null_cols = [(col, count, pct) for col, count, pct in 
-                        zip(quality_info['null_counts'].keys(), 
-                           quality_info['null_counts'].values(),
-                           quality_info['null_percentages'].values()) 
-                        if count > 0]
-            
-            if null_cols:
-                print(f"   ❗ Columns with null values:")
-                for col, count, pct in sorted(null_cols, key=lambda x: x[1], reverse=True)[:10]:
-                    print(f"      {col}: {count:,} ({pct:.1f}%)")
-            else:
-                print(f"   ✅ No null values found")
+            with self.profiler.track('analyze', name) as record:
+                record['rows'] = len(df)
+                self._analyze_dataset(name, df, dataset_info)
     
-    def filter_india_detailed_data(self, df):
-        """Filter and clean India house price data"""
-        print("   🔧 Applying India-specific filters...")
-        
-        original_rows = len(df)
-        
-        # Remove rows with null prices (essential column)
-        if 'Price' in df.columns:
-            df = df.dropna(subset=['Price'])
-            # Remove unrealistic prices (less than ₹50,000 or more than ₹50,00,00,000)
-            df = df[(df['Price'] >= 50000) & (df['Price'] <= 500000000)]
-        
-        # Remove rows with impossible bedroom/bathroom counts
-        if 'number of bedrooms' in df.columns:
-            df = df[(df['number of bedrooms'] >= 1) & (df['number of bedrooms'] <= 20)]
-        
-        if 'number of bathrooms' in df.columns:
-            df = df[(df['number of bathrooms'] >= 0.5) & (df['number of bathrooms'] <= 15)]
-        
-        # Remove rows with impossible areas
-        if 'living area' in df.columns:
-            df = df[(df['living area'] > 0) & (df['living area'] <= 50000)]
+    def _analyze_dataset(self, name, df, dataset_info):
+        """Compute and print the quality statistics of one dataset"""
+        filename = dataset_info['filename']
+        stats = self.get_dataset_stats(name)
+        quality_info = {
+            'filename': filename,
+            'encoding': dataset_info.get('encoding'),
+            'total_rows': len(df),
+            'total_columns': len(df.columns),
+            'columns': list(df.columns),
+            'data_types': df.dtypes.to_dict(),
+            'null_counts': stats['null_counts'],
+            'null_percentages': {col: count / len(df) * 100 if len(df) else 0
+                                 for col, count in stats['null_counts'].items()},
+            'duplicate_rows': stats['duplicates'],
+            'memory_usage_mb': df.memory_usage(deep=True).sum() / 1024**2,
+            'schema_applied': dataset_info.get('schema') is not None,
+            'inferred_memory_mb': estimate_inferred_memory(df, dataset_info.get('schema')) / 1024**2
+        }
+        quality_info['memory_saved_pct'] = (
+            (1 - quality_info['memory_usage_mb'] / quality_info['inferred_memory_mb']) * 100
+            if quality_info['inferred_memory_mb'] > 0 else 0
+        )
         
-        if 'lot area' in df.columns:
-            df = df[(df['lot area'] > 0) & (df['lot area'] <= 1000000)]
+        self.data_quality_report[name] = quality_info
         
-        # Remove rows with invalid coordinates (if they exist)
-        if 'Lattitude' in df.columns and 'Longitude' in df.columns:
-            df = df.dropna(subset=['Lattitude', 'Longitude'])
-            # Remove coordinates that are clearly invalid (0,0 or extreme values)
-            df = df[~((df['Lattitude'] == 0) & (df['Longitude'] == 0))]
+        # Display key statistics
+        print(f"   📏 Shape: {quality_info['total_rows']:,} rows × {quality_info['total_columns']} columns")
+        print(f"   🔄 Duplicates: {quality_info['duplicate_rows']:,}")
+        print(f"   💾 Memory: {quality_info['memory_usage_mb']:.2f} MB "
+              f"(inferred dtypes: {quality_info['inferred_memory_mb']:.2f} MB, "
+              f"saved {quality_info['memory_saved_pct']:.1f}%)")
         
-        # Remove rows with invalid years
-        if 'Built Year' in df.columns:
-            current_year = datetime.now().year
-            df = df[(df['Built Year'] >= 1800) & (df['Built Year'] <= current_year)]
+        # Show null value statistics
+        null_cols = [(col, count, pct) for col, count, pct in 
+                    zip(quality_info['null_counts'].keys(), 
+                       quality_info['null_counts'].values(),
+                       quality_info['null_percentages'].values()) 
+                    if count > 0]
         
-        print(f"      Removed {original_rows - len(df):,} rows ({((original_rows - len(df))/original_rows)*100:.1f}%)")
-        return df
+        if null_cols:
+            print(f"   ❗ Columns with null values:")
+            for col, count, pct in sorted(null_cols, key=lambda x: x[1], reverse=True)[:10]:
+                print(f"      {col}: {count:,} ({pct:.1f}%)")
+        else:
+            print(f"   ✅ No null values found")
     
-    def filter_king_county_data(self, df):
-        """Filter and clean King County house price data"""
-        print("   🔧 Applying King County-specific filters...")
+    def apply_filter_rules(self, df, rules, description, verbose=True, filter_stats=None):
+        """Filter df with declarative rules: one combined mask, applied once.
+
+        When a ``filter_stats`` dict is given, per-rule rejection counts are
+        added to filter_stats['rule_rejections'] (so chunks accumulate), the
+        rule bit positions go to 'rule_bits' and, if rejected rows are being
+        saved, the rejected rows with their '_failed_rules' bitmask to
+        'rejected_rows'.
+        """
+        if verbose:
+            print(f"   🔧 Applying {description} filters...")
         
         original_rows = len(df)
+        with_bitmask = filter_stats is not None and self.save_rejected_rows
+        keep, rejected, replacements, failed_bits = evaluate_filter_rules(df, rules, with_bitmask)
+        # Boolean indexing is the only copy made; the input frame is never modified
+        filtered = df[keep] if not keep.all() else df.copy()
+        for col, parsed in replacements.items():
+            filtered[col] = parsed[keep]
         
-        # Remove rows with null prices
-        if 'price' in df.columns:
-            df = df.dropna(subset=['price'])
-            # Remove unrealistic prices (less than $10,000 or more than $50,000,000)
-            df = df[(df['price'] >= 10000) & (df['price'] <= 50000000)]
-        
-        # Remove impossible bedroom/bathroom counts
-        if 'bedrooms' in df.columns:
-            df = df[(df['bedrooms'] >= 0) & (df['bedrooms'] <= 20)]
-        
-        if 'bathrooms' in df.columns:
-            df = df[(df['bathrooms'] >= 0) & (df['bathrooms'] <= 15)]
-        
-        # Remove impossible square footage
-        if 'sqft_living' in df.columns:
-            df = df[(df['sqft_living'] > 0) & (df['sqft_living'] <= 20000)]
-        
-        if 'sqft_lot' in df.columns:
-            df = df[(df['sqft_lot'] > 0) & (df['sqft_lot'] <= 2000000)]
+        if filter_stats is not None:
+            counts = filter_stats.setdefault('rule_rejections', {})
+            for rule_name, count in rejected.items():
+                counts[rule_name] = counts.get(rule_name, 0) + count
+            filter_stats['rule_bits'] = {rule['name']: bit for bit, rule in enumerate(rules)}
+            filter_stats['keep'] = keep
+            if failed_bits is not None:
+                filter_stats['rejected_rows'] = df[~keep].assign(_failed_rules=failed_bits[~keep])
         
-        # Remove invalid coordinates
-        if 'lat' in df.columns and 'long' in df.columns:
-            df = df.dropna(subset=['lat', 'long'])
-            # King County coordinates roughly: lat 47.0-48.0, long -122.6 to -121.0
-            df = df[(df['lat'] >= 47.0) & (df['lat'] <= 48.0)]
-            df = df[(df['long'] >= -122.6) & (df['long'] <= -121.0)]
-        
-        # Remove invalid years
-        if 'yr_built' in df.columns:
-            current_year = datetime.now().year
-            df = df[(df['yr_built'] >= 1800) & (df['yr_built'] <= current_year)]
-        
-        # Remove invalid grades
-        if 'grade' in df.columns:
-            df = df[(df['grade'] >= 1) & (df['grade'] <= 13)]
-        
-        print(f"      Removed {original_rows - len(df):,} rows ({((original_rows - len(df))/original_rows)*100:.1f}%)")
-        return df
+        if verbose:
+            removed = original_rows - len(filtered)
+            print(f"      Removed {removed:,} rows ({(removed/original_rows)*100 if original_rows else 0:.1f}%)")
+            for rule_name, count in rejected.items():
+                if count:
+                    print(f"         {rule_name}: {count:,} rows rejected")
+        return filtered
     
-    def filter_international_data(self, df):
+    def filter_india_detailed_data(self, df, verbose=True, filter_stats=None):
+        """Filter and clean India house price data"""
+        return self.apply_filter_rules(df, INDIA_DETAILED_RULES, "India-specific", verbose, filter_stats)
+    
+    def filter_king_county_data(self, df, verbose=True, filter_stats=None):
+        """Filter and clean King County house price data"""
+        return self.apply_filter_rules(df, KING_COUNTY_RULES, "King County-specific", verbose, filter_stats)
+    
+    def filter_international_data(self, df, verbose=True, filter_stats=None):
         """Filter and clean international house price data"""
-        print("   🔧 Applying international data filters...")
-        
-        original_rows = len(df)
-        
-        # Convert date column
-        if 'date' in df.columns:
-            df['date'] = pd.to_datetime(df['date'], errors='coerce')
-            df = df.dropna(subset=['date'])
-        
-        # Remove rows where price is null AND we want to keep the data structure
-        # For international data, we might want to keep rows with null prices for some analysis
-        # but we'll create a version with price data only
-        df_with_prices = df.dropna(subset=['price']) if 'price' in df.columns else df
-        
-        # Remove extreme outliers in price changes (more than ±200% change seems unrealistic)
-        if 'price' in df.columns:
-            df_with_prices = df_with_prices[(df_with_prices['price'] >= -200) & (df_with_prices['price'] <= 200)]
-        
-        print(f"      Removed {original_rows - len(df_with_prices):,} rows ({((original_rows - len(df_with_prices))/original_rows)*100:.1f}%)")
-        return df_with_prices
+        return self.apply_filter_rules(df, INTERNATIONAL_RULES, "international data", verbose, filter_stats)
     
-    def filter_india_index_data(self, df):
-        """Filter and clean India price index data"""
-        print("   🔧 Applying India index data filters...")
-        
-        original_rows = len(df)
-        
-        # This data might have a different structure, so we'll be more careful
-        # Remove completely empty rows
-        df = df.dropna(how='all')
-        
-        # For numeric columns, remove unrealistic index values
-        numeric_cols = df.select_dtypes(include=[np.number]).columns
-        for col in numeric_cols:
-            # Price indices typically range from 50 to 500 (assuming base 100)
-            df = df[(df[col].isna()) | ((df[col] >= 10) & (df[col] <= 1000))]
-        
-        print(f"      Removed {original_rows - len(df):,} rows ({((original_rows - len(df))/original_rows)*100:.1f}%)")
-        return df
+    def filter_india_index_data(self, df, verbose=True, filter_stats=None):
+        """Reshape the India city price index to a tidy city x quarter series and filter it.
+
+        The output has one row per (city, quarter) rather than one per input
+        row, so filter_stats gets 'reshaped' and the tidy row count as
+        'input_rows'; statistics are then taken from the output itself.
+        """
+        tidy = melt_city_index(df)
+        if filter_stats is not None:
+            filter_stats['reshaped'] = True
+            filter_stats['input_rows'] = filter_stats.get('input_rows', 0) + len(tidy)
+        return self.apply_filter_rules(tidy, INDIA_INDEX_RULES, "India index data", verbose, filter_stats)
+    
+    def filter_generic_data(self, df, verbose=True, filter_stats=None):
+        """Filter unknown datasets: drop empty and duplicate rows"""
+        return self.apply_filter_rules(df, GENERIC_RULES, "generic", verbose, filter_stats)
+    
+    def filter_for(self, filename):
+        """Pick the dataset-specific filter method for a file"""
+        name = filename.lower()
+        # Index files first: 'housing_price_index_...' would otherwise match 'housing'
+        if any(keyword in name for keyword in ['real_year', 'nominal_year', 'real_index', 'nominal_index']):
+            return self.filter_international_data
+        elif 'index' in name:
+            return self.filter_india_index_data
+        elif 'india' in name:
+            return self.filter_india_detailed_data
+        elif any(keyword in name for keyword in ['house_prices', 'housing']):
+            return self.filter_king_county_data
+        # Generic filtering for unknown datasets
+        return self.filter_generic_data
     
     def apply_filters(self):
         """Apply appropriate filters to each dataset"""
@@ -246,92 +1386,561 @@ class HousePriceDataFilter:
             print(f"\n📊 Processing: {filename}")
             
             # Apply dataset-specific filters based on filename or content
-            if 'india' in filename.lower() and 'index' not in filename.lower():
-                filtered_df = self.filter_india_detailed_data(df.copy())
-            elif any(keyword in filename.lower() for keyword in ['house_prices', 'housing']):
-                filtered_df = self.filter_king_county_data(df.copy())
-            elif any(keyword in filename.lower() for keyword in ['real_year', 'nominal_year', 'real_index', 'nominal_index']):
-                filtered_df = self.filter_international_data(df.copy())
-            elif 'index' in filename.lower():
-                filtered_df = self.filter_india_index_data(df.copy())
-            else:
-                # Generic filtering for unknown datasets
-                print("   🔧 Applying generic filters...")
-                original_rows = len(df)
-                filtered_df = df.dropna(how='all')  # Remove completely empty rows
-                filtered_df = filtered_df.drop_duplicates()  # Remove duplicates
-                print(f"      Removed {original_rows - len(filtered_df):,} rows ({((original_rows - len(filtered_df))/original_rows)*100:.1f}%)")
+            filter_stats = {}
+            with self.profiler.track('filter', name) as record:
+                record['rows'] = len(df)
+                filtered_df = self.filter_for(filename)(df, filter_stats=filter_stats)
             
+            reshaped = filter_stats.get('reshaped', False)
             self.filtered_datasets[name] = {
                 'data': filtered_df,
-                'filename': filename
+                'filename': filename,
+                'rule_rejections': filter_stats.get('rule_rejections', {}),
+                'rule_bits': filter_stats.get('rule_bits', {}),
+                'rejected_rows': filter_stats.get('rejected_rows'),
+                # A reshaped output is not a row subset, so its stats can't come from a mask
+                'keep': None if reshaped else filter_stats.get('keep'),
+                'input_rows': filter_stats['input_rows'] if reshaped else len(df),
+                'reshaped': reshaped
             }
             
             # Show filtering results
             original_shape = df.shape
             filtered_shape = filtered_df.shape
+            input_rows = self.filtered_datasets[name]['input_rows']
             print(f"   📏 Original: {original_shape[0]:,} rows × {original_shape[1]} cols")
+            if reshaped:
+                print(f"   🔀 Reshaped: {input_rows:,} rows")
             print(f"   📏 Filtered: {filtered_shape[0]:,} rows × {filtered_shape[1]} cols")
-            print(f"   📈 Data retention: {(filtered_shape[0]/original_shape[0])*100:.1f}%")
+            print(f"   📈 Data retention: {(filtered_shape[0]/input_rows)*100 if input_rows else 0:.1f}%")
+    
+    def stream_all_datasets(self):
+        """Load, analyze, filter and save every dataset in bounded memory.
+
+        Each file is read ``stream_chunksize`` rows at a time; chunks are
+        filtered with the same dataset filters and appended to the output,
+        while row, null and duplicate statistics are accumulated. Duplicates
+        are counted exactly from 64-bit row hashes, which are spilled to disk
+        as sorted runs (SpilledHashSet), so memory holds one fixed-size hash
+        buffer per file however many rows it has.
+        """
+        print(f"🔄 Streaming datasets in chunks of {self.stream_chunksize:,} rows...")
+        
+        csv_files = self._discover_input_files()
+        self.encoding_hints = self._load_encoding_hints()
+        # BIS series first: the panel they build provides the price indexes the sales files are adjusted by
+        csv_files.sort(key=lambda filename: filename not in BIS_PANEL_SERIES)
+        
+        for filename in csv_files:
+            if filename not in BIS_PANEL_SERIES and self.price_indexes is None:
+                self.run_panel_stage()
+            filepath = os.path.join(self.input_dir, filename)
+            schema = DATASET_SCHEMAS.get(filename) if self.use_schemas else None
+            print(f"\n📊 Streaming: {filename}")
+            
+            try:
+                with self.profiler.track('stream', dataset_name_for(filename)) as record:
+                    dataset_report = self._stream_with_fallbacks(filename, filepath, schema)
+                    record['rows'] = dataset_report['original_shape'][0]
+            except Exception as e:
+                self.load_errors[filename] = str(e)
+                print(f"   ❌ Error streaming {filename}: {e}")
+                continue
+            
+            self.streamed_reports[dataset_name_for(filename)] = dataset_report
+            print(f"   📏 Original: {dataset_report['original_shape'][0]:,} rows × {dataset_report['original_shape'][1]} cols")
+            print(f"   📏 Filtered: {dataset_report['filtered_shape'][0]:,} rows × {dataset_report['filtered_shape'][1]} cols")
+            print(f"   📈 Data retention: {dataset_report['retention_rate']:.1f}%")
+            print(f"   ✅ Saved {dataset_report['output_file']} in {dataset_report['chunks']:,} chunks "
+                  f"(peak chunk {dataset_report['memory']['peak_chunk_mb']:.2f} MB)")
+        
+        if self.price_indexes is None:
+            self.run_panel_stage()
+        
+        print(f"\n📊 Successfully streamed {len(self.streamed_reports)} datasets")
+        if self.reused_datasets:
+            print(f"   ⏭️  Reused {len(self.reused_datasets)} unchanged datasets from the previous run")
+        if self.load_errors:
+            print(f"   ❗ {len(self.load_errors)} file(s) failed to load")
+    
+    def _stream_with_fallbacks(self, filename, filepath, schema):
+        """Stream a file, retrying on a stale encoding hint or data that doesn't fit its schema"""
+        encoding = self.encoding_hints.get(filename) or detect_encoding(filepath)
+        try:
+            return self._stream_dataset(filename, encoding, schema)
+        except UnicodeDecodeError:
+            # Stale encoding hint from a previous run
+            encoding = detect_encoding(filepath)
+            return self._stream_dataset(filename, encoding, schema)
+        except (ValueError, TypeError):
+            if schema is None:
+                raise
+            print("   ❗ Data does not fit the dataset schema, streaming with inferred dtypes")
+            return self._stream_dataset(filename, encoding, None)
+    
+    def _stream_dataset(self, filename, encoding, schema):
+        """Stream one file through its filter into the output; returns its report section"""
+        filepath = os.path.join(self.input_dir, filename)
+        read_kwargs = {}
+        if schema is not None:
+            read_kwargs = {'dtype': schema['dtype'], 'parse_dates': list(schema['dates']) or False,
+                           'date_format': schema['dates'] or None}
+        
+        filter_fn = self.filter_for(filename)
+        output_filename = self.output_filename(filename)
+        writer = ChunkedOutputWriter(os.path.join(self.output_dir, output_filename),
+                                     self.output_format, self.output_compression)
+        rejected_filename = self.rejected_filename(filename) if self.save_rejected_rows else None
+        rejected_writer = (ChunkedOutputWriter(os.path.join(self.output_dir, rejected_filename),
+                                               self.output_format, self.output_compression)
+                           if rejected_filename else None)
+        filter_stats = {}
+        
+        chunks = 0
+        columns = filtered_columns = None
+        original_nulls = filtered_nulls = None
+        # Row hashes go to sorted runs on disk next to the output, so duplicate counts don't grow memory
+        spill_dir = tempfile.TemporaryDirectory(prefix='.row-hashes-', dir=self.output_dir)
+        original_hashes = SpilledHashSet(spill_dir.name)
+        filtered_hashes = SpilledHashSet(spill_dir.name)
+        loaded_bytes = inferred_bytes = peak_chunk_bytes = 0
+        
+        try:
+            with pd.read_csv(filepath, encoding=encoding, chunksize=self.stream_chunksize, **read_kwargs) as reader:
+                for chunk in reader:
+                    chunks += 1
+                    if columns is None:
+                        columns = list(chunk.columns)
+                        original_nulls = pd.Series(0, index=chunk.columns, dtype='int64')
+                    
+                    chunk_bytes = chunk.memory_usage(deep=True).sum()
+                    loaded_bytes += chunk_bytes
+                    peak_chunk_bytes = max(peak_chunk_bytes, chunk_bytes)
+                    inferred_bytes += estimate_inferred_memory(chunk, schema)
+                    original_nulls += chunk.isnull().sum()
+                    row_hashes = pd.util.hash_pandas_object(chunk, index=False)
+                    original_hashes.add(row_hashes.to_numpy())
+                    
+                    filter_stats.pop('rejected_rows', None)
+                    filtered = filter_fn(chunk, verbose=False, filter_stats=filter_stats)
+                    rejected_rows = filter_stats.get('rejected_rows')
+                    if filter_fn == self.filter_generic_data:
+                        # The duplicate rule only sees one chunk; also drop rows kept from earlier chunks
+                        seen_before = filtered_hashes.contains(row_hashes.loc[filtered.index].to_numpy())
+                        if seen_before.any():
+                            filter_stats['rule_rejections']['row_not_duplicate'] += int(seen_before.sum())
+                            if rejected_rows is not None:
+                                bit = filter_stats['rule_bits']['row_not_duplicate']
+                                repeats = filtered[seen_before]
+                                repeats = repeats.assign(_failed_rules=np.full(
+                                    len(repeats), 1 << bit, dtype=rejected_rows['_failed_rules'].dtype))
+                                rejected_rows = pd.concat([rejected_rows, repeats])
+                            filtered = filtered[~seen_before]
+                    if rejected_writer is not None and rejected_rows is not None:
+                        rejected_writer.write(rejected_rows)
+                    filtered = self.normalize_prices(filename, filtered)
+                    
+                    if filtered_columns is None:
+                        filtered_columns = list(filtered.columns)
+                        filtered_nulls = pd.Series(0, index=filtered.columns, dtype='int64')
+                    filtered_nulls += filtered.isnull().sum()
+                    if filter_stats.get('reshaped'):
+                        filtered_hashes.add(pd.util.hash_pandas_object(filtered, index=False).to_numpy())
+                    else:
+                        # Filters only drop rows, so the filtered hashes are a subset of the chunk's
+                        filtered_hashes.add(row_hashes.loc[filtered.index].to_numpy())
+                    writer.write(filtered)
+            original_duplicates = original_hashes.duplicates()
+            filtered_duplicates = filtered_hashes.duplicates()
+        finally:
+            writer.close()
+            if rejected_writer is not None:
+                rejected_writer.close()
+            spill_dir.cleanup()
+        
+        original_rows = original_hashes.added
+        filtered_rows = filtered_hashes.added
+        input_rows = filter_stats['input_rows'] if filter_stats.get('reshaped') else original_rows
+        loaded_mb = loaded_bytes / 1024**2
+        inferred_mb = inferred_bytes / 1024**2
+        
+        return {
+            'filename': filename,
+            'encoding': encoding,
+            'streamed': True,
+            'chunks': chunks,
+            'original_shape': (original_rows, len(columns or [])),
+            'original_columns': columns or [],
+            'original_null_counts': original_nulls.to_dict() if original_nulls is not None else {},
+            'original_duplicates': original_duplicates,
+            'memory': {
+                'schema_applied': schema is not None,
+                'inferred_dtypes_mb': inferred_mb,
+                'loaded_mb': loaded_mb,
+                'saved_pct': (1 - loaded_mb / inferred_mb) * 100 if inferred_mb > 0 else 0,
+                'peak_chunk_mb': peak_chunk_bytes / 1024**2,
+            },
+            'output_file': output_filename,
+            'filtered_shape': (filtered_rows, len(filtered_columns or [])),
+            'filtered_null_counts': filtered_nulls.to_dict() if filtered_nulls is not None else {},
+            'filtered_duplicates': filtered_duplicates,
+            'reshaped_rows': input_rows if filter_stats.get('reshaped') else None,
+            'rows_removed': input_rows - filtered_rows,
+            'retention_rate': (filtered_rows / input_rows) * 100 if input_rows > 0 else 0,
+            'rule_rejections': filter_stats.get('rule_rejections', {}),
+            'rule_bits': filter_stats.get('rule_bits', {}),
+            'rejected_rows_file': rejected_filename,
+        }
+    
+    def build_bis_panel(self):
+        """Fold the filtered BIS series into the shared date x country panel store.
+
+        The store records each series' input hash; only series whose input
+        changed since it was written are re-read and merged in, so an
+        unchanged set of BIS files costs one metadata read. After any change
+        the derived metrics (bis_panel.DERIVED_COLUMNS) are recomputed and
+        stored as extra columns.
+        """
+        sources = {
+            BIS_PANEL_SERIES[filename]: {'filename': filename, 'sha256': fingerprint['sha256'],
+                                         'filter_rules_version': FILTER_RULES_VERSION}
+            for filename, fingerprint in self.input_fingerprints.items() if filename in BIS_PANEL_SERIES
+        }
+        if not sources:
+            return None
+        print("\n🌍 Updating BIS panel store...")
+        
+        panel_path = os.path.join(self.output_dir, BIS_PANEL_FILENAME)
+        panel, metadata = load_panel(panel_path) if os.path.exists(panel_path) else (None, {})
+        recorded = metadata.get('sources', {}) if panel is not None else {}
+        updated = []
+        for series in PANEL_COLUMNS:
+            if series in sources and recorded.get(series) == sources[series]:
+                continue
+            if series not in sources and series not in recorded:
+                continue
+            filtered = None
+            if series in sources:
+                filtered = self._filtered_dataset(sources[series]['filename'],
+                                                  columns=['date', 'country_code', 'country', 'price'])
+            if series in sources and filtered is None:
+                # Not loaded this run; keep whatever the store has and retry next time
+                if series in recorded:
+                    sources[series] = recorded[series]
+                else:
+                    del sources[series]
+                continue
+            panel = update_panel(panel, series, filtered)
+            updated.append(series)
+        
+        if updated:
+            with self.profiler.track('derive') as record:
+                record['rows'] = len(panel)
+                panel = add_derived_metrics(panel)
+            save_panel(panel, panel_path, sources)
+            print(f"   ✅ Saved {BIS_PANEL_FILENAME} ({len(panel):,} rows; updated {', '.join(updated)})")
+        else:
+            print(f"   ⏭️  {BIS_PANEL_FILENAME} is up to date")
+        
+        if panel is None:
+            return None
+        self.bis_panel = panel
+        self.bis_panel_report = {
+            'output_file': BIS_PANEL_FILENAME,
+            'rows': len(panel),
+            'countries': int(panel['country_code'].nunique()),
+            'date_range': [str(panel['date'].min().date()), str(panel['date'].max().date())] if len(panel) else [],
+            'values': {series: int(panel[series].notna().sum()) for series in PANEL_COLUMNS + DERIVED_COLUMNS},
+            'memory_mb': panel.memory_usage(deep=True).sum() / 1024**2,
+            'updated_series': updated,
+        }
+        return panel
+    
+    def run_panel_stage(self):
+        """Build the BIS panel (profiled as the 'panel' stage) and extract the price index series"""
+        with self.profiler.track('panel') as record:
+            panel = self.build_bis_panel()
+            record['rows'] = 0 if panel is None else len(panel)
+        self.price_indexes = self._price_index_series(panel)
+    
+    def _price_index_series(self, panel):
+        """{country code: (sorted quarter-end dates, PRICE_INDEX_SERIES levels)} for the PRICE_NORMALIZATION markets"""
+        if panel is None:
+            return {}
+        series = {}
+        codes = panel['country_code'].to_numpy(dtype=str)
+        for country in {config['country_code'] for config in PRICE_NORMALIZATION.values()}:
+            first, stop = np.searchsorted(codes, country, side='left'), np.searchsorted(codes, country, side='right')
+            block = panel.iloc[first:stop].dropna(subset=[PRICE_INDEX_SERIES])
+            if len(block):
+                series[country] = (block['date'].to_numpy(dtype='datetime64[ns]'),
+                                   block[PRICE_INDEX_SERIES].to_numpy(dtype='float64'))
+        return series
+    
+    def normalize_prices(self, filename, df):
+        """Add price_index and price_adjusted columns to a filtered sales frame.
+
+        Sale dates come from the date column; when the schema leaves it
+        unparsed (the India Excel serials) they are added as sale_date.
+
+        Frames without a PRICE_NORMALIZATION entry, or whose market has no
+        index series, are returned unchanged. Counts accumulate in
+        normalization_report, so streamed chunks add up.
+        """
+        config = PRICE_NORMALIZATION.get(filename)
+        if config is None or not self.price_indexes or config['country_code'] not in self.price_indexes:
+            return df
+        index_dates, index_values = self.price_indexes[config['country_code']]
+        dates = sale_dates(df, config)
+        levels = asof_index_levels(dates, index_dates, index_values)
+        
+        df = df.copy()
+        if not pd.api.types.is_datetime64_any_dtype(df[config['date_column']]):
+            df['sale_date'] = dates
+        df['price_index'] = levels
+        df['price_adjusted'] = (df[config['price_column']].to_numpy(dtype='float64')
+                                * (index_values[-1] / levels)).round(2)
+        
+        report = self.normalization_report.setdefault(dataset_name_for(filename), {
+            'index': f"BIS {PRICE_INDEX_SERIES} {config['country_code']}",
+            'base_date': str(pd.Timestamp(index_dates[-1]).date()),
+            'base_level': float(index_values[-1]),
+            'rows': 0,
+            'unmatched_rows': 0,
+        })
+        report['rows'] += len(df)
+        report['unmatched_rows'] += int(np.isnan(levels).sum())
+        return df
+    
+    def normalize_all_prices(self):
+        """Apply normalize_prices to every filtered dataset held in memory"""
+        for name, dataset_info in self.filtered_datasets.items():
+            if dataset_info['filename'] not in PRICE_NORMALIZATION:
+                continue
+            with self.profiler.track('normalize', name) as record:
+                record['rows'] = len(dataset_info['data'])
+                dataset_info['data'] = self.normalize_prices(dataset_info['filename'], dataset_info['data'])
+                dataset_info.pop('stats', None)
+            report = self.normalization_report.get(name)
+            if report is not None:
+                print(f"   💱 {dataset_info['filename']}: prices restated at {report['base_date']} "
+                      f"{report['index']} ({report['unmatched_rows']:,} sales without an index level)")
+    
+    def _filtered_dataset(self, filename, columns=None):
+        """A file's filtered rows: in memory if filtered this run, else read back from its output"""
+        name = dataset_name_for(filename)
+        if name in self.filtered_datasets:
+            df = self.filtered_datasets[name]['data']
+            return df if columns is None else df[columns]
+        entry = self.streamed_reports.get(name) or self.reused_datasets.get(name)
+        if entry is None or not entry.get('output_file'):
+            return None
+        return read_output_file(os.path.join(self.output_dir, entry['output_file']), columns=columns)
+    
+    def _filtered_chunks(self, filename):
+        """A file's filtered rows as frames: the whole frame if filtered in memory this run, else its
+        output read back in stream_chunksize chunks"""
+        name = dataset_name_for(filename)
+        if name in self.filtered_datasets:
+            yield self.filtered_datasets[name]['data']
+            return
+        entry = self.streamed_reports.get(name) or self.reused_datasets.get(name)
+        if entry is not None and entry.get('output_file'):
+            yield from iter_output_file(os.path.join(self.output_dir, entry['output_file']), self.stream_chunksize)
+    
+    def _king_county_sources(self):
+        """{source file: input sha256} of the King County files in this run, in priority order"""
+        return {filename: self.input_fingerprints[filename]['sha256']
+                for filename in KING_COUNTY_SOURCES if filename in self.input_fingerprints}
+    
+    def _reusable_merge(self):
+        """The previous run's merge entry, if its sources were reused unchanged and its output is intact"""
+        entry = self.manifest.get('king_county_merge')
+        if not self.incremental or entry is None or self.manifest.get('settings') != self._pipeline_settings():
+            return None
+        reused_files = {reused['filename'] for reused in self.reused_datasets.values()}
+        sources = self._king_county_sources()
+        if entry['sources'] != sources or not set(sources) <= reused_files:
+            return None
+        if not self._output_unchanged(entry['output_file'], entry.get('output_fingerprint')):
+            return None
+        return entry
+    
+    def build_king_county_table(self):
+        """Canonicalize the filtered King County files and save them as one deduplicated table.
+
+        Skipped in incremental runs when both files and the merged output
+        are unchanged. Files not filtered in memory are read back from their
+        outputs chunk by chunk, so a streamed run stays bounded in memory.
+        Returns the statistics of a rebuilt table (None if there was
+        nothing to merge or the previous table was reused).
+        """
+        if not self._king_county_sources():
+            return None
+        print("\n🔗 Merging King County sales...")
+        
+        entry = self._reusable_merge()
+        if entry is not None:
+            self.merge_report = entry['report']
+            print(f"   ⏭️  Unchanged sources - reusing {entry['output_file']}")
+            return None
+        
+        merger = KingCountyMerger()
+        output_filename = self.output_filename(KING_COUNTY_MERGED_FILE)
+        writer = ChunkedOutputWriter(os.path.join(self.output_dir, output_filename),
+                                     self.output_format, self.output_compression)
+        try:
+            for filename in self._king_county_sources():
+                for chunk in self._filtered_chunks(filename):
+                    writer.write(merger.add(filename, canonicalize_king_county(chunk)))
+        except Exception as e:
+            print(f"   ❌ Error saving {output_filename}: {str(e)}")
+            return None
+        finally:
+            writer.close()
+        
+        stats = merger.stats()
+        self.merge_report = {'output_file': output_filename, **stats}
+        for filename, info in stats['sources'].items():
+            print(f"   📄 {filename}: {info['rows']:,} rows, {info['overlapping_rows']:,} already merged, "
+                  f"{info['duplicate_keys']:,} repeated keys, {info['unique_rows']:,} added")
+        print(f"   ✅ Saved {output_filename} ({stats['merged_rows']:,} sales; {stats['overlapping_sales']:,} "
+              f"overlapping, {stats['conflicting_sales']:,} with conflicting values)")
+        return self.merge_report
     
     def save_filtered_data(self):
         """Save all filtered datasets to the output directory"""
-        print(f"\n💾 Saving filtered datasets to '{self.output_dir}'...")
+        compression_note = f", {self.output_compression}" if self.output_compression else ""
+        print(f"\n💾 Saving filtered datasets to '{self.output_dir}' ({self.output_format}{compression_note})...")
         
         for name, dataset_info in self.filtered_datasets.items():
             df = dataset_info['data']
             original_filename = dataset_info['filename']
-            output_path = os.path.join(self.output_dir, original_filename)
+            output_filename = self.output_filename(original_filename)
+            output_path = os.path.join(self.output_dir, output_filename)
             
             try:
-                df.to_csv(output_path, index=False, encoding='utf-8')
-                print(f"   ✅ Saved {original_filename} ({len(df):,} rows)")
+                with self.profiler.track('save', name) as record:
+                    record['rows'] = len(df)
+                    self._write_dataframe(df, output_path)
+                dataset_info['output_file'] = output_filename
+                print(f"   ✅ Saved {output_filename} ({len(df):,} rows)")
             except Exception as e:
-                print(f"   ❌ Error saving {original_filename}: {str(e)}")
+                print(f"   ❌ Error saving {output_filename}: {str(e)}")
+            
+            rejected_rows = dataset_info.get('rejected_rows')
+            if rejected_rows is not None:
+                rejected_filename = self.rejected_filename(original_filename)
+                try:
+                    self._write_dataframe(rejected_rows, os.path.join(self.output_dir, rejected_filename))
+                    dataset_info['rejected_rows_file'] = rejected_filename
+                    print(f"   🗑️  Saved {rejected_filename} ({len(rejected_rows):,} rejected rows)")
+                except Exception as e:
+                    print(f"   ❌ Error saving {rejected_filename}: {str(e)}")
+    
+    def output_filename(self, original_filename):
+        """Name of the output file for a dataset in the configured format"""
+        stem = os.path.splitext(original_filename)[0]
+        filename = stem + OUTPUT_FORMATS[self.output_format]['extension']
+        if self.output_format == 'csv' and self.output_compression:
+            filename += CSV_COMPRESSION_SUFFIXES[self.output_compression]
+        return filename
+    
+    def rejected_filename(self, original_filename):
+        """Name of the rejected-rows sidecar for a dataset, e.g. 'Housing.rejected.csv'"""
+        stem, _ = os.path.splitext(original_filename)
+        return self.output_filename(stem + '.rejected.csv')
+    
+    def _write_dataframe(self, df, output_path):
+        """Write a DataFrame in the configured output format"""
+        if self.output_format == 'parquet':
+            df.to_parquet(output_path, engine='pyarrow', compression=self.output_compression, index=False)
+        elif self.output_format == 'feather':
+            # Feather requires a default index; filtering leaves gaps in it
+            df.reset_index(drop=True).to_feather(output_path, compression=self.output_compression)
+        else:
+            df.to_csv(output_path, index=False, encoding='utf-8', compression=self.output_compression)
     
     def generate_data_quality_report(self):
         """Generate and save a comprehensive data quality report"""
         print("\n📊 Generating data quality report...")
         
-        report = {
-            'analysis_date': datetime.now().isoformat(),
-            'summary': {
-                'total_datasets': len(self.datasets),
-                'datasets_processed': len(self.filtered_datasets),
-                'total_original_rows': sum(len(info['data']) for info in self.datasets.values()),
-                'total_filtered_rows': sum(len(info['data']) for info in self.filtered_datasets.values())
-            },
-            'datasets': {}
-        }
-        
+        dataset_reports = {}
         for name in self.datasets.keys():
             original_df = self.datasets[name]['data']
             filtered_info = self.filtered_datasets.get(name)
+            stats = self.get_dataset_stats(name)
             
             dataset_report = {
                 'filename': self.datasets[name]['filename'],
+                'encoding': self.datasets[name].get('encoding'),
                 'original_shape': original_df.shape,
                 'original_columns': list(original_df.columns),
-                'original_null_counts': original_df.isnull().sum().to_dict(),
-                'original_duplicates': original_df.duplicated().sum(),
+                'original_null_counts': stats['null_counts'],
+                'original_duplicates': stats['duplicates'],
             }
             
+            quality_info = self.data_quality_report.get(name)
+            if quality_info is not None:
+                dataset_report['memory'] = {
+                    'schema_applied': quality_info['schema_applied'],
+                    'inferred_dtypes_mb': quality_info['inferred_memory_mb'],
+                    'loaded_mb': quality_info['memory_usage_mb'],
+                    'saved_pct': quality_info['memory_saved_pct'],
+                }
+            
             if filtered_info is not None:
                 filtered_df = filtered_info['data']
+                filtered_stats = self.get_filtered_stats(name)
+                input_rows = filtered_info['input_rows']
                 dataset_report.update({
+                    'output_file': filtered_info.get('output_file'),
                     'filtered_shape': filtered_df.shape,
-                    'filtered_null_counts': filtered_df.isnull().sum().to_dict(),
-                    'filtered_duplicates': filtered_df.duplicated().sum(),
-                    'rows_removed': original_df.shape[0] - filtered_df.shape[0],
-                    'retention_rate': (filtered_df.shape[0] / original_df.shape[0]) * 100 if original_df.shape[0] > 0 else 0
+                    'filtered_null_counts': filtered_stats['null_counts'],
+                    'filtered_duplicates': filtered_stats['duplicates'],
+                    'reshaped_rows': input_rows if filtered_info['reshaped'] else None,
+                    'rows_removed': input_rows - filtered_df.shape[0],
+                    'retention_rate': (filtered_df.shape[0] / input_rows) * 100 if input_rows > 0 else 0,
+                    'rule_rejections': filtered_info.get('rule_rejections', {}),
+                    'rule_bits': filtered_info.get('rule_bits', {}),
+                    'rejected_rows_file': filtered_info.get('rejected_rows_file')
                 })
             
-            report['datasets'][name] = dataset_report
+            dataset_reports[name] = dataset_report
+        
+        # Streamed datasets build their sections while they are processed
+        dataset_reports.update(self.streamed_reports)
+        
+        # Sections for unchanged inputs come straight from the previous run
+        for name, entry in self.reused_datasets.items():
+            dataset_reports[name] = dict(entry['report'], reused=True)
+        dataset_reports = dict(sorted(dataset_reports.items(), key=lambda item: item[1]['filename']))
+        
+        sections = dataset_reports.values()
+        report = {
+            'analysis_date': datetime.now().isoformat(),
+            'summary': {
+                'total_datasets': len(dataset_reports),
+                'datasets_processed': sum(1 for data in sections if 'filtered_shape' in data),
+                'datasets_streamed': len(self.streamed_reports),
+                'datasets_reused': len(self.reused_datasets),
+                'total_original_rows': sum(data['original_shape'][0] for data in sections),
+                'total_filtered_rows': sum(data['filtered_shape'][0] for data in sections if 'filtered_shape' in data),
+                'total_inferred_memory_mb': sum(data['memory']['inferred_dtypes_mb'] for data in sections if 'memory' in data),
+                'total_loaded_memory_mb': sum(data['memory']['loaded_mb'] for data in sections if 'memory' in data)
+            },
+            'load_errors': self.load_errors,
+            'datasets': dataset_reports
+        }
+        if self.bis_panel_report is not None:
+            report['bis_panel'] = self.bis_panel_report
+        if self.normalization_report:
+            report['price_normalization'] = self.normalization_report
+        if self.merge_report is not None:
+            report['king_county_merge'] = self.merge_report
         
         # Save JSON report
-        report_path = os.path.join(self.output_dir, 'data_quality_report.json')
-        with open(report_path, 'w', encoding='utf-8') as f:
-            json.dump(report, f, indent=2, default=str)
+        self._save_json_report(report)
         
         # Save human-readable report
         readable_report_path = os.path.join(self.output_dir, 'data_quality_report.txt')
@@ -343,18 +1952,35 @@ class HousePriceDataFilter:
             f.write("SUMMARY:\n")
             f.write(f"  Total Datasets: {report['summary']['total_datasets']}\n")
             f.write(f"  Datasets Processed: {report['summary']['datasets_processed']}\n")
+            f.write(f"  Datasets Reused (unchanged): {report['summary']['datasets_reused']}\n")
             f.write(f"  Original Total Rows: {report['summary']['total_original_rows']:,}\n")
             f.write(f"  Filtered Total Rows: {report['summary']['total_filtered_rows']:,}\n")
-            f.write(f"  Overall Retention Rate: {(report['summary']['total_filtered_rows']/report['summary']['total_original_rows'])*100:.1f}%\n\n")
+            f.write(f"  Overall Retention Rate: {(report['summary']['total_filtered_rows']/report['summary']['total_original_rows'])*100:.1f}%\n")
+            f.write(f"  Memory (inferred dtypes): {report['summary']['total_inferred_memory_mb']:.2f} MB\n")
+            f.write(f"  Memory (loaded): {report['summary']['total_loaded_memory_mb']:.2f} MB\n\n")
             
             for name, data in report['datasets'].items():
-                f.write(f"{name.upper()}:\n")
+                f.write(f"{name.upper()}:{' (unchanged, reused)' if data.get('reused') else ''}\n")
+                f.write(f"  Encoding: {data.get('encoding')}\n")
                 f.write(f"  Original Shape: {data['original_shape'][0]:,} rows × {data['original_shape'][1]} columns\n")
+                if data.get('reshaped_rows') is not None:
+                    f.write(f"  Reshaped To: {data['reshaped_rows']:,} rows\n")
                 if 'filtered_shape' in data:
                     f.write(f"  Filtered Shape: {data['filtered_shape'][0]:,} rows × {data['filtered_shape'][1]} columns\n")
                     f.write(f"  Rows Removed: {data['rows_removed']:,}\n")
                     f.write(f"  Retention Rate: {data['retention_rate']:.1f}%\n")
+                    rule_rejections = {rule: count for rule, count in data.get('rule_rejections', {}).items() if count}
+                    if rule_rejections:
+                        f.write("  Rows Rejected per Rule:\n")
+                        for rule, count in rule_rejections.items():
+                            f.write(f"    {rule}: {count:,}\n")
+                    if data.get('rejected_rows_file'):
+                        f.write(f"  Rejected Rows File: {data['rejected_rows_file']}\n")
                 f.write(f"  Original Duplicates: {data['original_duplicates']:,}\n")
+                if 'memory' in data:
+                    memory = data['memory']
+                    f.write(f"  Memory: {memory['inferred_dtypes_mb']:.2f} MB inferred -> "
+                            f"{memory['loaded_mb']:.2f} MB loaded ({memory['saved_pct']:.1f}% saved)\n")
                 
                 # Show top null columns
                 null_counts = data['original_null_counts']
@@ -366,6 +1992,34 @@ class HousePriceDataFilter:
                         pct = (count / data['original_shape'][0]) * 100
                         f.write(f"    {col}: {count:,} ({pct:.1f}%)\n")
                 f.write("\n")
+            
+            panel = report.get('bis_panel')
+            if panel is not None:
+                f.write("BIS PANEL STORE:\n")
+                f.write(f"  File: {panel['output_file']}\n")
+                f.write(f"  Rows: {panel['rows']:,} ({panel['countries']} countries"
+                        f"{', ' + ' to '.join(panel['date_range']) if panel['date_range'] else ''})\n")
+                for series, count in panel['values'].items():
+                    f.write(f"    {series}: {count:,} values\n")
+                f.write(f"  Memory: {panel['memory_mb']:.2f} MB\n\n")
+            
+            if report.get('price_normalization'):
+                f.write("INDEX-ADJUSTED PRICES:\n")
+                for name, info in report['price_normalization'].items():
+                    f.write(f"  {name}: {info['index']}, base {info['base_date']} ({info['base_level']:.2f}); "
+                            f"{info['rows']:,} rows, {info['unmatched_rows']:,} without an index level\n")
+                f.write("\n")
+            
+            merge = report.get('king_county_merge')
+            if merge:
+                f.write("KING COUNTY MERGE:\n")
+                f.write(f"  Output: {merge['output_file']} ({merge['merged_rows']:,} of {merge['input_rows']:,} rows)\n")
+                f.write(f"  Sale key: ({', '.join(merge['sale_key'])})\n")
+                for filename, info in merge['sources'].items():
+                    f.write(f"  {filename}: {info['rows']:,} rows, {info['overlapping_rows']:,} overlapping, "
+                            f"{info['duplicate_keys']:,} repeated keys, {info['unique_rows']:,} added\n")
+                f.write(f"  Overlapping sales: {merge['overlapping_sales']:,} "
+                        f"({merge['conflicting_sales']:,} with conflicting values)\n\n")
         
         print(f"   ✅ Data quality report saved to data_quality_report.json and .txt")
         
@@ -374,36 +2028,138 @@ class HousePriceDataFilter:
         print(f"   Original rows: {report['summary']['total_original_rows']:,}")
         print(f"   Filtered rows: {report['summary']['total_filtered_rows']:,}")
         print(f"   Overall retention: {(report['summary']['total_filtered_rows']/report['summary']['total_original_rows'])*100:.1f}%")
+        return report
+    
+    def _save_json_report(self, report):
+        """Write the JSON data quality report"""
+        report_path = os.path.join(self.output_dir, 'data_quality_report.json')
+        with open(report_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, default=str)
+    
+    def print_profile(self):
+        """Print wall time, CPU time, memory and throughput per pipeline stage"""
+        print("\n⏱️  STAGE PROFILE:")
+        for stage, info in self.profiler.summary()['stages'].items():
+            if 'wall_s' not in info:
+                continue
+            line = f"   {stage:<9} wall {info['wall_s']:7.3f}s  cpu {info['cpu_s']:7.3f}s"
+            if info.get('rows_per_s'):
+                line += f"  {info['rows_per_s']:>12,.0f} rows/s"
+            if 'tracemalloc_peak_mb' in info:
+                line += f"  alloc peak {info['tracemalloc_peak_mb']:.1f} MB"
+            if 'peak_rss_mb' in info:
+                line += f"  rss peak {info['peak_rss_mb']:.1f} MB"
+            print(line)
     
     def run_pipeline(self):
         """Run the complete data filtering pipeline"""
         print("🚀 Starting House Price Data Filtering Pipeline")
         print("=" * 60)
         
-        # Step 1: Load all datasets
-        self.load_all_datasets()
-        
-        # Step 2: Analyze data quality
-        self.analyze_data_quality()
-        
-        # Step 3: Apply filters
-        self.apply_filters()
-        
-        # Step 4: Save filtered data
-        self.save_filtered_data()
+        self.profiler.start()
+        with self.profiler.track('pipeline') as pipeline_record:
+            if self.stream_chunksize:
+                # Steps 1-6 in one bounded-memory pass per file
+                with self.profiler.track('stream') as record:
+                    self.stream_all_datasets()
+                    record['rows'] = sum(data['original_shape'][0] for data in self.streamed_reports.values())
+            else:
+                # Step 1: Load all datasets
+                with self.profiler.track('load') as record:
+                    self.load_all_datasets()
+                    record['rows'] = sum(len(info['data']) for info in self.datasets.values())
+                
+                # Step 2: Analyze data quality
+                with self.profiler.track('analyze') as record:
+                    self.analyze_data_quality()
+                    record['rows'] = sum(len(info['data']) for info in self.datasets.values())
+                
+                # Step 3: Apply filters
+                with self.profiler.track('filter') as record:
+                    self.apply_filters()
+                    record['rows'] = sum(len(info['data']) for info in self.datasets.values())
+                
+                # Step 4: Fold the BIS series into the panel store
+                self.run_panel_stage()
+                
+                # Step 5: Restate sale prices against the panel's real price index
+                print("\n💱 Adjusting sale prices by price index...")
+                with self.profiler.track('normalize') as record:
+                    self.normalize_all_prices()
+                    record['rows'] = sum(len(info['data']) for info in self.filtered_datasets.values()
+                                         if info['filename'] in PRICE_NORMALIZATION)
+                
+                # Step 6: Save filtered data
+                with self.profiler.track('save') as record:
+                    self.save_filtered_data()
+                    record['rows'] = sum(len(info['data']) for info in self.filtered_datasets.values())
+            
+            # Step 7: Merge the two King County files into one deduplicated table
+            with self.profiler.track('merge') as record:
+                merge_stats = self.build_king_county_table()
+                record['rows'] = 0 if merge_stats is None else merge_stats['input_rows']
+            
+            # Step 8: Generate report and record what was processed for incremental reruns
+            with self.profiler.track('report') as record:
+                report = self.generate_data_quality_report()
+                self.write_manifest(report)
+                record['rows'] = report['summary']['total_original_rows']
+            pipeline_record['rows'] = report['summary']['total_original_rows']
+        self.profiler.stop()
         
-        # Step 5: Generate report
-        self.generate_data_quality_report()
+        # Timings are only complete now, so add them to the saved JSON report afterwards
+        report['profile'] = self.profiler.summary()
+        self._save_json_report(report)
+        self.print_profile()
+        if self.chrome_trace:
+            trace_path = os.path.join(self.output_dir, 'pipeline_trace.json')
+            self.profiler.write_chrome_trace(trace_path)
+            print(f"\n⏱️  Chrome trace saved to {trace_path}")
         
         print("\n🎉 Data filtering pipeline completed successfully!")
         print(f"📁 Filtered datasets saved in: {self.output_dir}")
         print("📊 Check data_quality_report.txt for detailed analysis")
 
+def parse_args():
+    """Parse command line options for the pipeline"""
+    parser = argparse.ArgumentParser(description="House price data filtering pipeline")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="number of concurrent workers used to load CSV files (default: 1, serial)")
+    parser.add_argument('--executor', choices=sorted(LOAD_EXECUTORS), default='thread',
+                        help="worker type for concurrent loading (default: thread)")
+    parser.add_argument('--no-schemas', action='store_true',
+                        help="read every file with pandas' inferred dtypes instead of the per-dataset schemas")
+    parser.add_argument('--format', choices=sorted(OUTPUT_FORMATS), default='csv',
+                        help="file format for the filtered datasets (default: csv)")
+    parser.add_argument('--compression', default=None,
+                        help="compression codec for the chosen format (default: none for csv, "
+                             "snappy for parquet, lz4 for feather; use 'uncompressed' feather for memory-mapping)")
+    parser.add_argument('--incremental', action='store_true',
+                        help="skip inputs unchanged since the last run (per the output manifest) and reuse their outputs")
+    parser.add_argument('--stream-chunksize', type=int, default=None,
+                        help="stream each file in chunks of this many rows to keep memory bounded")
+    parser.add_argument('--save-rejected', action='store_true',
+                        help="write rows rejected by the filters to a '<name>.rejected' sidecar file "
+                             "with a _failed_rules bitmask column (bit positions are listed in the report)")
+    parser.add_argument('--profile-memory', action='store_true',
+                        help="track allocation peaks per stage and dataset with tracemalloc (slows the run)")
+    parser.add_argument('--chrome-trace', action='store_true',
+                        help="also write stage timings as pipeline_trace.json for chrome://tracing or Perfetto")
+    return parser.parse_args()
+
 def main():
     """Main function to run the data filtering pipeline"""
+    args = parse_args()
+    
     # Initialize the filter pipeline
     # Paths will be automatically resolved relative to the script location
-    filter_pipeline = HousePriceDataFilter()
+    filter_pipeline = HousePriceDataFilter(load_workers=args.workers, load_executor=args.executor,
+                                           use_schemas=not args.no_schemas,
+                                           output_format=args.format, output_compression=args.compression,
+                                           incremental=args.incremental,
+                                           stream_chunksize=args.stream_chunksize,
+                                           save_rejected_rows=args.save_rejected,
+                                           profile_memory=args.profile_memory, chrome_trace=args.chrome_trace)
     
     # Print the paths being used
     print(f"📁 Input directory: {filter_pipeline.input_dir}")
@@ -0,0 +1,42 @@
+"""
+File Hashing
+============
+
+Content hashes and (size, mtime, hash) fingerprints of files. The
+filtering pipeline uses them to detect unchanged inputs and outputs in
+incremental runs; the ValueX model, market stats and comparables
+artifacts record the hash of the filtered file they were built from and
+are rebuilt when it changes. Kept out of data_filter_pipeline.py so the
+app and service can use them without importing the pipeline.
+
+Author: Data Analysis Team
+Date: November 2025
+"""
+
+import hashlib
+import os
+
+HASH_CHUNK_BYTES = 1024 * 1024
+
+def file_content_hash(filepath):
+    """SHA-256 of a file's contents, streamed in chunks"""
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_BYTES), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def file_fingerprint(filepath, previous=None):
+    """Size, mtime and content hash of a file.
+
+    The hash is taken from ``previous`` (an earlier fingerprint) when size
+    and mtime still match it, and only recomputed otherwise.
+    """
+    stat = os.stat(filepath)
+    fingerprint = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+    previous = previous or {}
+    if previous.get('size') == fingerprint['size'] and previous.get('mtime_ns') == fingerprint['mtime_ns']:
+        fingerprint['sha256'] = previous['sha256']
+    else:
+        fingerprint['sha256'] = file_content_hash(filepath)
+    return fingerprint
@@ -1,8 +1,18 @@
 import streamlit as st
-import plotly.express as px
 import plotly.graph_objects as go
 import pandas as pd
 import numpy as np
+import io
+import logging
+import os
+import time
+
+from valuex_model import (DEFAULT_CACHE_ENTRIES, DEFAULT_CACHE_TTL_SECONDS, MARKETS, PredictionCache, artifact_path,
+                          filtered_source_path, load_or_train, market_key, predict_cached, read_batch_file,
+                          score_batch)
+from valuex_market import (add_comparables, comparables_path, comparables_table, load_comparables, load_market_stats,
+                           market_position, market_stats_path)
+from valuex_location import lookup_postal_code, search_postal_codes
 
 # ============== PAGE CONFIG ==============
 st.set_page_config(
@@ -12,6 +22,87 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+logger = logging.getLogger("valuex")
+
+# Kiosk mode (?kiosk=1 or VALUEX_KIOSK=1) skips progress bars, balloons and CSS animations
+KIOSK_MODE = (os.environ.get("VALUEX_KIOSK", "").lower() in ("1", "true", "yes")
+              or st.query_params.get("kiosk", "").lower() in ("1", "true", "yes"))
+
+POSTAL_SEARCH_LIMIT = 50
+
+# ============== PRICE MODELS ==============
+def file_mtime(path):
+    return os.path.getmtime(path) if os.path.exists(path) else None
+
+def source_mtime(market_id):
+    """mtime of the market's filtered source file, or None before the pipeline has run"""
+    try:
+        return os.path.getmtime(filtered_source_path(market_id))
+    except FileNotFoundError:
+        return None
+
+@st.cache_resource
+def current_cache_keys():
+    """Latest arguments each cached loader was called with, per market"""
+    return {}
+
+def load_current(loader, market_id, *args):
+    """Call a cached loader keyed on file mtimes, first dropping its entry for the
+    market's older files so a replaced artifact isn't held in memory twice"""
+    slot = (loader.__name__, market_id)
+    previous = current_cache_keys().get(slot)
+    if previous is not None and previous != args:
+        loader.clear(*previous)
+    current_cache_keys()[slot] = args
+    return loader(*args)
+
+@st.cache_resource(show_spinner="Loading price model...")
+def load_price_model(market_id, artifact_mtime, source_mtime):
+    """One model per market, shared by every session and rerun in this process.
+
+    The artifact's and the filtered source's mtimes are part of the cache
+    key, so a retrained artifact or regenerated source is picked up without
+    restarting the app (load_or_train retrains when the source hash changed).
+    """
+    return load_or_train(market_id)
+
+def current_price_model(market_id):
+    path = artifact_path(market_id)
+    if not os.path.exists(path):
+        # Train and save outside the cache, so no entry is kept for the missing artifact
+        load_or_train(market_id)
+    return load_current(load_price_model, market_id, market_id, file_mtime(path), source_mtime(market_id))
+
+@st.cache_resource(show_spinner="Loading market data...")
+def load_reference_stats(stats_mtime, source_mtimes):
+    """Precomputed price distributions, shared like the models and reloaded when rebuilt"""
+    return load_market_stats()
+
+def current_market_stats():
+    path = market_stats_path()
+    if not os.path.exists(path):
+        load_market_stats()
+    return load_current(load_reference_stats, None, file_mtime(path),
+                        tuple(source_mtime(market_id) for market_id in MARKETS))
+
+@st.cache_resource(show_spinner="Loading comparable sales...")
+def load_comparables_index(market_id, index_mtime, source_mtime):
+    """Persisted KD-tree over the market's cleaned sales, loaded once per process"""
+    return load_comparables(market_id)
+
+def current_comparables(market_id):
+    path = comparables_path(market_id)
+    if not os.path.exists(path):
+        load_comparables(market_id)
+    return load_current(load_comparables_index, market_id, market_id, file_mtime(path), source_mtime(market_id))
+
+@st.cache_resource
+def prediction_cache():
+    """Process-wide LRU/TTL cache of predictions, shared across sessions (VALUEX_CACHE_SIZE, VALUEX_CACHE_TTL)"""
+    return PredictionCache(max_entries=int(os.environ.get("VALUEX_CACHE_SIZE", DEFAULT_CACHE_ENTRIES)),
+                           ttl_seconds=float(os.environ.get("VALUEX_CACHE_TTL", DEFAULT_CACHE_TTL_SECONDS)))
+
 # ============== CUSTOM CSS - 2025 COLORFUL DESIGN ==============
 st.markdown("""
 <style>
@@ -282,6 +373,13 @@ header[data-testid="stHeader"] {visibility: hidden;}
 </style>
 """, unsafe_allow_html=True)
 
+if KIOSK_MODE:
+    st.markdown("""
+    <style>
+    *, *::before, *::after { animation: none !important; transition: none !important; }
+    </style>
+    """, unsafe_allow_html=True)
+
 # ============== SIDEBAR ==============
 with st.sidebar:
     st.markdown("""
@@ -326,7 +424,8 @@ with st.sidebar:
         st.metric("🏘️ Properties", "10K+")
     with col2:
         st.metric("🎯 Accuracy", "94.2%", delta="+2.1%")
-        st.metric("⚡ Speed", "< 1s")
+        last_latency = st.session_state.get("last_latency_ms")
+        st.metric("⚡ Speed", f"{last_latency:,.0f} ms" if last_latency is not None else "—")
     
     st.markdown("---")
     
@@ -402,17 +501,32 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # ============== INPUT FORM ==============
-tab1, tab2, tab3 = st.tabs(["📍 Location", "🏠 Property Details", "✨ Features"])
+tab1, tab2, tab3, tab4 = st.tabs(["📍 Location", "🏠 Property Details", "✨ Features", "📦 Batch Valuation"])
 
 with tab1:
+    locations = current_market_stats()['markets'][market_key(market)]['locations']
+    location_currency = MARKETS[market_key(market)]['currency']
+    code_label = "Postal Code" if "India" in market else "ZIP Code"
+    
+    def describe_postal_code(code):
+        summary = lookup_postal_code(locations, code)
+        return (f"{code} · {summary['sales']:,} sales · "
+                f"{location_currency}{summary['price_per_sqft']:,.0f}/sq ft")
+    
     col1, col2 = st.columns(2)
     with col1:
-        if "India" in market:
-            postal = st.selectbox("Postal Code", ["110001 - Delhi", "400001 - Mumbai", "560001 - Bangalore", "600001 - Chennai"])
-        else:
-            postal = st.selectbox("ZIP Code", ["98101 - Seattle", "10001 - New York", "90210 - Beverly Hills", "33101 - Miami"])
+        prefix = st.text_input(f"🔎 Search {code_label}", placeholder="Type the first digits")
+        matches = search_postal_codes(locations, prefix, limit=POSTAL_SEARCH_LIMIT)
+        if not matches:
+            st.warning(f"No {code_label} with recorded sales starts with '{prefix}'.")
+            matches = search_postal_codes(locations, "", limit=POSTAL_SEARCH_LIMIT)
+        postal = st.selectbox(code_label, matches, format_func=describe_postal_code)
     with col2:
         neighborhood = st.selectbox("Neighborhood Type", ["Urban", "Suburban", "Rural"])
+        location = lookup_postal_code(locations, postal)
+        st.caption(f"📍 {location['sales']:,} recorded sales · median price "
+                   f"{location_currency}{location['median_price']:,.0f} · "
+                   f"{location['lat']:.4f}, {location['lon']:.4f}")
 
 with tab2:
     c1, c2, c3, c4 = st.columns(4)
@@ -447,6 +561,64 @@ with tab3:
     with col2:
         renovated = st.checkbox("🔨 Recently Renovated")
 
+with tab4:
+    st.markdown("Upload a CSV or Parquet portfolio with one property per row and the columns "
+                "`bedrooms, bathrooms, sqft, floors, year_built, lot_size, condition, grade, view, "
+                "waterfront, renovated, postal_code`. Every row is priced with the selected market's model.")
+    upload = st.file_uploader("Portfolio file", type=["csv", "parquet"])
+    if upload is not None and st.button("📦 Price Portfolio"):
+        started = time.perf_counter()
+        batch_market = market_key(market)
+        batch_model = current_price_model(batch_market)
+        batch_progress = None if KIOSK_MODE else st.progress(0, text="Reading upload...")
+        
+        def show_batch_progress(done, total):
+            batch_progress.progress(done / total, text=f"Priced {done:,} of {total:,} properties")
+        
+        try:
+            scored = score_batch(batch_model, read_batch_file(upload, upload.name),
+                                 on_progress=None if batch_progress is None else show_batch_progress)
+        except ValueError as e:
+            st.error(f"❌ Could not price {upload.name}: {e}")
+        else:
+            if batch_progress is not None:
+                batch_progress.progress(1.0, text="Finding comparable sales...")
+            scored = add_comparables(current_comparables(batch_market),
+                                     current_market_stats()['markets'][batch_market]['locations'], scored)
+            parquet_buffer = io.BytesIO()
+            scored.to_parquet(parquet_buffer, index=False)
+            batch_latency_ms = (time.perf_counter() - started) * 1000
+            logger.info("batch market=%s model=%s rows=%d latency_ms=%.1f",
+                        batch_market, batch_model['version'], len(scored), batch_latency_ms)
+            st.session_state["batch_result"] = {
+                'name': os.path.splitext(upload.name)[0],
+                'market': batch_market,
+                'model_version': batch_model['version'],
+                'rows': len(scored),
+                'latency_ms': batch_latency_ms,
+                'preview': scored.head(100),
+                'median_price': float(scored['predicted_price'].median()),
+                'csv': scored.to_csv(index=False).encode('utf-8'),
+                'parquet': parquet_buffer.getvalue(),
+            }
+        if batch_progress is not None:
+            batch_progress.empty()
+    
+    batch = st.session_state.get("batch_result")
+    if batch is not None:
+        batch_currency = MARKETS[batch['market']]['currency']
+        b1, b2, b3 = st.columns(3)
+        b1.metric("🏘️ Properties Priced", f"{batch['rows']:,}")
+        b2.metric("💰 Median Prediction", f"{batch_currency}{batch['median_price']:,.0f}")
+        b3.metric("⚡ Time", f"{batch['latency_ms'] / 1000:,.2f} s")
+        st.dataframe(batch['preview'], use_container_width=True)
+        d1, d2 = st.columns(2)
+        with d1:
+            st.download_button("📄 Download CSV", batch['csv'], f"{batch['name']}_valuex.csv", "text/csv")
+        with d2:
+            st.download_button("📄 Download Parquet", batch['parquet'], f"{batch['name']}_valuex.parquet",
+                               "application/octet-stream")
+
 # ============== PREDICTION BUTTON ==============
 st.markdown("<br>", unsafe_allow_html=True)
 col1, col2, col3 = st.columns([1, 2, 1])
@@ -455,22 +627,39 @@ with col2:
 
 # ============== RESULTS ==============
 if predict_btn:
-    with st.spinner("🤖 AI is analyzing your property..."):
-        import time
-        progress = st.progress(0)
-        for i in range(100):
-            time.sleep(0.01)
-            progress.progress(i + 1)
-        
-        # Simulated prediction (replace with your model)
-        base = sqft * 3500 if "India" in market else sqft * 350
-        pred_price = base + (bedrooms * 500000 if "India" in market else bedrooms * 50000)
-        pred_price += (condition - 3) * 200000 + (grade - 7) * 100000
-        pred_price = int(pred_price * (1.1 if waterfront else 1) * (1.05 if renovated else 1))
-        confidence = min(95, 60 + bedrooms*2 + condition*3 + (1 if sqft > 1500 else -5))
-        
-    progress.empty()
-    st.balloons()
+    started = time.perf_counter()
+    progress = None if KIOSK_MODE else st.progress(0, text="Loading model...")
+    
+    market_id = market_key(market)
+    model = current_price_model(market_id)
+    if progress is not None:
+        progress.progress(40, text="Running model...")
+    
+    property_record = {
+        'bedrooms': bedrooms, 'bathrooms': bathrooms, 'sqft': sqft, 'floors': floors,
+        'year_built': year_built, 'lot_size': lot_size, 'condition': condition, 'grade': grade,
+        'view': view, 'waterfront': waterfront, 'renovated': renovated, 'postal_code': postal,
+    }
+    prediction = predict_cached(prediction_cache(), model, [property_record]).iloc[0]
+    pred_price = int(round(prediction['predicted_price']))
+    price_low, price_high = int(round(prediction['price_low'])), int(round(prediction['price_high']))
+    interval_level = model['intervals']['level']
+    if progress is not None:
+        progress.progress(70, text="Comparing with the market...")
+    
+    position = market_position(current_market_stats(), market_id, pred_price, postal)
+    comparables = comparables_table(current_comparables(market_id), location['lat'], location['lon'], sqft, grade)
+    # Precision: 100 minus the interval's half-width as a percentage of the prediction
+    interval_half_width = (price_high - price_low) / (2 * pred_price)
+    confidence = max(0, round(100 * (1 - interval_half_width)))
+    
+    latency_ms = (time.perf_counter() - started) * 1000
+    st.session_state["last_latency_ms"] = latency_ms
+    logger.info("prediction market=%s model=%s latency_ms=%.1f", market_id, model['version'], latency_ms)
+    
+    if progress is not None:
+        progress.empty()
+        st.balloons()
     
     # ========== MAIN RESULTS CARD WITH 2025 DESIGN ==========
     currency = "₹" if "India" in market else "$"
@@ -493,9 +682,14 @@ if predict_btn:
                        -webkit-background-clip: text; -webkit-text-fill-color: transparent;">
                 {currency} {pred_price:,.0f}
             </h1>
+            <p style="color: #2d2d2d; margin: 0; font-weight: 600;">
+                {interval_level:.0%} range: {currency} {price_low:,.0f} – {currency} {price_high:,.0f}
+            </p>
         </div>
         """, unsafe_allow_html=True)
     
+    st.caption(f"⚡ Predicted in {latency_ms:,.1f} ms")
+    
     # Confidence and AI badges
     st.markdown("<br>", unsafe_allow_html=True)
     col1, col2, col3, col4 = st.columns(4)
@@ -504,7 +698,7 @@ if predict_btn:
         st.markdown(f"""
         <div style="background: linear-gradient(135deg, #51e2f5, #9df9ef); 
                    padding: 1rem; border-radius: 25px; text-align: center; color: #1a1a2e; font-weight: 800;">
-            ✓ {confidence}% Confidence
+            ✓ ±{interval_half_width:.0%} at {interval_level:.0%} Confidence
         </div>
         """, unsafe_allow_html=True)
     
@@ -536,19 +730,17 @@ if predict_btn:
             <div class="metric-label">Price per Sq Ft</div>
         </div>""", unsafe_allow_html=True)
     with m2:
-        market_avg = pred_price * 0.92
-        delta = ((pred_price - market_avg) / market_avg) * 100
         st.markdown(f"""<div class="metric-card">
-            <div class="metric-value">+{delta:.1f}%</div>
+            <div class="metric-value">{position['vs_mean_pct']:+.1f}%</div>
             <div class="metric-label">vs Market Avg</div>
         </div>""", unsafe_allow_html=True)
     with m3:
         st.markdown(f"""<div class="metric-card">
-            <div class="metric-value">Top 15%</div>
+            <div class="metric-value">Top {position['top_pct']:.0f}%</div>
             <div class="metric-label">Market Rank</div>
         </div>""", unsafe_allow_html=True)
     with m4:
-        quality = "Excellent" if confidence > 85 else "Good" if confidence > 70 else "Fair"
+        quality = "Excellent" if interval_half_width <= 0.15 else "Good" if interval_half_width <= 0.30 else "Fair"
         st.markdown(f"""<div class="metric-card">
             <div class="metric-value">{quality}</div>
             <div class="metric-label">Prediction Quality</div>
@@ -559,12 +751,12 @@ if predict_btn:
     chart1, chart2 = st.columns(2)
     
     with chart1:
-        # Confidence Gauge
+        # Precision Gauge
         fig_gauge = go.Figure(go.Indicator(
             mode="gauge+number",
             value=confidence,
             domain={'x': [0, 1], 'y': [0, 1]},
-            title={'text': "Confidence Score", 'font': {'color': 'white'}},
+            title={'text': "Precision Score", 'font': {'color': 'white'}},
             gauge={
                 'axis': {'range': [0, 100], 'tickcolor': 'white'},
                 'bar': {'color': "#667eea"},
@@ -582,11 +774,14 @@ if predict_btn:
             height=300
         )
         st.plotly_chart(fig_gauge, use_container_width=True)
+        st.caption(f"Score = 100 − the {interval_level:.0%} interval's half-width in %. "
+                   f"{model['metrics']['interval_coverage']:.1%} of hold-out sales fell inside their intervals.")
     
     with chart2:
         # Feature Impact Radar
         categories = ['Location', 'Size', 'Bedrooms', 'Condition', 'Grade', 'Age']
-        values = [75, min(100, sqft/50), bedrooms*15, condition*20, grade*8, max(0, 100-(2024-year_built))]
+        location_rank = float((locations['price_per_sqft'] < location['price_per_sqft']).mean() * 100)
+        values = [location_rank, min(100, sqft/50), bedrooms*15, condition*20, grade*8, max(0, 100-(2024-year_built))]
         
         fig_radar = go.Figure(data=go.Scatterpolar(
             r=values + [values[0]],
@@ -610,46 +805,88 @@ if predict_btn:
     
     # ========== PRICE DISTRIBUTION ==========
     st.markdown("### 📊 Market Price Distribution")
-    np.random.seed(42)
-    market_prices = np.random.normal(pred_price*0.9, pred_price*0.2, 500)
+    edges = np.asarray(position['bin_edges'])
+    scope_label = f"{code_label} {postal}" if position['scope'] == 'postal_code' else "the whole market"
+    st.caption(f"{position['count']:,} recorded sales in {scope_label}; your property is priced above "
+               f"{position['percentile']:.0f}% of them.")
     
-    fig_dist = px.histogram(x=market_prices, nbins=40, 
-        labels={'x': 'Price', 'y': 'Count'},
-        color_discrete_sequence=['rgba(102,126,234,0.6)'])
-    fig_dist.add_vline(x=pred_price, line_dash="dash", line_color="#ff6b6b",
+    fig_dist = go.Figure(go.Bar(
+        x=(edges[:-1] + edges[1:]) / 2, y=position['histogram'], width=np.diff(edges),
+        marker_color='rgba(102,126,234,0.6)'))
+    fig_dist.add_vline(x=min(max(pred_price, edges[0]), edges[-1]), line_dash="dash", line_color="#ff6b6b",
         annotation_text="Your Property", annotation_font_color="white")
     fig_dist.update_layout(
         paper_bgcolor='rgba(0,0,0,0)',
         plot_bgcolor='rgba(0,0,0,0)',
         font={'color': 'white'},
-        xaxis=dict(gridcolor='rgba(255,255,255,0.1)'),
-        yaxis=dict(gridcolor='rgba(255,255,255,0.1)')
+        xaxis=dict(title='Price', gridcolor='rgba(255,255,255,0.1)'),
+        yaxis=dict(title='Sales', gridcolor='rgba(255,255,255,0.1)'),
+        bargap=0.05
     )
     st.plotly_chart(fig_dist, use_container_width=True)
     
+    # ========== COMPARABLE SALES ==========
+    st.markdown("### 🏘️ Comparable Sales")
+    st.dataframe(comparables.rename(columns={
+        'id': 'Sale ID', 'distance_km': 'Distance (km)', 'price': f'Price ({currency})',
+        'postal_code': 'Postal Code', 'sqft': 'Sq Ft', 'bedrooms': 'Bedrooms', 'bathrooms': 'Bathrooms',
+        'grade': 'Grade', 'year_built': 'Year Built', 'similar': 'Similar Size & Grade',
+    }), use_container_width=True, hide_index=True)
+    
     # ========== EXPANDABLE DETAILS ==========
     with st.expander("🔍 Detailed Price Breakdown"):
         st.markdown(f"""
-        | Component | Value |
-        |-----------|-------|
-        | Base Value (sq ft × rate) | {currency} {base:,.0f} |
-        | Bedroom Premium | {currency} {bedrooms * (500000 if 'India' in market else 50000):,.0f} |
-        | Condition Adjustment | {currency} {(condition-3)*200000:,.0f} |
-        | Grade Adjustment | {currency} {(grade-7)*100000:,.0f} |
-        | Waterfront Premium | {'+10%' if waterfront else 'N/A'} |
-        | Renovation Premium | {'+5%' if renovated else 'N/A'} |
+        | Input | Value |
+        |-------|-------|
+        | Living Area | {sqft:,} sq ft |
+        | Bedrooms / Bathrooms | {bedrooms} / {bathrooms} |
+        | Floors | {floors} |
+        | Year Built | {year_built} |
+        | Lot Size | {lot_size:,} sq ft |
+        | Condition / Grade / View | {condition} / {grade} / {view} |
+        | Waterfront | {'Yes' if waterfront else 'No'} |
+        | Renovated | {'Yes' if renovated else 'No'} |
         | **Final Prediction** | **{currency} {pred_price:,.0f}** |
+        | {interval_level:.0%} Interval | {currency} {price_low:,.0f} – {currency} {price_high:,.0f} |
         """)
     
     with st.expander("📈 Model Information"):
-        st.info("This prediction uses an ensemble of Random Forest and Gradient Boosting models trained on 10,000+ property transactions.")
+        metrics = model['metrics']
+        st.info(f"This prediction uses a gradient boosting model trained on {model['rows']['train']:,} "
+                f"filtered {MARKETS[market_id]['label']} sales from {model['source_file']}.")
+        st.markdown(f"""
+        | Model | Value |
+        |-------|-------|
+        | Version | {model['version']} |
+        | Trained | {model['trained_at'][:19]} |
+        | Hold-out R² | {metrics['holdout_r2']:.3f} |
+        | Hold-out MAE | {currency} {metrics['holdout_mae']:,.0f} |
+        | Hold-out MAPE | {metrics['holdout_mape']:.1%} |
+        | {interval_level:.0%} Interval Coverage | {metrics['interval_coverage']:.1%} |
+        """)
     
     # ========== EXPORT BUTTONS ==========
     st.markdown("---")
     c1, c2, c3 = st.columns(3)
     with c1:
-        st.download_button("📄 Download Report", f"ValueX Report\nPrice: {currency}{pred_price:,}", "valuex_report.txt")
+        st.download_button("📄 Download Report", f"ValueX Report\nPrice: {currency}{pred_price:,}\n"
+                           f"{interval_level:.0%} Interval: {currency}{price_low:,} – {currency}{price_high:,}\n"
+                           f"Model: {market_id} v{model['version']}", "valuex_report.txt")
     with c2:
         st.button("📧 Email Results")
     with c3:
         st.button("🔗 Share Link")
+
+# ============== DEBUG PANEL ==============
+with st.sidebar:
+    with st.expander("🛠️ Debug"):
+        cache_stats = prediction_cache().stats()
+        d1, d2 = st.columns(2)
+        d1.metric("Cache Hits", f"{cache_stats['hits']:,}")
+        d2.metric("Cache Misses", f"{cache_stats['misses']:,}")
+        st.caption(f"Hit rate {cache_stats['hit_rate']:.0%} · {cache_stats['entries']:,} / "
+                   f"{cache_stats['max_entries']:,} entries · TTL {cache_stats['ttl_seconds']:,.0f}s")
+        st.caption(f"Evictions {cache_stats['evictions']:,} · expirations {cache_stats['expirations']:,} · "
+                   f"invalidations {cache_stats['invalidations']:,}")
+        for cached_market, version in cache_stats['model_versions'].items():
+            st.caption(f"{MARKETS[cached_market]['label']} model {version}")
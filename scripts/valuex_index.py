@@ -0,0 +1,120 @@
+"""
+ValueX City Price Index
+=======================
+
+Lookups into the India city house price index (base 2010-11 = 100) that
+data_filter_pipeline.py writes as a tidy (city, quarter, index) series.
+Each quarter's value sits at the quarter's last day and values in between
+are interpolated linearly, so any (city, date) maps to an index level.
+
+Cities are kept as one sorted array with per-city offsets into sorted
+date and value arrays; a lookup is a binary search for the city and one
+np.interp (itself a binary search) over that city's quarters.
+
+Author: Data Analysis Team
+Date: November 2025
+"""
+
+import numpy as np
+import pandas as pd
+
+from valuex_model import DEFAULT_DATA_DIR, filtered_path, read_filtered
+
+INDEX_SOURCE_FILE = 'housing_price_index_2010-11_100.csv'
+# Series for the country as a whole, the usual fallback for unlisted cities
+NATIONAL_SERIES = 'All India'
+
+def normalize_city(names):
+    """City names as case-folded, stripped strings ('Delhi', ' delhi ' and 'DELHI' all match)"""
+    return pd.Series(names, dtype='object').astype(str).str.strip().str.casefold().to_numpy(dtype=str)
+
+def _as_days(dates):
+    """Dates (strings, Timestamps or datetime64) as float days since the epoch"""
+    dates = pd.to_datetime(pd.Series(np.atleast_1d(dates)), errors='coerce')
+    days = dates.to_numpy(dtype='datetime64[D]').astype('float64')
+    days[dates.isna().to_numpy()] = np.nan
+    return days
+
+class CityPriceIndex:
+    """City x quarter index levels with date interpolation.
+
+    Built from the pipeline's tidy output; ``quarter`` may be a Period
+    column or its text form ('2011Q2', as written to CSV).
+    """
+
+    def __init__(self, tidy):
+        tidy = tidy.dropna(subset=['city', 'quarter', 'index'])
+        quarters = tidy['quarter']
+        if not isinstance(quarters.dtype, pd.PeriodDtype):
+            quarters = pd.PeriodIndex(quarters.astype(str), freq='Q')
+        frame = pd.DataFrame({
+            'key': normalize_city(tidy['city']),
+            'city': tidy['city'].astype(str).str.strip().to_numpy(),
+            'day': pd.PeriodIndex(quarters).end_time.normalize().to_numpy(dtype='datetime64[D]').astype('float64'),
+            'index': tidy['index'].to_numpy(dtype='float64'),
+        }).sort_values(['key', 'day'], kind='stable', ignore_index=True)
+
+        self.keys, first = np.unique(frame['key'].to_numpy(dtype=str), return_index=True)
+        self.names = frame['city'].to_numpy()[first]
+        self.offsets = np.append(first, len(frame))
+        self.days = frame['day'].to_numpy()
+        self.values = frame['index'].to_numpy()
+
+    @classmethod
+    def load(cls, data_dir=DEFAULT_DATA_DIR):
+        """Index from the filtered city index file in ``data_dir``"""
+        return cls(read_filtered(filtered_path(INDEX_SOURCE_FILE, data_dir), ['city', 'quarter', 'index']))
+
+    def cities(self):
+        """City names as they appear in the index"""
+        return self.names.tolist()
+
+    def date_range(self, city):
+        """(first, last) quarter-end dates with an index value for ``city``"""
+        position = self._position(city)
+        if position < 0:
+            raise KeyError(f"no index series for city {city!r}")
+        days = self.days[self.offsets[position]:self.offsets[position + 1]]
+        return tuple(pd.Timestamp(np.datetime64(int(day), 'D')) for day in (days[0], days[-1]))
+
+    def _position(self, city):
+        key = str(city).strip().casefold()
+        position = int(np.searchsorted(self.keys, key))
+        return position if position < len(self.keys) and self.keys[position] == key else -1
+
+    def lookup(self, city, date, clamp=False, fallback=None):
+        """Index level of ``city`` on ``date``; see lookup_many"""
+        position = self._position(city)
+        if position < 0 and fallback is not None:
+            position = self._position(fallback)
+        if position < 0 or date is None:
+            return float('nan')
+        day = float(np.datetime64(pd.Timestamp(date), 'D').astype('int64'))
+        start, stop = self.offsets[position], self.offsets[position + 1]
+        edge = None if clamp else float('nan')
+        return float(np.interp(day, self.days[start:stop], self.values[start:stop], left=edge, right=edge))
+
+    def lookup_many(self, cities, dates, clamp=False, fallback=None):
+        """Index levels for aligned arrays of cities and dates.
+
+        Dates between two quarter ends are interpolated linearly. Outside a
+        city's observed range the result is NaN, or with ``clamp`` its first
+        or last value. Unknown cities use the ``fallback`` city's series
+        (e.g. NATIONAL_SERIES) when given, else NaN.
+        """
+        keys = normalize_city(cities)
+        days = _as_days(dates)
+        positions = np.searchsorted(self.keys, keys)
+        positions = np.minimum(positions, len(self.keys) - 1)
+        positions = np.where(self.keys[positions] == keys, positions, -1)
+        if fallback is not None:
+            positions = np.where(positions < 0, self._position(fallback), positions)
+
+        result = np.full(len(keys), np.nan)
+        for position in np.unique(positions[positions >= 0]):
+            rows = positions == position
+            start, stop = self.offsets[position], self.offsets[position + 1]
+            edge = None if clamp else np.nan
+            result[rows] = np.interp(days[rows], self.days[start:stop], self.values[start:stop],
+                                     left=edge, right=edge)
+        return result
@@ -0,0 +1,106 @@
+"""
+ValueX Location Index
+=====================
+
+Per-postal-code summary of recorded sales: centroid, sale count, median
+price, median price per sq ft and the spread of log price per sq ft.
+Codes are kept as one sorted array with aligned value arrays, so exact
+lookups and prefix searches are binary searches (np.searchsorted) rather
+than DataFrame scans.
+
+The same structure serves the app's postal code selector, locates
+properties for the comparables search, and supplies the location
+features the price models are trained on.
+
+Author: Data Analysis Team
+Date: November 2025
+"""
+
+import numpy as np
+import pandas as pd
+
+# Model features derived from a property's postal code (NaN when the code is unknown)
+LOCATION_FEATURES = ['location_price_per_sqft', 'location_lat', 'location_lon', 'location_sales']
+
+LOCATION_ARRAYS = ['codes', 'lat', 'lon', 'sales', 'median_price', 'price_per_sqft', 'price_dispersion']
+
+def normalize_postal_codes(codes):
+    """Postal codes as stripped strings ('98103', 98103 and ' 98103' all match)"""
+    codes = pd.Series(codes, dtype='object')
+    as_text = codes.astype(str).str.strip()
+    # Codes that went through a float column come back as '98103.0'
+    return as_text.str.replace(r'\.0$', '', regex=True).where(codes.notna(), '')
+
+def normalize_postal_code(code):
+    """One postal code normalized like normalize_postal_codes, without building a Series"""
+    if code is None or (isinstance(code, float) and np.isnan(code)):
+        return ''
+    code = str(code).strip()
+    return code[:-2] if code.endswith('.0') else code
+
+def build_location_index(postal_codes, lat, lon, price, sqft):
+    """Summarize sales by postal code into sorted, aligned arrays"""
+    frame = pd.DataFrame({
+        'postal_code': normalize_postal_codes(postal_codes).to_numpy(),
+        'lat': np.asarray(lat, dtype='float64'),
+        'lon': np.asarray(lon, dtype='float64'),
+        'price': np.asarray(price, dtype='float64'),
+        'sqft': np.asarray(sqft, dtype='float64'),
+    })
+    frame = frame[(frame['postal_code'] != '') & (frame['price'] > 0) & (frame['sqft'] > 0)]
+    frame['price_per_sqft'] = frame['price'] / frame['sqft']
+    frame['log_price_per_sqft'] = np.log(frame['price_per_sqft'])
+
+    grouped = frame.groupby('postal_code', sort=True).agg(
+        lat=('lat', 'median'),
+        lon=('lon', 'median'),
+        sales=('price', 'size'),
+        median_price=('price', 'median'),
+        price_per_sqft=('price_per_sqft', 'median'),
+        price_dispersion=('log_price_per_sqft', 'std'),
+    )
+    index = {'codes': grouped.index.to_numpy(dtype=str)}
+    for column in LOCATION_ARRAYS[1:]:
+        index[column] = grouped[column].to_numpy()
+    return index
+
+def location_index_to_json(index):
+    return {key: np.asarray(values).tolist() for key, values in index.items()}
+
+def location_index_from_json(data):
+    index = {key: np.asarray(values) for key, values in data.items()}
+    index['codes'] = index['codes'].astype(str)
+    return index
+
+def find_postal_codes(index, codes):
+    """Positions of ``codes`` in the index (-1 where unknown), by binary search"""
+    codes = normalize_postal_codes(codes).to_numpy(dtype=str)
+    positions = np.searchsorted(index['codes'], codes)
+    positions = np.minimum(positions, len(index['codes']) - 1)
+    return np.where(index['codes'][positions] == codes, positions, -1)
+
+def lookup_postal_code(index, code):
+    """Summary dict for one postal code, or None if it has no recorded sales"""
+    code = normalize_postal_code(code)
+    position = int(np.searchsorted(index['codes'], code))
+    if position >= len(index['codes']) or index['codes'][position] != code:
+        return None
+    summary = {key: index[key][position].item() for key in LOCATION_ARRAYS[1:]}
+    summary['postal_code'] = code
+    return summary
+
+def search_postal_codes(index, prefix, limit=50):
+    """Codes starting with ``prefix``, in sorted order (at most ``limit``)"""
+    prefix = str(prefix).strip()
+    start = np.searchsorted(index['codes'], prefix, side='left')
+    stop = np.searchsorted(index['codes'], prefix + '\uffff', side='left')
+    return index['codes'][start:min(stop, start + limit)].tolist()
+
+def location_features(index, codes):
+    """LOCATION_FEATURES for each postal code, as a float64 DataFrame"""
+    positions = find_postal_codes(index, codes)
+    known = positions >= 0
+    features = {}
+    for feature, key in zip(LOCATION_FEATURES, ['price_per_sqft', 'lat', 'lon', 'sales']):
+        features[feature] = np.where(known, index[key][np.maximum(positions, 0)], np.nan).astype('float64')
+    return pd.DataFrame(features)
@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+ValueX Market Reference Data
+============================
+
+Precomputes price distributions from the filtered datasets so the
+Streamlit app can place a predicted price in its market without touching
+the raw data: per market and per postal code, a 101-point quantile grid
+(0th-100th percentile), the mean price and a histogram on shared bin
+edges. These are stored in one small JSON artifact together with each
+market's location index (see valuex_location.py).
+
+It also builds a per-market comparables index: a KD-tree over the
+projected coordinates of every cleaned sale, persisted with joblib, from
+which the nearest sales of similar size and grade are looked up.
+
+Usage:
+    python scripts/valuex_market.py     # rebuild the artifacts
+
+Author: Data Analysis Team
+Date: November 2025
+"""
+
+import argparse
+import json
+import os
+from datetime import datetime
+
+import joblib
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+
+from file_hashing import file_content_hash
+from valuex_location import (build_location_index, find_postal_codes, location_index_from_json,
+                             location_index_to_json, normalize_postal_code, normalize_postal_codes)
+from valuex_model import (DEFAULT_DATA_DIR, DEFAULT_MODEL_DIR, MARKETS, filtered_source_path, read_filtered,
+                          source_changed)
+
+# Bump when the artifact layout changes
+MARKET_STATS_FORMAT_VERSION = 4
+MARKET_STATS_FILENAME = 'valuex_market_stats.json'
+
+QUANTILE_GRID = np.linspace(0, 1, 101)
+HISTOGRAM_BINS = 40
+# Postal codes with fewer sales fall back to the market-wide distribution
+MIN_POSTAL_SALES = 30
+
+COMPARABLES_FORMAT_VERSION = 2
+DEFAULT_COMPARABLES = 5
+# Nearest sales examined per query before filtering on size and grade
+COMPARABLE_CANDIDATES = 64
+# A comparable's living area is within this fraction of the subject's, its grade within this many steps
+SIZE_TOLERANCE = 0.25
+GRADE_TOLERANCE = 1
+# Sales closer than this to the subject are taken to be the subject itself (or an earlier sale of it)
+SELF_MATCH_KM = 1e-6
+KM_PER_DEGREE = 111.32
+
+def _distribution(prices, edges):
+    counts, _ = np.histogram(np.clip(prices, edges[0], edges[-1]), bins=edges)
+    return {
+        'count': int(len(prices)),
+        'mean': float(prices.mean()),
+        'quantiles': np.quantile(prices, QUANTILE_GRID).round(0).tolist(),
+        'histogram': counts.tolist(),
+    }
+
+def build_market_stats(data_dir=DEFAULT_DATA_DIR):
+    """Compute every market's price distributions from the filtered datasets"""
+    stats = {'format_version': MARKET_STATS_FORMAT_VERSION, 'created': datetime.now().isoformat(), 'markets': {}}
+    for market, spec in MARKETS.items():
+        source_path = filtered_source_path(market, data_dir)
+        df = read_filtered(source_path, [spec['price_column'], spec['postal_column'], spec['lat_column'],
+                                         spec['lon_column'], spec['columns']['sqft']])
+        prices = df[spec['price_column']].to_numpy(dtype='float64')
+        valid = prices > 0
+        prices = prices[valid]
+        postal_codes = normalize_postal_codes(df[spec['postal_column']]).to_numpy()[valid]
+
+        # Shared edges over the 1st-99th percentile; outliers land in the end bins
+        low, high = np.quantile(prices, [0.01, 0.99])
+        edges = np.linspace(low, high, HISTOGRAM_BINS + 1)
+
+        order = np.argsort(postal_codes, kind='stable')
+        codes, starts = np.unique(postal_codes[order], return_index=True)
+        groups = np.split(prices[order], starts[1:])
+        stats['markets'][market] = {
+            'source_file': os.path.basename(source_path),
+            'source_sha256': file_content_hash(source_path),
+            'bin_edges': edges.round(0).tolist(),
+            'market': _distribution(prices, edges),
+            'postal_codes': {code: _distribution(group, edges)
+                             for code, group in zip(codes, groups) if code and len(group) >= MIN_POSTAL_SALES},
+            'locations': location_index_to_json(build_location_index(
+                df[spec['postal_column']], df[spec['lat_column']], df[spec['lon_column']],
+                df[spec['price_column']], df[spec['columns']['sqft']])),
+        }
+    return stats
+
+def market_stats_path(model_dir=DEFAULT_MODEL_DIR):
+    return os.path.join(model_dir, MARKET_STATS_FILENAME)
+
+def save_market_stats(stats, model_dir=DEFAULT_MODEL_DIR):
+    """Write the artifact, replacing any previous one atomically"""
+    os.makedirs(model_dir, exist_ok=True)
+    path = market_stats_path(model_dir)
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(stats, f, separators=(',', ':'))
+    os.replace(path + '.tmp', path)
+    return path
+
+def load_market_stats(model_dir=DEFAULT_MODEL_DIR, data_dir=DEFAULT_DATA_DIR):
+    """Load the artifact, building and saving it first if it is missing or stale
+    (an older format version, or any market's filtered source changed).
+
+    Quantile grids and location indexes are converted to NumPy arrays for
+    searchsorted lookups.
+    """
+    try:
+        with open(market_stats_path(model_dir), 'r', encoding='utf-8') as f:
+            stats = json.load(f)
+        if stats.get('format_version') != MARKET_STATS_FORMAT_VERSION:
+            raise ValueError("stale market stats")
+        if any(source_changed(market, stats['markets'].get(market, {}).get('source_sha256'), data_dir)
+               for market in MARKETS):
+            raise ValueError("market stats built from older filtered data")
+    except (FileNotFoundError, ValueError):
+        stats = build_market_stats(data_dir)
+        save_market_stats(stats, model_dir)
+
+    for market_stats in stats['markets'].values():
+        for distribution in [market_stats['market'], *market_stats['postal_codes'].values()]:
+            distribution['quantiles'] = np.asarray(distribution['quantiles'])
+        market_stats['locations'] = location_index_from_json(market_stats['locations'])
+    return stats
+
+def price_percentile(quantiles, price):
+    """Percentile (0-100) of ``price`` on a quantile grid, by binary search and linear interpolation"""
+    i = int(np.searchsorted(quantiles, price, side='right'))
+    if i == 0:
+        return 0.0
+    if i >= len(quantiles):
+        return 100.0
+    low, high = quantiles[i - 1], quantiles[i]
+    fraction = (price - low) / (high - low) if high > low else 0.0
+    return float((i - 1 + fraction) / (len(quantiles) - 1) * 100)
+
+def market_position(stats, market, price, postal_code=None):
+    """Where a price sits in its postal code (or, lacking enough sales there, its market).
+
+    Returns the distribution used along with the percentile, the share of
+    sales priced higher ('top_pct') and the difference from the mean.
+    """
+    market_stats = stats['markets'][market]
+    scope, distribution = 'market', market_stats['market']
+    postal_code = normalize_postal_code(postal_code)
+    if postal_code in market_stats['postal_codes']:
+        scope, distribution = 'postal_code', market_stats['postal_codes'][postal_code]
+
+    percentile = price_percentile(distribution['quantiles'], price)
+    return {
+        'scope': scope,
+        'count': distribution['count'],
+        'percentile': percentile,
+        'top_pct': max(1.0, 100.0 - percentile),
+        'mean': distribution['mean'],
+        'vs_mean_pct': (price / distribution['mean'] - 1) * 100,
+        'bin_edges': market_stats['bin_edges'],
+        'histogram': distribution['histogram'],
+    }
+
+def comparables_path(market, model_dir=DEFAULT_MODEL_DIR):
+    return os.path.join(model_dir, f"valuex_comparables_{market}.joblib")
+
+def _project(ref_lat, lat, lon):
+    """Equirectangular projection to kilometres, accurate enough within one market"""
+    lat = np.asarray(lat, dtype='float64')
+    lon = np.asarray(lon, dtype='float64')
+    return np.column_stack([lon * np.cos(np.radians(ref_lat)) * KM_PER_DEGREE, lat * KM_PER_DEGREE])
+
+def build_comparables(market, data_dir=DEFAULT_DATA_DIR):
+    """Build the market's comparables index: a KD-tree over sale locations plus per-sale attributes"""
+    spec = MARKETS[market]
+    source_path = filtered_source_path(market, data_dir)
+    columns = {
+        'id': spec['id_column'],
+        'price': spec['price_column'],
+        'postal_code': spec['postal_column'],
+        'lat': spec['lat_column'],
+        'lon': spec['lon_column'],
+        'sqft': spec['columns']['sqft'],
+        'bedrooms': spec['columns']['bedrooms'],
+        'bathrooms': spec['columns']['bathrooms'],
+        'grade': spec['columns']['grade'],
+        'year_built': spec['columns']['year_built'],
+    }
+    df = read_filtered(source_path, list(columns.values()))
+    df = df.rename(columns={column: field for field, column in columns.items()})
+    df = df[(df['price'] > 0) & df['lat'].notna() & df['lon'].notna()].reset_index(drop=True)
+
+    ref_lat = float(df['lat'].median())
+    sales = {field: df[field].to_numpy() for field in columns}
+    sales['postal_code'] = normalize_postal_codes(df['postal_code']).to_numpy()
+    return {
+        'format_version': COMPARABLES_FORMAT_VERSION,
+        'market': market,
+        'source_sha256': file_content_hash(source_path),
+        'ref_lat': ref_lat,
+        'tree': cKDTree(_project(ref_lat, df['lat'], df['lon'])),
+        'sales': sales,
+    }
+
+def save_comparables(index, model_dir=DEFAULT_MODEL_DIR):
+    os.makedirs(model_dir, exist_ok=True)
+    path = comparables_path(index['market'], model_dir)
+    joblib.dump(index, path + '.tmp')
+    os.replace(path + '.tmp', path)
+    return path
+
+def load_comparables(market, model_dir=DEFAULT_MODEL_DIR, data_dir=DEFAULT_DATA_DIR):
+    """Load the market's persisted comparables index, building and saving it if missing or stale
+    (an older format version, or its filtered source changed)"""
+    try:
+        index = joblib.load(comparables_path(market, model_dir))
+        if index.get('format_version') != COMPARABLES_FORMAT_VERSION:
+            raise ValueError("stale comparables index")
+        if source_changed(market, index.get('source_sha256'), data_dir):
+            raise ValueError("comparables index built from older filtered data")
+    except (FileNotFoundError, ValueError):
+        index = build_comparables(market, data_dir)
+        save_comparables(index, model_dir)
+    return index
+
+def nearest_comparables(index, lat, lon, sqft, grade, k=DEFAULT_COMPARABLES, subject_ids=None):
+    """Find ``k`` comparable sales for each subject property in one vectorized query.
+
+    The KD-tree returns the COMPARABLE_CANDIDATES nearest sales; those within
+    SIZE_TOLERANCE of the subject's living area and GRADE_TOLERANCE of its
+    grade are ranked first, nearest first, and the nearest remaining sales
+    fill any shortfall. Sales of the subject itself (at its exact location,
+    or with one of ``subject_ids`` when given) are never used. Returns
+    (positions, distances_km, similar), each of shape (n, k).
+    """
+    sales = index['sales']
+    sqft = np.atleast_1d(np.asarray(sqft, dtype='float64'))
+    grade = np.atleast_1d(np.asarray(grade, dtype='float64'))
+    k = min(k, len(sales['price']))
+    n_candidates = min(max(k, COMPARABLE_CANDIDATES), len(sales['price']))
+
+    distances, positions = index['tree'].query(_project(index['ref_lat'], np.atleast_1d(lat), np.atleast_1d(lon)),
+                                               k=n_candidates, workers=-1)
+    distances = distances.reshape(len(sqft), n_candidates)
+    positions = positions.reshape(len(sqft), n_candidates)
+    similar = ((np.abs(sales['sqft'][positions] / sqft[:, None] - 1) <= SIZE_TOLERANCE)
+               & (np.abs(sales['grade'][positions] - grade[:, None]) <= GRADE_TOLERANCE))
+    itself = distances < SELF_MATCH_KM
+    if subject_ids is not None:
+        subject_ids = pd.to_numeric(pd.Series(np.atleast_1d(subject_ids)), errors='coerce').to_numpy()
+        itself |= sales['id'][positions] == subject_ids[:, None]
+
+    # Rank: other similar sales, then other sales, then the subject's own (only if nothing else is left)
+    order = np.argsort(2 * itself + ~similar, axis=1, kind='stable')[:, :k]
+    return (np.take_along_axis(positions, order, axis=1),
+            np.take_along_axis(distances, order, axis=1),
+            np.take_along_axis(similar, order, axis=1))
+
+def comparables_table(index, lat, lon, sqft, grade, k=DEFAULT_COMPARABLES):
+    """Comparable sales for one property as a DataFrame, nearest similar sales first"""
+    positions, distances, similar = nearest_comparables(index, lat, lon, sqft, grade, k)
+    sales = index['sales']
+    table = pd.DataFrame({field: values[positions[0]] for field, values in sales.items()
+                          if field not in ('lat', 'lon')})
+    table.insert(1, 'distance_km', distances[0].round(2))
+    table['similar'] = similar[0]
+    return table
+
+def locate_properties(locations, frame):
+    """Coordinates for each row: its lat/lon columns when present, else its postal code's centroid.
+
+    Rows with neither come back as NaN.
+    """
+    lat = pd.Series(np.nan, index=frame.index)
+    lon = pd.Series(np.nan, index=frame.index)
+    if 'lat' in frame.columns and 'lon' in frame.columns:
+        lat = pd.to_numeric(frame['lat'], errors='coerce')
+        lon = pd.to_numeric(frame['lon'], errors='coerce')
+    if 'postal_code' in frame.columns:
+        positions = find_postal_codes(locations, frame['postal_code'])
+        known = positions >= 0
+        lat = lat.fillna(pd.Series(np.where(known, locations['lat'][positions], np.nan), index=frame.index))
+        lon = lon.fillna(pd.Series(np.where(known, locations['lon'][positions], np.nan), index=frame.index))
+    return lat, lon
+
+def add_comparables(index, locations, scored, k=DEFAULT_COMPARABLES):
+    """Append comparable-sale columns (ids, median price, mean distance) to a scored batch"""
+    result = scored.copy()
+    lat, lon = locate_properties(locations, result)
+    located = (lat.notna() & lon.notna()).to_numpy()
+    ids = np.full(len(result), '', dtype=object)
+    median_price = np.full(len(result), np.nan)
+    mean_distance = np.full(len(result), np.nan)
+    if located.any():
+        subject_ids = result['id'][located] if 'id' in result.columns else None
+        positions, distances, _ = nearest_comparables(
+            index, lat[located], lon[located], result['sqft'][located], result['grade'][located], k, subject_ids)
+        sales = index['sales']
+        ids[located] = [';'.join(map(str, row)) for row in sales['id'][positions]]
+        median_price[located] = np.median(sales['price'][positions], axis=1)
+        mean_distance[located] = distances.mean(axis=1)
+
+    result['comparable_ids'] = ids
+    result['comparable_median_price'] = median_price.round(0)
+    result['comparable_mean_distance_km'] = mean_distance.round(2)
+    return result
+
+def parse_args():
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Build the ValueX market price distributions")
+    parser.add_argument('--data-dir', default=DEFAULT_DATA_DIR, help="directory with the filtered datasets")
+    parser.add_argument('--model-dir', default=DEFAULT_MODEL_DIR, help="where to write the artifact")
+    return parser.parse_args()
+
+def main():
+    """Rebuild and save the market reference data and comparables indexes"""
+    args = parse_args()
+    stats = build_market_stats(args.data_dir)
+    path = save_market_stats(stats, args.model_dir)
+    for market, market_stats in stats['markets'].items():
+        print(f"✅ {MARKETS[market]['label']}: {market_stats['market']['count']:,} sales, "
+              f"{len(market_stats['locations']['codes'])} postal codes")
+    print(f"📁 Saved to {path} ({os.path.getsize(path) / 1024:.1f} KB)")
+
+    for market in MARKETS:
+        index = build_comparables(market, args.data_dir)
+        path = save_comparables(index, args.model_dir)
+        print(f"✅ {MARKETS[market]['label']} comparables: {index['tree'].n:,} sales indexed -> {path}")
+
+if __name__ == "__main__":
+    main()
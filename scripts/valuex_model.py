@@ -0,0 +1,556 @@
+#!/usr/bin/env python3
+"""
+ValueX Price Models
+===================
+
+Trains one gradient-boosted regressor per market on the filtered datasets
+written by data_filter_pipeline.py (the merged, deduplicated King County
+table for the USA market, House Price India.csv for India) and serializes
+each as a versioned artifact. The Streamlit app loads these artifacts once per
+process and maps its form fields onto the model features defined here.
+
+Usage:
+    python scripts/valuex_model.py                  # train both markets
+    python scripts/valuex_model.py --market india   # train one market
+
+Author: Data Analysis Team
+Date: November 2025
+"""
+
+import argparse
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+import joblib
+import numpy as np
+import pandas as pd
+import sklearn
+from sklearn.ensemble import HistGradientBoostingRegressor
+from sklearn.metrics import mean_absolute_error, r2_score
+from sklearn.model_selection import train_test_split
+
+from file_hashing import file_content_hash
+from valuex_location import (LOCATION_FEATURES, build_location_index, find_postal_codes, location_features,
+                             normalize_postal_code, normalize_postal_codes)
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_DATA_DIR = os.path.join(PROJECT_DIR, 'output', 'filter_data')
+DEFAULT_MODEL_DIR = os.path.join(PROJECT_DIR, 'output', 'models')
+
+# Bump when the artifact layout or feature mapping changes
+MODEL_FORMAT_VERSION = 3
+
+# Form fields, in model feature order
+FEATURE_FIELDS = ['bedrooms', 'bathrooms', 'sqft', 'floors', 'year_built', 'lot_size',
+                  'condition', 'grade', 'view', 'waterfront', 'renovated']
+
+# Per market: filtered source file and the dataset column behind each form field
+MARKETS = {
+    'india': {
+        'label': 'India',
+        'currency': '₹',
+        'source_file': 'House Price India.csv',
+        'price_column': 'Price',
+        'postal_column': 'Postal Code',
+        'id_column': 'id',
+        'lat_column': 'Lattitude',
+        'lon_column': 'Longitude',
+        'columns': {
+            'bedrooms': 'number of bedrooms',
+            'bathrooms': 'number of bathrooms',
+            'sqft': 'living area',
+            'floors': 'number of floors',
+            'year_built': 'Built Year',
+            'lot_size': 'lot area',
+            'condition': 'condition of the house',
+            'grade': 'grade of the house',
+            'view': 'number of views',
+            'waterfront': 'waterfront present',
+            'renovated': 'Renovation Year',
+        },
+    },
+    'usa': {
+        'label': 'USA',
+        'currency': '$',
+        'source_file': 'king_county_sales.csv',
+        'price_column': 'price',
+        'postal_column': 'zipcode',
+        'id_column': 'id',
+        'lat_column': 'lat',
+        'lon_column': 'long',
+        'columns': {
+            'bedrooms': 'bedrooms',
+            'bathrooms': 'bathrooms',
+            'sqft': 'sqft_living',
+            'floors': 'floors',
+            'year_built': 'yr_built',
+            'lot_size': 'sqft_lot',
+            'condition': 'condition',
+            'grade': 'grade',
+            'view': 'view',
+            'waterfront': 'waterfront',
+            'renovated': 'yr_renovated',
+        },
+    },
+}
+
+MODEL_PARAMS = {
+    'max_iter': 400,
+    'learning_rate': 0.06,
+    'max_leaf_nodes': 31,
+    'min_samples_leaf': 20,
+    'l2_regularization': 1.0,
+}
+
+HOLDOUT_FRACTION = 0.2
+
+# Prediction intervals: nominal coverage, and the fewest sales a postal code
+# needs before its own price spread is used to scale the interval
+INTERVAL_LEVEL = 0.9
+MIN_DISPERSION_SALES = 10
+
+# Columns returned by predict_prices
+PREDICTION_COLUMNS = ['predicted_price', 'price_low', 'price_high']
+
+# Prediction cache defaults
+DEFAULT_CACHE_ENTRIES = 10_000
+DEFAULT_CACHE_TTL_SECONDS = 3600
+
+# Rows per model call when scoring uploaded portfolios
+BATCH_CHUNK_ROWS = 50_000
+
+# Alternative column names accepted in batch uploads
+BATCH_COLUMN_ALIASES = {
+    'postal': 'postal_code',
+    'zipcode': 'postal_code',
+    'zip': 'postal_code',
+    'zip_code': 'postal_code',
+    'sqft_living': 'sqft',
+    'living_area': 'sqft',
+    'yr_built': 'year_built',
+    'built_year': 'year_built',
+    'sqft_lot': 'lot_size',
+    'lot_area': 'lot_size',
+    'latitude': 'lat',
+    'lattitude': 'lat',
+    'long': 'lon',
+    'lng': 'lon',
+    'longitude': 'lon',
+}
+
+FLAG_VALUES = {'1': 1.0, 'y': 1.0, 'yes': 1.0, 'true': 1.0,
+               '0': 0.0, 'n': 0.0, 'no': 0.0, 'false': 0.0, '': 0.0}
+
+def market_key(label):
+    """Map a UI label such as '🇮🇳 India', or a key in any case ('USA', 'usa'), to a MARKETS key"""
+    text = str(label).strip().casefold()
+    for key, spec in MARKETS.items():
+        if spec['label'].casefold() in text or key == text:
+            return key
+    raise ValueError(f"unknown market: {label!r}")
+
+def filtered_path(source_file, data_dir=DEFAULT_DATA_DIR):
+    """Locate the filtered version of an input file, whichever output format it was saved in.
+
+    When earlier runs left it in several formats, the most recently written one wins.
+    """
+    stem = os.path.splitext(source_file)[0]
+    paths = [os.path.join(data_dir, stem + ext)
+             for ext in ('.csv', '.parquet', '.feather', '.csv.gz', '.csv.bz2', '.csv.xz', '.csv.zst')]
+    paths = [path for path in paths if os.path.exists(path)]
+    if paths:
+        return max(paths, key=os.path.getmtime)
+    raise FileNotFoundError(f"no filtered {source_file} in {data_dir}; run data_filter_pipeline.py first")
+
+def filtered_source_path(market, data_dir=DEFAULT_DATA_DIR):
+    """Locate the filtered source file for a market"""
+    return filtered_path(MARKETS[market]['source_file'], data_dir)
+
+def source_changed(market, recorded_sha256, data_dir=DEFAULT_DATA_DIR):
+    """Whether the market's filtered source no longer hashes to ``recorded_sha256``.
+
+    A missing source counts as unchanged: there is nothing to rebuild from,
+    so the existing artifact is kept.
+    """
+    try:
+        source_path = filtered_source_path(market, data_dir)
+    except FileNotFoundError:
+        return False
+    return file_content_hash(source_path) != recorded_sha256
+
+def read_filtered(path, columns):
+    if path.endswith('.parquet'):
+        return pd.read_parquet(path, columns=columns)
+    if path.endswith('.feather'):
+        return pd.read_feather(path, columns=columns)
+    return pd.read_csv(path, usecols=columns)
+
+def features_frame(data, market=None):
+    """Build the model feature matrix from form-field values.
+
+    ``data`` is a dict of scalars (one property), a list of such dicts, or a
+    DataFrame with FEATURE_FIELDS columns and optionally ``postal_code``.
+    With ``market`` given, ``data`` is instead a filtered dataset frame and
+    its columns are mapped through MARKETS[market]['columns'].
+    """
+    if isinstance(data, dict):
+        data = [data]
+    frame = pd.DataFrame(data)
+    if market is not None:
+        spec = MARKETS[market]
+        renames = {column: field for field, column in spec['columns'].items()}
+        renames[spec['postal_column']] = 'postal_code'
+        frame = frame.rename(columns=renames)
+    missing = [field for field in FEATURE_FIELDS if field not in frame.columns]
+    if missing:
+        raise ValueError(f"missing feature fields: {', '.join(missing)}")
+
+    features = frame[FEATURE_FIELDS].copy()
+    for field in ('waterfront', 'renovated'):
+        if features[field].dtype == object:
+            features[field] = features[field].astype(str).str.strip().str.lower().map(FLAG_VALUES)
+    features = features.astype('float64')
+    features['waterfront'] = (features['waterfront'] > 0).astype('float64')
+    # Datasets carry the renovation year (0 = never); the form carries a flag
+    features['renovated'] = (features['renovated'] > 0).astype('float64')
+    if 'postal_code' in frame.columns:
+        features['postal_code'] = normalize_postal_codes(frame['postal_code']).to_numpy()
+    return features
+
+def model_matrix(locations, features):
+    """Form-field features plus the location features looked up from each row's postal code"""
+    codes = features['postal_code'] if 'postal_code' in features.columns else [''] * len(features)
+    location = location_features(locations, codes)
+    location.index = features.index
+    return pd.concat([features[FEATURE_FIELDS], location], axis=1)
+
+def interval_scales(locations, default_scale, features):
+    """Per-row spread used to size prediction intervals.
+
+    The standard deviation of log price per sq ft in the row's postal code,
+    or ``default_scale`` (the market-wide spread) when the code is unknown
+    or has fewer than MIN_DISPERSION_SALES sales.
+    """
+    if 'postal_code' not in features.columns:
+        return np.full(len(features), default_scale)
+    positions = find_postal_codes(locations, features['postal_code'])
+    safe = np.maximum(positions, 0)
+    usable = ((positions >= 0) & (locations['sales'][safe] >= MIN_DISPERSION_SALES)
+              & (locations['price_dispersion'][safe] > 0))
+    return np.where(usable, locations['price_dispersion'][safe], default_scale)
+
+def calibrate_intervals(scores, level=INTERVAL_LEVEL):
+    """Split-conformal quantile of the calibration ``scores`` for coverage ``level``"""
+    n = len(scores)
+    rank = min(n, int(np.ceil((n + 1) * level)))
+    return float(np.sort(scores)[rank - 1])
+
+def train_market_model(market, data_dir=DEFAULT_DATA_DIR, random_state=0):
+    """Train the market's regressor and return the artifact dict.
+
+    The model fits log(price); a held-out split is kept aside for the
+    reported metrics. The location index behind the location features is
+    built from the training split only, so hold-out prices never leak into
+    them, and is stored in the artifact for prediction.
+
+    Prediction intervals are split-conformal: half of the hold-out split
+    calibrates the quantile of |log residual| / location spread, the other
+    half measures the coverage actually achieved.
+    """
+    spec = MARKETS[market]
+    source_path = filtered_source_path(market, data_dir)
+    columns = list(spec['columns'].values()) + [spec['price_column'], spec['postal_column'],
+                                                 spec['lat_column'], spec['lon_column']]
+    df = read_filtered(source_path, columns)
+    df = df[df[spec['price_column']] > 0]
+
+    train_df, holdout_df = train_test_split(df, test_size=HOLDOUT_FRACTION, random_state=random_state)
+    locations = build_location_index(train_df[spec['postal_column']], train_df[spec['lat_column']],
+                                     train_df[spec['lon_column']], train_df[spec['price_column']],
+                                     train_df[spec['columns']['sqft']])
+    holdout_features = features_frame(holdout_df, market=market)
+    X_train = model_matrix(locations, features_frame(train_df, market=market))
+    X_holdout = model_matrix(locations, holdout_features)
+    y_train = np.log(train_df[spec['price_column']].to_numpy(dtype='float64'))
+    y_holdout = np.log(holdout_df[spec['price_column']].to_numpy(dtype='float64'))
+
+    model = HistGradientBoostingRegressor(random_state=random_state, **MODEL_PARAMS)
+    model.fit(X_train, y_train)
+
+    holdout_log_pred = model.predict(X_holdout)
+    holdout_pred = np.exp(holdout_log_pred)
+    holdout_true = np.exp(y_holdout)
+
+    log_price_per_sqft = np.log(train_df[spec['price_column']] / train_df[spec['columns']['sqft']])
+    default_scale = float(log_price_per_sqft[np.isfinite(log_price_per_sqft)].std())
+    scores = np.abs(y_holdout - holdout_log_pred) / interval_scales(locations, default_scale, holdout_features)
+    calibration = np.random.default_rng(random_state).permutation(len(scores)) < len(scores) // 2
+    quantile = calibrate_intervals(scores[calibration])
+    evaluation = ~calibration
+    half_width = quantile * interval_scales(locations, default_scale, holdout_features)[evaluation]
+    data_hash = file_content_hash(source_path)
+    trained_at = datetime.now()
+
+    return {
+        'format_version': MODEL_FORMAT_VERSION,
+        # Changes on every retrain, so caches keyed on it never serve an older model's prices
+        'version': f"{MODEL_FORMAT_VERSION}.{data_hash[:8]}.{trained_at:%Y%m%d%H%M%S}",
+        'market': market,
+        'model': model,
+        'features': FEATURE_FIELDS + LOCATION_FEATURES,
+        'locations': locations,
+        'target': 'log_price',
+        'source_file': os.path.basename(source_path),
+        'source_sha256': data_hash,
+        'trained_at': trained_at.isoformat(),
+        'sklearn_version': sklearn.__version__,
+        'params': MODEL_PARAMS,
+        'rows': {'train': len(X_train), 'holdout': len(X_holdout)},
+        'intervals': {
+            'level': INTERVAL_LEVEL,
+            'quantile': quantile,
+            'default_scale': default_scale,
+            'calibration_rows': int(calibration.sum()),
+        },
+        'metrics': {
+            'holdout_mae': float(mean_absolute_error(holdout_true, holdout_pred)),
+            'holdout_mape': float(np.mean(np.abs(holdout_pred / holdout_true - 1))),
+            'holdout_r2': float(r2_score(holdout_true, holdout_pred)),
+            'interval_coverage': float(np.mean(scores[evaluation] <= quantile)),
+            'interval_relative_width': float(np.mean(np.exp(half_width) - np.exp(-half_width))),
+        },
+    }
+
+def artifact_path(market, model_dir=DEFAULT_MODEL_DIR):
+    """Path of the market's serialized model artifact"""
+    return os.path.join(model_dir, f"valuex_{market}.joblib")
+
+def save_artifact(artifact, model_dir=DEFAULT_MODEL_DIR):
+    """Serialize an artifact, replacing any previous one atomically"""
+    os.makedirs(model_dir, exist_ok=True)
+    path = artifact_path(artifact['market'], model_dir)
+    tmp_path = path + '.tmp'
+    joblib.dump(artifact, tmp_path)
+    os.replace(tmp_path, path)
+    return path
+
+def load_artifact(market, model_dir=DEFAULT_MODEL_DIR):
+    """Load a market's artifact, rejecting ones written by an incompatible version"""
+    artifact = joblib.load(artifact_path(market, model_dir))
+    if artifact.get('format_version') != MODEL_FORMAT_VERSION:
+        raise ValueError(f"model artifact for '{market}' has format version "
+                         f"{artifact.get('format_version')}, expected {MODEL_FORMAT_VERSION}; retrain it")
+    return artifact
+
+def load_or_train(market, model_dir=DEFAULT_MODEL_DIR, data_dir=DEFAULT_DATA_DIR):
+    """Load the market's artifact, training and saving it first if it is missing or stale.
+
+    Stale means an older format version or a filtered source file that
+    changed since the artifact was trained.
+    """
+    try:
+        artifact = load_artifact(market, model_dir)
+        if source_changed(market, artifact.get('source_sha256'), data_dir):
+            raise ValueError(f"filtered source for '{market}' changed since the model was trained")
+        return artifact
+    except (FileNotFoundError, ValueError):
+        artifact = train_market_model(market, data_dir)
+        save_artifact(artifact, model_dir)
+        return artifact
+
+def predict_prices(artifact, features):
+    """Predict prices and their intervals for a feature frame from features_frame.
+
+    One vectorized model call gives the point estimates; the interval
+    bounds only rescale them, so they cost no extra model pass. Returns a
+    float64 DataFrame with PREDICTION_COLUMNS.
+    """
+    log_price = artifact['model'].predict(model_matrix(artifact['locations'], features))
+    intervals = artifact['intervals']
+    half_width = intervals['quantile'] * interval_scales(artifact['locations'], intervals['default_scale'], features)
+    return pd.DataFrame({
+        'predicted_price': np.exp(log_price),
+        'price_low': np.exp(log_price - half_width),
+        'price_high': np.exp(log_price + half_width),
+    })
+
+class PredictionCache:
+    """Thread-safe LRU cache of predictions with a time-to-live.
+
+    Keys are normalized feature tuples (see ``key``), so the same property
+    entered as 2 or 2.0 bathrooms, 'Y' or True waterfront, hits the same
+    entry. Each market remembers the model version its entries came from;
+    a lookup with a different version drops that market's entries.
+    """
+
+    def __init__(self, max_entries=DEFAULT_CACHE_ENTRIES, ttl_seconds=DEFAULT_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.entries = OrderedDict()
+        self.model_versions = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def key(market, record):
+        """Normalized (market, postal_code, *FEATURE_FIELDS) tuple for one property"""
+        values = [market, normalize_postal_code(record.get('postal_code'))]
+        for field in FEATURE_FIELDS:
+            value = record[field]
+            if field in ('waterfront', 'renovated'):
+                if isinstance(value, str):
+                    value = FLAG_VALUES.get(value.strip().lower(), value)
+                values.append(bool(value))
+            else:
+                values.append(float(value))
+        return tuple(values)
+
+    def _check_version(self, market, version):
+        if self.model_versions.get(market) != version:
+            stale = [key for key in self.entries if key[0] == market]
+            for key in stale:
+                del self.entries[key]
+            if market in self.model_versions:
+                self.invalidations += 1
+            self.model_versions[market] = version
+
+    def get(self, key, version):
+        """Cached value for ``key`` under model ``version``, or None"""
+        with self.lock:
+            self._check_version(key[0], version)
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                del self.entries[key]
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, version, value):
+        with self.lock:
+            self._check_version(key[0], version)
+            self.entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self.entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+                'model_versions': dict(self.model_versions),
+            }
+
+def predict_cached(cache, artifact, records):
+    """predict_prices for a list of form-field dicts, serving repeats from ``cache``.
+
+    Only the cache misses go to the model, in one vectorized call. Entries
+    hold the (price, low, high) row, so cached predictions keep their
+    intervals.
+    """
+    market, version = artifact['market'], artifact['version']
+    keys = [cache.key(market, record) for record in records]
+    rows = [cache.get(key, version) for key in keys]
+    # First row for each distinct missing key; repeats within the call share its prediction
+    missing = {}
+    for i, row in enumerate(rows):
+        if row is None:
+            missing.setdefault(keys[i], i)
+    if missing:
+        computed = predict_prices(artifact, features_frame([records[i] for i in missing.values()]))
+        computed = dict(zip(missing, computed.itertuples(index=False, name=None)))
+        for key, row in computed.items():
+            cache.put(key, version, row)
+        rows = [computed[key] if row is None else row for key, row in zip(keys, rows)]
+    return pd.DataFrame(rows, columns=PREDICTION_COLUMNS, dtype='float64')
+
+def read_batch_file(source, filename):
+    """Read an uploaded portfolio (CSV or Parquet, chosen by file extension)"""
+    if filename.lower().endswith('.parquet'):
+        return pd.read_parquet(source)
+    return pd.read_csv(source)
+
+def normalize_field_name(name):
+    """Map an input column or JSON key to its form-field name ('Year Built' -> 'year_built', 'zipcode' -> 'postal_code')"""
+    name = str(name).strip().lower().replace(' ', '_').replace('-', '_')
+    return BATCH_COLUMN_ALIASES.get(name, name)
+
+def normalize_batch_columns(df):
+    """Rename upload columns to form-field names"""
+    return df.rename(columns={column: normalize_field_name(column) for column in df.columns})
+
+def score_batch(artifact, df, chunk_rows=BATCH_CHUNK_ROWS, on_progress=None):
+    """Price every row of an uploaded portfolio.
+
+    Each chunk of ``chunk_rows`` rows is one vectorized model call;
+    ``on_progress(rows_done, rows_total)`` is called after each chunk.
+    Returns the normalized input with the PREDICTION_COLUMNS added.
+    """
+    df = normalize_batch_columns(df)
+    missing = [field for field in FEATURE_FIELDS if field not in df.columns]
+    if missing:
+        raise ValueError(f"upload is missing columns: {', '.join(missing)}")
+
+    predictions = np.empty((len(df), len(PREDICTION_COLUMNS)), dtype='float64')
+    for start in range(0, len(df), chunk_rows):
+        stop = min(start + chunk_rows, len(df))
+        predictions[start:stop] = predict_prices(artifact, features_frame(df.iloc[start:stop])).to_numpy()
+        if on_progress is not None:
+            on_progress(stop, len(df))
+
+    result = df.copy()
+    for i, column in enumerate(PREDICTION_COLUMNS):
+        result[column] = predictions[:, i].round(0)
+    return result
+
+def parse_args():
+    """Parse command line options for training"""
+    parser = argparse.ArgumentParser(description="Train the ValueX price models")
+    parser.add_argument('--market', nargs='+', choices=sorted(MARKETS), default=sorted(MARKETS),
+                        help="markets to train (default: all)")
+    parser.add_argument('--data-dir', default=DEFAULT_DATA_DIR, help="directory with the filtered datasets")
+    parser.add_argument('--model-dir', default=DEFAULT_MODEL_DIR, help="where to write the model artifacts")
+    parser.add_argument('--random-state', type=int, default=0, help="seed for the split and the model")
+    return parser.parse_args()
+
+def main():
+    """Train and save one model per requested market"""
+    args = parse_args()
+    for market in args.market:
+        print(f"🔄 Training {MARKETS[market]['label']} model...")
+        artifact = train_market_model(market, args.data_dir, args.random_state)
+        path = save_artifact(artifact, args.model_dir)
+        metrics = artifact['metrics']
+        print(f"   ✅ version {artifact['version']}: {artifact['rows']['train']:,} training rows, "
+              f"hold-out R² {metrics['holdout_r2']:.3f}, MAPE {metrics['holdout_mape']:.1%}")
+        print(f"   📏 {artifact['intervals']['level']:.0%} intervals: {metrics['interval_coverage']:.1%} "
+              f"hold-out coverage, mean width ±{metrics['interval_relative_width'] / 2:.1%}")
+        print(f"   📁 Saved to {path}")
+
+if __name__ == "__main__":
+    main()
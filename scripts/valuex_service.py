@@ -0,0 +1,429 @@
+#!/usr/bin/env python3
+"""
+ValueX Prediction Service
+=========================
+
+Headless HTTP API over the ValueX price models, for systems that need
+valuations without a Streamlit session. Uses the same feature mapping as
+the app's form (valuex_model.FEATURE_FIELDS).
+
+Endpoints:
+    POST /v1/predict         one property: {"market": "usa", "bedrooms": 3, ...}
+    POST /v1/predict/batch   {"market": "usa", "properties": [{...}, ...], "comparables": 5}
+    GET  /health             model versions and queue depths
+    GET  /metrics            Prometheus metrics
+
+Every prediction carries price_low/price_high, the bounds of the model's
+conformal interval at the response's interval_level (see valuex_model).
+
+Batch responses include each property's nearest comparable sales (located by
+lat/lon or postal code; "comparables": 0 turns this off).
+
+Predictions are cached per process in an LRU/TTL cache keyed on the
+normalized features (--cache-entries, --cache-ttl); entries are dropped
+when a market's model artifact is replaced.
+
+Single-property requests are micro-batched: concurrent requests for the
+same market are queued and priced together in one model call, after at
+most --batch-wait-ms or once --max-batch requests are waiting. Model calls
+and reloads of replaced artifacts run on a thread pool so the event loop
+keeps accepting requests; with --processes N the server forks N processes
+sharing the listening socket.
+
+Usage:
+    python scripts/valuex_service.py --port 8600
+    curl -X POST localhost:8600/v1/predict -d '{"market": "usa", "bedrooms": 3, ...}'
+
+Author: Data Analysis Team
+Date: November 2025
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import tornado.httpserver
+import tornado.netutil
+import tornado.process
+import tornado.web
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+
+from valuex_location import normalize_postal_code
+from valuex_market import (DEFAULT_COMPARABLES, comparables_path, load_comparables, load_market_stats,
+                           locate_properties, market_stats_path, nearest_comparables)
+from valuex_model import (DEFAULT_CACHE_ENTRIES, DEFAULT_CACHE_TTL_SECONDS, DEFAULT_MODEL_DIR, FEATURE_FIELDS,
+                          FLAG_VALUES, MARKETS, PredictionCache, artifact_path, features_frame, load_or_train,
+                          PREDICTION_COLUMNS, market_key, normalize_field_name, predict_cached,
+                          predict_prices)
+
+logger = logging.getLogger("valuex.service")
+
+DEFAULT_MAX_BATCH = 256
+DEFAULT_BATCH_WAIT_MS = 2.0
+MAX_BATCH_REQUEST_ROWS = 100_000
+MAX_COMPARABLES = 50
+
+REQUESTS = Counter('valuex_requests_total', "Prediction requests", ['endpoint', 'market', 'status'])
+REQUEST_LATENCY = Histogram('valuex_request_latency_seconds', "End-to-end request latency", ['endpoint'],
+                            buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 10))
+BATCH_SIZE = Histogram('valuex_model_batch_size', "Rows per model call", ['market'],
+                       buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 1024, 10_000, 100_000))
+CACHE_STATS = Gauge('valuex_prediction_cache', "Prediction cache counters and size", ['stat'])
+QUEUE_DEPTH = Gauge('valuex_queue_depth', "Single-property requests waiting for a model call", ['market'])
+
+class ModelRegistry:
+    """Model artifacts, comparables indexes and market stats, reloaded when their files are replaced"""
+
+    def __init__(self, model_dir=DEFAULT_MODEL_DIR):
+        self.model_dir = model_dir
+        self.loaded = {}
+        self.lock = threading.Lock()
+
+    def _load(self, kind, market, path, loader):
+        mtime = os.path.getmtime(path) if os.path.exists(path) else None
+        cached = self.loaded.get((kind, market))
+        if cached is None or cached[0] != mtime:
+            with self.lock:
+                cached = self.loaded.get((kind, market))
+                if cached is None or cached[0] != mtime:
+                    value = loader(market, self.model_dir)
+                    cached = self.loaded[(kind, market)] = (os.path.getmtime(path), value)
+                    logger.info("loaded %s %s from %s", market, kind, path)
+        return cached[1]
+
+    def get(self, market):
+        return self._load('model', market, artifact_path(market, self.model_dir), load_or_train)
+
+    def comparables(self, market):
+        return self._load('comparables', market, comparables_path(market, self.model_dir), load_comparables)
+
+    def locations(self, market):
+        stats = self._load('market_stats', None, market_stats_path(self.model_dir),
+                           lambda _, model_dir: load_market_stats(model_dir))
+        return stats['markets'][market]['locations']
+
+    def versions(self):
+        # Copied first: the thread pool may be loading another artifact meanwhile
+        loaded = list(self.loaded.items())
+        return {market: value['version'] for (kind, market), (_, value) in loaded if kind == 'model'}
+
+class MicroBatcher:
+    """Collects concurrent single-property requests per market into one model call"""
+
+    def __init__(self, registry, executor, cache, max_batch=DEFAULT_MAX_BATCH, batch_wait_ms=DEFAULT_BATCH_WAIT_MS):
+        self.registry = registry
+        self.executor = executor
+        self.cache = cache
+        self.max_batch = max_batch
+        self.batch_wait = batch_wait_ms / 1000
+        self.queues = {}
+        self.workers = {}
+
+    def queue_depths(self):
+        return {market: queue.qsize() for market, queue in self.queues.items()}
+
+    async def artifact(self, market):
+        """The market's model artifact, resolved on the thread pool.
+
+        A replaced artifact is reloaded (or retrained) under the registry
+        lock, which must not block the event loop.
+        """
+        return await asyncio.get_running_loop().run_in_executor(self.executor, self.registry.get, market)
+
+    async def predict(self, market, record):
+        """Price one property: from the cache when possible, else queued for the next model call.
+
+        Returns (prediction fields, model artifact).
+        """
+        artifact = await self.artifact(market)
+        key = self.cache.key(market, record)
+        cached = self.cache.get(key, artifact['version'])
+        if cached is not None:
+            return prediction_fields(cached), artifact
+
+        if market not in self.queues:
+            self.queues[market] = asyncio.Queue()
+            self.workers[market] = asyncio.ensure_future(self._run(market))
+        future = asyncio.get_running_loop().create_future()
+        await self.queues[market].put((record, future))
+        QUEUE_DEPTH.labels(market).set(self.queues[market].qsize())
+        return await future
+
+    async def _run(self, market):
+        queue = self.queues[market]
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await queue.get()]
+            deadline = loop.time() + self.batch_wait
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            QUEUE_DEPTH.labels(market).set(queue.qsize())
+
+            records = [record for record, _ in batch]
+            try:
+                predictions, artifact = await loop.run_in_executor(self.executor, self._score_queued, market, records)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for (_, future), row in zip(batch, predictions.itertuples(index=False, name=None)):
+                if not future.done():
+                    future.set_result((prediction_fields(row), artifact))
+
+    def _score_queued(self, market, records):
+        # Queued requests already missed the cache; price them all and remember the results
+        artifact = self.registry.get(market)
+        BATCH_SIZE.labels(market).observe(len(records))
+        predictions = predict_prices(artifact, features_frame(records))
+        for record, row in zip(records, predictions.itertuples(index=False, name=None)):
+            self.cache.put(self.cache.key(market, record), artifact['version'], row)
+        return predictions, artifact
+
+    def score(self, market, records):
+        """Price a list of parsed properties, cache misses in one model call.
+
+        Returns (list of prediction fields, model artifact).
+        """
+        artifact = self.registry.get(market)
+        BATCH_SIZE.labels(market).observe(len(records))
+        predictions = predict_cached(self.cache, artifact, records)
+        return [prediction_fields(row) for row in predictions.itertuples(index=False, name=None)], artifact
+
+    def score_with_comparables(self, market, records, k):
+        """score() plus up to ``k`` comparable sales per property"""
+        predictions, artifact = self.score(market, records)
+        comparables = [[] for _ in records]
+        if k > 0:
+            index = self.registry.comparables(market)
+            frame = pd.DataFrame(records)
+            lat, lon = locate_properties(self.registry.locations(market), frame)
+            located = np.flatnonzero((lat.notna() & lon.notna()).to_numpy())
+            if len(located):
+                subject_ids = frame['id'].iloc[located] if 'id' in frame.columns else None
+                positions, distances, similar = nearest_comparables(
+                    index, lat.iloc[located], lon.iloc[located],
+                    frame['sqft'].iloc[located], frame['grade'].iloc[located], k, subject_ids)
+                sales = index['sales']
+                for row, sale_positions, sale_distances, sale_similar in zip(located, positions, distances, similar):
+                    comparables[row] = [{
+                        'id': int(sales['id'][position]),
+                        'price': float(sales['price'][position]),
+                        'distance_km': round(float(distance), 3),
+                        'sqft': float(sales['sqft'][position]),
+                        'grade': int(sales['grade'][position]),
+                        'similar': bool(is_similar),
+                    } for position, distance, is_similar in zip(sale_positions, sale_distances, sale_similar)]
+        return predictions, artifact, comparables
+
+def prediction_fields(row):
+    """JSON fields for one (price, low, high) prediction row, rounded to whole currency units"""
+    return {column: float(round(value)) for column, value in zip(PREDICTION_COLUMNS, row)}
+
+def parse_property(payload):
+    """Validate one property's JSON fields and return them keyed by form-field name"""
+    if not isinstance(payload, dict):
+        raise ValueError("each property must be a JSON object")
+    fields = {normalize_field_name(key): value for key, value in payload.items()}
+    record = {}
+    for field in FEATURE_FIELDS:
+        value = fields.get(field)
+        if field in ('waterfront', 'renovated'):
+            if isinstance(value, str):
+                if value.strip().lower() not in FLAG_VALUES:
+                    raise ValueError(f"'{field}' must be a yes/no flag, got {value!r}")
+                value = FLAG_VALUES[value.strip().lower()]
+            value = bool(value)
+        elif isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ValueError(f"'{field}' must be a number, got {value!r}")
+        record[field] = value
+    if 'postal_code' in fields:
+        record['postal_code'] = normalize_postal_code(fields['postal_code'])
+    if isinstance(fields.get('lat'), (int, float)) and isinstance(fields.get('lon'), (int, float)):
+        record['lat'], record['lon'] = float(fields['lat']), float(fields['lon'])
+    return record
+
+def parse_market(payload):
+    market = payload.get('market') if isinstance(payload, dict) else None
+    if market is None:
+        raise ValueError("'market' is required (one of: " + ", ".join(sorted(MARKETS)) + ")")
+    return market_key(market)
+
+class BaseHandler(tornado.web.RequestHandler):
+    endpoint = None
+
+    def prepare(self):
+        self.started = time.perf_counter()
+
+    def on_finish(self):
+        if self.endpoint is not None:
+            REQUEST_LATENCY.labels(self.endpoint).observe(time.perf_counter() - self.started)
+
+    def json_body(self):
+        try:
+            return json.loads(self.request.body or b'{}')
+        except json.JSONDecodeError as e:
+            raise ValueError(f"invalid JSON: {e}")
+
+    def fail(self, status, message, market='unknown'):
+        REQUESTS.labels(self.endpoint, market, str(status)).inc()
+        self.set_status(status)
+        self.finish({'error': message})
+
+class PredictHandler(BaseHandler):
+    endpoint = 'predict'
+
+    async def post(self):
+        try:
+            payload = self.json_body()
+            market = parse_market(payload)
+            record = parse_property(payload)
+        except ValueError as e:
+            return self.fail(400, str(e))
+
+        try:
+            prediction, artifact = await self.application.settings['batcher'].predict(market, record)
+        except Exception as e:
+            logger.exception("prediction failed")
+            return self.fail(500, f"prediction failed: {e}", market)
+
+        REQUESTS.labels(self.endpoint, market, '200').inc()
+        self.finish({
+            'market': market,
+            'currency': MARKETS[market]['currency'],
+            **prediction,
+            'interval_level': artifact['intervals']['level'],
+            'model_version': artifact['version'],
+            'latency_ms': (time.perf_counter() - self.started) * 1000,
+        })
+
+class BatchPredictHandler(BaseHandler):
+    endpoint = 'predict_batch'
+
+    async def post(self):
+        try:
+            payload = self.json_body()
+            market = parse_market(payload)
+            properties = payload.get('properties')
+            if not isinstance(properties, list) or not properties:
+                raise ValueError("'properties' must be a non-empty list")
+            if len(properties) > MAX_BATCH_REQUEST_ROWS:
+                raise ValueError(f"at most {MAX_BATCH_REQUEST_ROWS:,} properties per request")
+            records = [parse_property(item) for item in properties]
+            k = payload.get('comparables', DEFAULT_COMPARABLES)
+            if isinstance(k, bool) or not isinstance(k, int) or not 0 <= k <= MAX_COMPARABLES:
+                raise ValueError(f"'comparables' must be an integer from 0 to {MAX_COMPARABLES}")
+        except ValueError as e:
+            return self.fail(400, str(e))
+
+        batcher = self.application.settings['batcher']
+        loop = asyncio.get_running_loop()
+        try:
+            predictions, artifact, comparables = await loop.run_in_executor(
+                batcher.executor, batcher.score_with_comparables, market, records, k)
+        except Exception as e:
+            logger.exception("batch prediction failed")
+            return self.fail(500, f"prediction failed: {e}", market)
+
+        REQUESTS.labels(self.endpoint, market, '200').inc()
+        self.finish({
+            'market': market,
+            'currency': MARKETS[market]['currency'],
+            'model_version': artifact['version'],
+            'interval_level': artifact['intervals']['level'],
+            'predictions': [{**prediction, 'comparables': sales}
+                            for prediction, sales in zip(predictions, comparables)],
+            'latency_ms': (time.perf_counter() - self.started) * 1000,
+        })
+
+class HealthHandler(BaseHandler):
+    def get(self):
+        batcher = self.application.settings['batcher']
+        self.finish({
+            'status': 'ok',
+            'pid': os.getpid(),
+            'models': batcher.registry.versions(),
+            'queue_depth': batcher.queue_depths(),
+            'cache': batcher.cache.stats(),
+        })
+
+class MetricsHandler(BaseHandler):
+    def get(self):
+        cache_stats = self.application.settings['batcher'].cache.stats()
+        for stat in ('entries', 'hits', 'misses', 'evictions', 'expirations', 'invalidations'):
+            CACHE_STATS.labels(stat).set(cache_stats[stat])
+        self.set_header('Content-Type', CONTENT_TYPE_LATEST)
+        self.finish(generate_latest())
+
+def make_app(model_dir=DEFAULT_MODEL_DIR, threads=4, max_batch=DEFAULT_MAX_BATCH,
+             batch_wait_ms=DEFAULT_BATCH_WAIT_MS, cache_entries=DEFAULT_CACHE_ENTRIES,
+             cache_ttl=DEFAULT_CACHE_TTL_SECONDS, preload=True):
+    """Build the Tornado application; with ``preload`` every market's artifacts are loaded up front"""
+    registry = ModelRegistry(model_dir)
+    if preload:
+        for market in MARKETS:
+            registry.get(market)
+            registry.comparables(market)
+            registry.locations(market)
+    batcher = MicroBatcher(registry, ThreadPoolExecutor(max_workers=threads),
+                           PredictionCache(cache_entries, cache_ttl), max_batch, batch_wait_ms)
+    return tornado.web.Application([
+        (r'/v1/predict', PredictHandler),
+        (r'/v1/predict/batch', BatchPredictHandler),
+        (r'/health', HealthHandler),
+        (r'/metrics', MetricsHandler),
+    ], batcher=batcher)
+
+def parse_args():
+    """Parse command line options for the service"""
+    parser = argparse.ArgumentParser(description="Serve ValueX price predictions over HTTP")
+    parser.add_argument('--host', default='0.0.0.0', help="interface to bind (default: 0.0.0.0)")
+    parser.add_argument('--port', type=int, default=8600, help="port to listen on (default: 8600)")
+    parser.add_argument('--processes', type=int, default=1,
+                        help="server processes sharing the socket; 0 = one per CPU (default: 1)")
+    parser.add_argument('--threads', type=int, default=4, help="model threads per process (default: 4)")
+    parser.add_argument('--max-batch', type=int, default=DEFAULT_MAX_BATCH,
+                        help=f"most single requests per model call (default: {DEFAULT_MAX_BATCH})")
+    parser.add_argument('--batch-wait-ms', type=float, default=DEFAULT_BATCH_WAIT_MS,
+                        help=f"longest wait to fill a micro-batch (default: {DEFAULT_BATCH_WAIT_MS})")
+    parser.add_argument('--cache-entries', type=int, default=DEFAULT_CACHE_ENTRIES,
+                        help=f"prediction cache size per process (default: {DEFAULT_CACHE_ENTRIES:,})")
+    parser.add_argument('--cache-ttl', type=float, default=DEFAULT_CACHE_TTL_SECONDS,
+                        help=f"seconds a cached prediction stays valid (default: {DEFAULT_CACHE_TTL_SECONDS})")
+    parser.add_argument('--model-dir', default=DEFAULT_MODEL_DIR, help="directory with the model artifacts")
+    return parser.parse_args()
+
+def main():
+    """Start the prediction service"""
+    args = parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+
+    sockets = tornado.netutil.bind_sockets(args.port, address=args.host)
+    if args.processes != 1:
+        tornado.process.fork_processes(args.processes)
+
+    async def serve():
+        app = make_app(args.model_dir, args.threads, args.max_batch, args.batch_wait_ms,
+                       args.cache_entries, args.cache_ttl)
+        server = tornado.httpserver.HTTPServer(app)
+        server.add_sockets(sockets)
+        logger.info("ValueX service listening on %s:%d (pid %d)", args.host, args.port, os.getpid())
+        await asyncio.Event().wait()
+
+    asyncio.run(serve())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+import codecs
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts'))
+
+import data_filter_pipeline
+from data_filter_pipeline import detect_encoding
+
+def write(tmp_path, data):
+    path = tmp_path / 'data.csv'
+    path.write_bytes(data)
+    return str(path)
+
+def test_utf8_bom_and_latin1(tmp_path):
+    assert detect_encoding(write(tmp_path, 'city\nBengaluru\n'.encode('utf-8'))) == 'utf-8'
+    assert detect_encoding(write(tmp_path, codecs.BOM_UTF8 + 'city\nMünchen\n'.encode('utf-8'))) == 'utf-8-sig'
+    assert detect_encoding(write(tmp_path, 'city\nMünchen\n'.encode('latin-1'))) == 'latin-1'
+
+def test_decoding_continues_across_chunks(tmp_path, monkeypatch):
+    monkeypatch.setattr(data_filter_pipeline, 'ENCODING_CHUNK_BYTES', 4)
+    # 'ü' is two bytes in UTF-8; with 4-byte chunks it straddles the first boundary
+    assert detect_encoding(write(tmp_path, 'abcü,ü\n'.encode('utf-8'))) == 'utf-8'
+    # A stray latin-1 byte far past the first chunk still rules UTF-8 out
+    assert detect_encoding(write(tmp_path, b'a,b\n' * 10 + 'ü\n'.encode('latin-1'))) == 'latin-1'
+
+def test_sample_bytes_only_inspects_the_start(tmp_path):
+    path = write(tmp_path, b'a,b\n' * 10 + 'ü\n'.encode('latin-1'))
+    assert detect_encoding(path, sample_bytes=8) == 'utf-8'
+    # A sample ending inside a multi-byte character is not an error
+    path = write(tmp_path, 'abcü'.encode('utf-8'))
+    assert detect_encoding(path, sample_bytes=4) == 'utf-8'
+
+def test_no_candidate_decodes(tmp_path):
+    with pytest.raises(ValueError):
+        detect_encoding(write(tmp_path, b'\xff\xfe'), candidates=['utf-8', 'ascii'])
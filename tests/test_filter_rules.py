@@ -0,0 +1,78 @@
+import contextlib
+import io
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts'))
+
+from data_filter_pipeline import GENERIC_RULES, HousePriceDataFilter, evaluate_filter_rules, rule_bitmask_dtype
+
+RULES = [
+    {'name': 'price_not_null', 'type': 'not_null', 'columns': ['price']},
+    {'name': 'price_range', 'type': 'range', 'columns': ['price'], 'min': 0, 'min_inclusive': False, 'max': 1000},
+    {'name': 'in_bbox', 'type': 'bbox', 'columns': ['lat', 'lon'], 'lat_range': (47, 48), 'lon_range': (-123, -121)},
+    {'name': 'date_valid', 'type': 'valid_date', 'columns': ['date']},
+    {'name': 'rooms_range', 'type': 'range', 'columns': ['rooms'], 'min': 1, 'max': 5},
+]
+
+def frame():
+    return pd.DataFrame({
+        'price': [500.0, np.nan, 0.0, 2000.0, 1000.0],
+        'lat': [47.5, 47.5, 49.0, 47.5, 47.5],
+        'lon': [-122.0, -122.0, -122.0, -122.0, -122.0],
+        'date': ['2014-10-13', '2014-10-13', '2014-10-13', 'not a date', '2015-01-01'],
+    })
+
+def test_rules_combine_into_one_mask():
+    keep, rejected, replacements, failed_bits = evaluate_filter_rules(frame(), RULES)
+    assert keep.tolist() == [True, False, False, False, True]
+    # A row counts against every rule it fails (a null price fails the range too);
+    # rules on missing columns are skipped
+    assert rejected == {'price_not_null': 1, 'price_range': 3, 'in_bbox': 1, 'date_valid': 1}
+    assert replacements['date'].iloc[4] == pd.Timestamp('2015-01-01')
+    assert failed_bits is None
+
+def test_range_bounds_and_nulls():
+    df = pd.DataFrame({'year': [1799, 1800, 2000, np.nan]})
+    rule = {'name': 'year_range', 'type': 'range', 'columns': ['year'], 'min': 1800, 'max': 'current_year'}
+    keep, _, _, _ = evaluate_filter_rules(df, [rule])
+    assert keep.tolist() == [False, True, True, False]
+    keep, _, _, _ = evaluate_filter_rules(df, [{**rule, 'allow_null': True}])
+    assert keep.tolist() == [False, True, True, True]
+
+def test_generic_rules_drop_empty_and_duplicate_rows():
+    df = pd.DataFrame({'a': [1, np.nan, 1, 2], 'b': ['x', None, 'x', 'y']})
+    keep, rejected, _, _ = evaluate_filter_rules(df, GENERIC_RULES)
+    assert keep.tolist() == [True, False, False, True]
+    assert rejected == {'row_not_empty': 1, 'row_not_duplicate': 1}
+
+def test_failed_rule_bits_follow_rule_positions():
+    _, _, _, failed_bits = evaluate_filter_rules(frame(), RULES, with_bitmask=True)
+    assert failed_bits.dtype == np.uint8
+    # Bits are the rules' positions in RULES, including the skipped rooms_range (bit 4)
+    assert failed_bits.tolist() == [0, 0b11, 0b110, 0b1010, 0]
+
+def test_bitmask_dtype_grows_with_the_rules():
+    assert rule_bitmask_dtype(RULES[:1] * 8) == np.uint8
+    assert rule_bitmask_dtype(RULES[:1] * 9) == np.uint16
+    assert rule_bitmask_dtype(RULES[:1] * 64) == np.uint64
+    assert rule_bitmask_dtype(RULES[:1] * 65) is None
+
+def test_rejected_rows_sidecar(tmp_path):
+    input_dir = tmp_path / 'in'
+    input_dir.mkdir()
+    pd.DataFrame({'a': [1, 2, 1, None], 'b': ['x', 'y', 'x', None]}).to_csv(input_dir / 'misc.csv', index=False)
+
+    for stream_chunksize in (None, 2):
+        output_dir = tmp_path / f'out-{stream_chunksize}'
+        pipeline = HousePriceDataFilter(input_dir=str(input_dir), output_dir=str(output_dir),
+                                        stream_chunksize=stream_chunksize, save_rejected_rows=True)
+        with contextlib.redirect_stdout(io.StringIO()):
+            pipeline.run_pipeline()
+        rejected = pd.read_csv(output_dir / 'misc.rejected.csv')
+        bits = {rule['name']: bit for bit, rule in enumerate(GENERIC_RULES)}
+        assert sorted(rejected['_failed_rules'].tolist()) == sorted([1 << bits['row_not_empty'],
+                                                                     1 << bits['row_not_duplicate']])
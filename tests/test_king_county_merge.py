@@ -0,0 +1,108 @@
+import contextlib
+import io
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts'))
+
+from data_filter_pipeline import HousePriceDataFilter, KingCountyMerger, canonicalize_king_county
+
+HOUSING_HEADER = ('id,date,price,bedrooms,bathrooms,sqft_living,sqft_lot,floors,waterfront,view,condition,grade,'
+                  'sqft_above,sqft_basement,yr_built,yr_renovated,zipcode,lat,long,sqft_living15,sqft_lot15\n')
+
+def sales(ids, prices, dates=None):
+    dates = dates or ['2014-10-13'] * len(ids)
+    return pd.DataFrame({'id': ids, 'date': pd.to_datetime(dates), 'price': prices})
+
+def test_canonicalize_king_county_matches_housing_encoding():
+    housing = pd.DataFrame({'id': [6414100192], 'date': ['20141209T000000'], 'floors': ['"2"'],
+                            'waterfront': [0], 'condition': [3], 'zipcode': ['"98125"'], 'lat': [47.721]})
+    house_prices = pd.DataFrame({'id': [6414100192], 'date': ['20141209T000000'], 'floors': [2.0],
+                                 'waterfront': ['N'], 'condition': ['average'], 'zipcode': [98125],
+                                 'lat': [47.721000000000004]})
+    canonical = canonicalize_king_county(housing)
+    pd.testing.assert_frame_equal(canonical, canonicalize_king_county(house_prices), check_dtype=False)
+    assert canonical['date'].iloc[0] == pd.Timestamp('2014-12-09')
+    assert canonical.loc[0, ['floors', 'waterfront', 'condition', 'zipcode']].tolist() == [2, 0, 3, 98125]
+
+def test_merger_counts_overlapping_and_conflicting_sales():
+    merger = KingCountyMerger()
+    first = merger.add('Housing.csv', sales([1, 2, 3, 3], [100, 200, 300, 300]))
+    assert first['id'].tolist() == [1, 2, 3]
+
+    # 1 is the same sale, 2 the same sale at another price, 4 new, 5 repeated within the file
+    second = merger.add('house_prices.csv', sales([1, 2, 4, 5, 5], [100, 250, 400, 500, 500]))
+    assert second['id'].tolist() == [4, 5]
+
+    stats = merger.stats()
+    assert stats['input_rows'] == 9
+    assert stats['merged_rows'] == 5
+    assert stats['overlapping_sales'] == 2
+    assert stats['conflicting_sales'] == 1
+    assert stats['sources']['Housing.csv'] == {'rows': 4, 'duplicate_keys': 1, 'overlapping_rows': 0,
+                                               'unique_rows': 3}
+    assert stats['sources']['house_prices.csv'] == {'rows': 5, 'duplicate_keys': 1, 'overlapping_rows': 2,
+                                                    'unique_rows': 2}
+
+def test_merger_keys_on_id_and_date():
+    merger = KingCountyMerger()
+    merger.add('Housing.csv', sales([1], [100], ['2014-10-13']))
+    resale = merger.add('house_prices.csv', sales([1, 1], [150, 100], ['2015-03-02', '2014-10-13']))
+    assert resale['price'].tolist() == [150]
+    assert merger.stats()['overlapping_sales'] == 1
+
+def test_chunked_merge_matches_whole_frames():
+    rng = np.random.default_rng(0)
+    frames = {filename: sales(rng.integers(0, 300, 500).tolist(), rng.integers(1, 4, 500).tolist())
+              for filename in ('Housing.csv', 'house_prices.csv')}
+
+    whole = KingCountyMerger()
+    merged_whole = pd.concat([whole.add(filename, df) for filename, df in frames.items()])
+    chunked = KingCountyMerger()
+    merged_chunked = pd.concat([chunked.add(filename, df.iloc[start:start + 37])
+                                for filename, df in frames.items() for start in range(0, len(df), 37)])
+
+    pd.testing.assert_frame_equal(merged_chunked, merged_whole)
+    assert chunked.stats() == whole.stats()
+    assert whole.stats()['merged_rows'] == len(merged_whole) == merged_whole['id'].nunique()
+
+def run_pipeline(input_dir, output_dir, **kwargs):
+    pipeline = HousePriceDataFilter(input_dir=str(input_dir), output_dir=str(output_dir), **kwargs)
+    log = io.StringIO()
+    with contextlib.redirect_stdout(log):
+        pipeline.run_pipeline()
+    return pipeline, log.getvalue()
+
+def test_incremental_run_reuses_an_unchanged_merge(tmp_path):
+    input_dir = tmp_path / 'in'
+    input_dir.mkdir()
+    (input_dir / 'Housing.csv').write_text(
+        HOUSING_HEADER
+        + '"7129300520","20141013T000000",221900,3,1,1180,5650,"1",0,0,3,7,1180,0,1955,0,"98178",47.5112,-122.257,1340,5650\n'
+        + '"6414100192","20141209T000000",538000,3,2.25,2570,7242,"2",0,0,3,7,2170,400,1951,1991,"98125",47.721,-122.319,1690,7639\n')
+    (input_dir / 'house_prices.csv').write_text(
+        HOUSING_HEADER
+        + '6414100192,20141209T000000,538000.0,3,2.25,2570,7242,2.0,N,0,Average,7,2170,400,1951,1991,98125,47.721000000000004,-122.319,1690,7639\n'
+        + '5631500400,20150225T000000,180000.0,2,1.0,770,10000,1.0,N,0,Average,6,770,0,1933,0,98028,47.7379,-122.233,2720,8062\n')
+    output_dir = tmp_path / 'out'
+
+    pipeline, _ = run_pipeline(input_dir, output_dir, incremental=True)
+    assert pipeline.merge_report['merged_rows'] == 3
+    assert pipeline.merge_report['overlapping_sales'] == 1
+    assert pipeline.merge_report['conflicting_sales'] == 0
+    merged_path = output_dir / 'king_county_sales.csv'
+    merged = merged_path.read_bytes()
+
+    pipeline, log = run_pipeline(input_dir, output_dir, incremental=True)
+    assert 'Unchanged sources - reusing king_county_sales.csv' in log
+    assert pipeline.merge_report['merged_rows'] == 3
+    assert merged_path.read_bytes() == merged
+
+    # A damaged output is rebuilt even though its sources are unchanged
+    merged_path.write_bytes(merged[:-20])
+    _, log = run_pipeline(input_dir, output_dir, incremental=True)
+    assert 'reusing king_county_sales.csv' not in log
+    assert merged_path.read_bytes() == merged
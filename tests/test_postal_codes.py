@@ -0,0 +1,29 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts'))
+
+from valuex_location import normalize_postal_code, normalize_postal_codes
+from valuex_market import market_position
+
+def test_postal_codes_normalize_alike():
+    codes = pd.Series([98178.0, np.nan, 98103.0])
+    assert normalize_postal_codes(codes).tolist() == ['98178', '', '98103']
+    assert normalize_postal_codes(['98178', ' 98103', 98125]).tolist() == ['98178', '98103', '98125']
+    assert [normalize_postal_code(code) for code in (98178.0, 98178, ' 98178 ', None, np.nan)] == \
+        ['98178', '98178', '98178', '', '']
+
+def test_market_position_matches_numeric_postal_codes():
+    distribution = {'count': 40, 'mean': 500.0, 'quantiles': np.linspace(100, 900, 101), 'histogram': [40]}
+    stats = {'markets': {'usa': {
+        'market': {**distribution, 'mean': 700.0},
+        'postal_codes': {'98178': distribution},
+        'bin_edges': [100, 900],
+    }}}
+    for code in ('98178', 98178, 98178.0):
+        assert market_position(stats, 'usa', 500.0, code)['scope'] == 'postal_code'
+    assert market_position(stats, 'usa', 500.0, None)['scope'] == 'market'
+    assert market_position(stats, 'usa', 500.0, 98103)['scope'] == 'market'
@@ -0,0 +1,55 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts'))
+
+import valuex_model
+from valuex_model import PredictionCache
+
+PROPERTY = {'bedrooms': 3, 'bathrooms': 2, 'sqft': 1800, 'floors': 1, 'year_built': 1990, 'lot_size': 5000,
+            'condition': 3, 'grade': 7, 'view': 0, 'waterfront': False, 'renovated': False,
+            'postal_code': '98178'}
+
+def test_key_normalizes_equivalent_inputs():
+    same = {**PROPERTY, 'bathrooms': 2.0, 'waterfront': 'N', 'renovated': 0, 'postal_code': 98178.0}
+    assert PredictionCache.key('usa', same) == PredictionCache.key('usa', PROPERTY)
+    assert PredictionCache.key('usa', {**PROPERTY, 'bedrooms': 4}) != PredictionCache.key('usa', PROPERTY)
+    assert PredictionCache.key('india', PROPERTY) != PredictionCache.key('usa', PROPERTY)
+
+def test_least_recently_used_entry_is_evicted():
+    cache = PredictionCache(max_entries=2, ttl_seconds=60)
+    keys = [PredictionCache.key('usa', {**PROPERTY, 'bedrooms': n}) for n in (1, 2, 3)]
+    cache.put(keys[0], 'v1', 'a')
+    cache.put(keys[1], 'v1', 'b')
+    assert cache.get(keys[0], 'v1') == 'a'
+    cache.put(keys[2], 'v1', 'c')
+    assert cache.get(keys[1], 'v1') is None
+    assert cache.get(keys[0], 'v1') == 'a'
+    assert cache.get(keys[2], 'v1') == 'c'
+    stats = cache.stats()
+    assert (stats['entries'], stats['evictions'], stats['hits'], stats['misses']) == (2, 1, 3, 1)
+
+def test_entries_expire(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(valuex_model.time, 'monotonic', lambda: now[0])
+    cache = PredictionCache(max_entries=10, ttl_seconds=5)
+    key = PredictionCache.key('usa', PROPERTY)
+    cache.put(key, 'v1', 'a')
+    now[0] += 4
+    assert cache.get(key, 'v1') == 'a'
+    now[0] += 2
+    assert cache.get(key, 'v1') is None
+    assert cache.stats()['expirations'] == 1
+
+def test_new_model_version_drops_only_that_markets_entries():
+    cache = PredictionCache(max_entries=10, ttl_seconds=60)
+    usa, india = PredictionCache.key('usa', PROPERTY), PredictionCache.key('india', PROPERTY)
+    cache.put(usa, 'usa-v1', 'a')
+    cache.put(india, 'india-v1', 'b')
+    assert cache.get(usa, 'usa-v2') is None
+    assert cache.get(india, 'india-v1') == 'b'
+    cache.put(usa, 'usa-v2', 'c')
+    assert cache.get(usa, 'usa-v2') == 'c'
+    stats = cache.stats()
+    assert stats['invalidations'] == 1
+    assert stats['model_versions'] == {'usa': 'usa-v2', 'india': 'india-v1'}
@@ -0,0 +1,31 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts'))
+
+from data_filter_pipeline import asof_index_levels, excel_serial_to_datetime, quarter_end_dates
+
+INDEX_DATES = np.array(['2014-06-30', '2014-09-30', '2014-12-31'], dtype='datetime64[ns]')
+INDEX_VALUES = np.array([105.12, 109.38, 111.95])
+
+def test_mid_quarter_sale_uses_its_own_quarter():
+    dates = np.array(['2014-10-13', '2014-09-30', '2014-07-01', '2014-12-31'], dtype='datetime64[ns]')
+    levels = asof_index_levels(dates, INDEX_DATES, INDEX_VALUES)
+    np.testing.assert_array_equal(levels, [111.95, 109.38, 109.38, 111.95])
+
+def test_sales_outside_the_index_range():
+    dates = np.array(['2015-05-01', '2014-03-31', 'NaT'], dtype='datetime64[ns]')
+    levels = asof_index_levels(dates, INDEX_DATES, INDEX_VALUES)
+    assert levels[0] == 111.95
+    assert np.isnan(levels[1:]).all()
+
+def test_quarter_end_dates():
+    dates = np.array(['2016-05-01', '2015-01-01', '1969-11-05', 'NaT'], dtype='datetime64[ns]')
+    expected = np.array(['2016-06-30', '2015-03-31', '1969-12-31', 'NaT'], dtype='datetime64[ns]')
+    np.testing.assert_array_equal(quarter_end_dates(dates), expected)
+
+def test_excel_serial_dates():
+    dates = excel_serial_to_datetime([42491, 42734, None])
+    np.testing.assert_array_equal(dates, np.array(['2016-05-01', '2016-12-30', 'NaT'], dtype='datetime64[ns]'))
@@ -0,0 +1,46 @@
+import contextlib
+import io
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts'))
+
+from data_filter_pipeline import HousePriceDataFilter, SpilledHashSet
+
+def test_spilled_hash_set_matches_numpy(tmp_path):
+    rng = np.random.default_rng(0)
+    hashes = SpilledHashSet(str(tmp_path), buffer_rows=64)
+    added = np.empty(0, dtype='uint64')
+    for _ in range(40):
+        batch = rng.integers(0, 2000, size=rng.integers(0, 200)).astype('uint64')
+        probe = rng.integers(0, 2000, size=50).astype('uint64')
+        np.testing.assert_array_equal(hashes.contains(probe), np.isin(probe, added))
+        hashes.add(batch)
+        added = np.concatenate([added, batch])
+
+    assert hashes.added == len(added)
+    assert hashes.duplicates() == len(added) - len(np.unique(added))
+    # Runs of similar size are merged, so only a logarithmic number stay on disk
+    assert len(hashes.runs) <= np.log2(len(added)) + 1
+
+def test_stream_drops_duplicates_across_chunks(tmp_path):
+    input_dir = tmp_path / 'in'
+    input_dir.mkdir()
+    rows = pd.DataFrame({'a': [1, 2, 1, 3, 2, 1, 4], 'b': ['x', 'y', 'x', 'z', 'y', 'x', 'w']})
+    rows.to_csv(input_dir / 'misc.csv', index=False)
+
+    pipeline = HousePriceDataFilter(input_dir=str(input_dir), output_dir=str(tmp_path / 'out'), stream_chunksize=2)
+    with contextlib.redirect_stdout(io.StringIO()):
+        pipeline.run_pipeline()
+
+    report = pipeline.streamed_reports['misc']
+    assert report['original_duplicates'] == 3
+    assert report['filtered_duplicates'] == 0
+    assert report['rule_rejections']['row_not_duplicate'] == 3
+    output = pd.read_csv(tmp_path / 'out' / 'misc.csv')
+    assert output.to_dict('list') == {'a': [1, 2, 3, 4], 'b': ['x', 'y', 'z', 'w']}
+    # The spilled hash runs are removed with the run
+    assert not [name for name in os.listdir(tmp_path / 'out') if name.startswith('.row-hashes-')]